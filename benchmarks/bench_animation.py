@@ -0,0 +1,95 @@
+import json
+import os
+import statistics
+import sys
+import time
+
+os.environ.setdefault("QT_QPA_PLATFORM", "offscreen")
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "src"))
+
+from PyQt6.QtCore import QEventLoop, Qt, QTimer
+from PyQt6.QtWidgets import QApplication
+
+import main
+
+# Fast numpad typing on a shown window while every button's hover fades in
+# and out: how late each keystroke is handled compared with when it was due,
+# and what the animation clock did meanwhile (frames, steps, frames dropped
+# because the event loop was behind, steps left for the next frame). Showing
+# the window starts its worker, which is stopped at the end.
+
+KEYS = "7894561230"
+TYPE_MS = 30
+HOVER_MS = 50
+SECONDS = 3.0
+
+
+def run(seconds=SECONDS):
+    app = QApplication.instance() or QApplication(sys.argv)
+    window = main.ModernCalculator()
+    window.resize(500, 750)
+    window.show()
+    app.processEvents()
+    clock = window.clock
+    buttons = list(window.buttons.values())
+
+    lags = []
+    handled = []
+    typed = 0
+    due = time.perf_counter()
+
+    def type_key():
+        nonlocal typed, due
+        now = time.perf_counter()
+        lags.append(now - due)
+        due = now + TYPE_MS / 1000
+        start = time.perf_counter()
+        window.on_button_click(KEYS[typed % len(KEYS)])
+        handled.append(time.perf_counter() - start)
+        typed += 1
+        if len(window.current_input) > 200:
+            window.clear_all()
+
+    entered = False
+
+    def hover_all():
+        nonlocal entered
+        entered = not entered
+        for button in buttons:
+            clock.animate((button, "hover"), button.hover, 1.0 if entered else 0.0, main.HOVER_MS, button.set_hover)
+
+    typing = QTimer()
+    typing.setTimerType(Qt.TimerType.PreciseTimer)
+    typing.setInterval(TYPE_MS)
+    typing.timeout.connect(type_key)
+    hovering = QTimer()
+    hovering.setInterval(HOVER_MS)
+    hovering.timeout.connect(hover_all)
+    loop = QEventLoop()
+    QTimer.singleShot(int(seconds * 1000), loop.quit)
+    typing.start()
+    hovering.start()
+    loop.exec()
+    typing.stop()
+    hovering.stop()
+    window.preview_timer.stop()
+    window.evaluator.stop()
+    window.close()
+    app.processEvents()
+
+    lags.sort()
+    return {
+        "keystrokes": typed,
+        "keystroke_lag_ms_p50": round(statistics.median(lags) * 1000, 3),
+        "keystroke_lag_ms_p99": round(lags[int(len(lags) * 0.99)] * 1000, 3),
+        "keystroke_lag_ms_max": round(lags[-1] * 1000, 3),
+        "keystroke_handling_us_median": round(statistics.median(handled) * 1e6, 2),
+        "frames": clock.frames,
+        "steps": clock.steps,
+        "late_frames": clock.late_frames,
+        "deferred_steps": clock.deferred_steps,
+    }
+
+
+if __name__ == "__main__":
+    print(json.dumps(run(), indent=2))
@@ -0,0 +1,116 @@
+import json
+import math
+import os
+import re
+import sys
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "src"))
+
+import engine
+import precise
+
+# calculate() throughput over a corpus shaped like what people type: short
+# arithmetic, scientific functions, powers and factorials, and some errors.
+# The adaptive-precision evaluation of the "=" key is measured on the same
+# corpus, with how many results needed a slower path, and so are list
+# expressions over a million elements. The cold path is also compared with
+# the string rewriting and eval() that "=" used before the engine, on the
+# part of the corpus that eval() evaluated. Results that are zero but for
+# rounding must show as "0" on every path.
+
+CORPUS = [
+    "1+1", "12×34", "355÷113", "2^10", "7mod3", "-5+3", "(1+2)×(3+4)",
+    "3.14159×2.5^2", "1/(1+1/(1+1/(1+1)))", "0.1+0.2", "1e10÷3",
+    "sin(1)", "cos(π÷3)", "tan(0.5)", "ln(e^2)", "log(1000)", "2sin(1)cos(1)",
+    "10!", "20!÷18!", "170!", "2^0.5", "(2+3)^(1+1)^2", "e^π-π",
+    "99999999×99999999", "1÷0", "0÷0", "5+", "sin(", "(1+2", "2^1000",
+]
+DURATION = 0.5
+# List expressions over a million elements, timed one evaluation each
+ARRAY_CASES = ["sum(1..1e6)", "sum(sin(1..1e6)^2)", "mean(ln(1..1e6))", "(1..1e6)^2", "max([3, 1..1e6, 7]!)"]
+ZEROS = ["cos(π÷2)", "sin(2π)", "cos(3π÷2)", "tan(π)", "cos(π÷2)×10^8", "tan(π)×1e9"]
+
+
+def eval_calculate(text):
+    # What "=" did before the engine, without the Qt parts
+    if "0/0" in text or "0÷0" in text:
+        return "98k is coming for you"
+    text = text.replace("×", "*").replace("÷", "/").replace("^", "**").replace("mod", "%")
+    text = text.replace("sin", "math.sin").replace("cos", "math.cos").replace("tan", "math.tan")
+    text = text.replace("ln", "math.log").replace("log", "math.log10")
+    text = re.sub(r'(\d+)!', r'math.factorial(\1)', text)
+    try:
+        result = eval(text, {"__builtins__": None, "math": math})
+    except Exception:
+        return "Error"
+    if isinstance(result, float):
+        text = str(int(result)) if result.is_integer() else f"{result:.8f}".rstrip('0').rstrip('.')
+    else:
+        text = str(result)
+    return f"{float(result):.5e}" if len(text) > 12 else text
+
+
+def _eval_ok(text):
+    try:
+        return eval_calculate(text) != "Error"
+    except Exception:
+        return False
+
+
+def _rate(expressions, clear_cache, calculate=engine.calculate):
+    count = 0
+    start = time.perf_counter()
+    while True:
+        for text in expressions:
+            if clear_cache:
+                engine._compile_normalized.cache_clear()
+                precise._compile.cache_clear()
+            calculate(text)
+        count += len(expressions)
+        elapsed = time.perf_counter() - start
+        if elapsed >= DURATION:
+            return count / elapsed
+
+
+def run():
+    cold = _rate(CORPUS, True)
+    warm = _rate(CORPUS, False)
+    adaptive = _rate(CORPUS, False, precise.calculate)
+    common = [text for text in CORPUS if _eval_ok(text)]
+    engine_common = _rate(common, True)
+    eval_common = _rate(common, False, eval_calculate)
+    paths = {}
+    for text in CORPUS:
+        path = precise.calculate(text)[2]
+        paths[path] = paths.get(path, 0) + 1
+    zeros = {text: precise.calculate(text)[1] for text in ZEROS}
+    wrong = [text for text, result in zeros.items() if result != "0"]
+    if wrong:
+        raise RuntimeError(f"not shown as 0: {', '.join(wrong)}")
+    arrays_ms = {}
+    engine.calculate(ARRAY_CASES[0])  # imports NumPy
+    for text in ARRAY_CASES:
+        start = time.perf_counter()
+        engine.calculate(text)
+        arrays_ms[text] = round((time.perf_counter() - start) * 1000, 2)
+    return {
+        "corpus_size": len(CORPUS),
+        "cold_per_second": round(cold),
+        "cold_us_per_expression": round(1e6 / cold, 2),
+        "warm_per_second": round(warm),
+        "warm_us_per_expression": round(1e6 / warm, 2),
+        "adaptive_warm_us_per_expression": round(1e6 / adaptive, 2),
+        "eval_comparison": {
+            "expressions": len(common),
+            "engine_cold_us_per_expression": round(1e6 / engine_common, 2),
+            "eval_us_per_expression": round(1e6 / eval_common, 2),
+        },
+        "adaptive_paths": paths,
+        "zeros": zeros,
+        "arrays_ms": arrays_ms,
+    }
+
+
+if __name__ == "__main__":
+    print(json.dumps(run(), indent=2))
@@ -0,0 +1,46 @@
+import json
+import math
+import os
+import sys
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "src"))
+
+import factorial
+import precise
+
+# Exact factorials from a cold cache against ones built from a nearby cached
+# factorial, and the "=" key on factorials, where a large one on its own is
+# approximated for display instead of computed.
+
+SIZES = [5000, 20000, 100000]
+EQUALS = ["(10^6)!", "100000!", "170.5!", "2.5!", "20000!÷19990!"]
+
+
+def _time(fn, *args):
+    start = time.perf_counter()
+    fn(*args)
+    return round((time.perf_counter() - start) * 1000, 3)
+
+
+def run():
+    exact = {}
+    for n in SIZES:
+        factorial.CACHE.clear()
+        exact[n] = {
+            "math_factorial_ms": _time(math.factorial, n),
+            "cold_ms": _time(factorial.factorial, n),
+            "cached_ms": _time(factorial.factorial, n),
+            "next_ms": _time(factorial.factorial, n + 1),
+            "plus_1000_ms": _time(factorial.factorial, n + 1000),
+            "minus_10_ms": _time(factorial.factorial, n - 10),
+        }
+    equals = {}
+    for text in EQUALS:
+        factorial.CACHE.clear()
+        equals[text] = {"ms": _time(precise.calculate, text), "result": precise.calculate(text)[1]}
+    return {"exact": exact, "equals": equals}
+
+
+if __name__ == "__main__":
+    print(json.dumps(run(), indent=2))
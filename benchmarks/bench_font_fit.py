@@ -0,0 +1,83 @@
+import json
+import os
+import sys
+import time
+
+os.environ.setdefault("QT_QPA_PLATFORM", "offscreen")
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "src"))
+
+from PyQt6.QtGui import QFont, QFontMetrics
+from PyQt6.QtWidgets import QApplication
+
+from fontfit import FontFitter
+
+# Compares the old linear adjust_font_size scan with FontFitter over a
+# synthetic window drag and a typing session on the result label.
+
+TEXTS = ["0", "12345", "3.14159265", "1.23457e+20", "123456789012345",
+         "sin(12)×cos(34)+tan(56)", "(1+2)×(3+4)÷(5+6)-7^8+9!" * 2]
+
+# Widgets need an application for as long as the suite runs
+_app = QApplication.instance() or QApplication(sys.argv)
+
+
+def linear_fit(font, text, target_width, counters):
+    font = QFont(font)
+    for size in range(64, 19, -2):
+        font.setPixelSize(size)
+        fm = QFontMetrics(font)
+        counters["metrics_built"] += 1
+        if fm.horizontalAdvance(text) <= target_width:
+            break
+    return font.pixelSize()
+
+
+def resize_storm():
+    # Drag from the minimum width to 1400px and back, one event per pixel
+    widths = list(range(480, 1400)) + list(range(1400, 480, -1))
+    return [(TEXTS[i % len(TEXTS)], w - 60) for i, w in enumerate(widths)]
+
+
+def typing_session():
+    text = "(1+2)×(3+4)÷(5+6)-7^8+9!-123456789" * 3
+    return [(text[:i], 440) for i in range(1, len(text) + 1)]
+
+
+def measure(events, font):
+    counters = {"metrics_built": 0}
+    start = time.perf_counter()
+    for text, width in events:
+        linear_fit(font, text, width, counters)
+    linear = time.perf_counter() - start
+
+    fitter = FontFitter(font)
+    start = time.perf_counter()
+    for text, width in events:
+        fitter.fit(text, width)
+    fitted = time.perf_counter() - start
+
+    for text, width in events:
+        assert fitter.fit(text, width) == linear_fit(font, text, width, {"metrics_built": 0})
+
+    return {
+        "events": len(events),
+        "linear_us_per_event": linear / len(events) * 1e6,
+        "linear_metrics_built": counters["metrics_built"],
+        "fitter_us_per_event": fitted / len(events) * 1e6,
+        "fitter_metrics_built": fitter.metrics_built,
+        "fitter_widths_measured": fitter.widths_measured,
+        "speedup": linear / fitted if fitted else None,
+    }
+
+
+def run():
+    font = QFont("Segoe UI")
+    font.setWeight(QFont.Weight.Light)
+    return {
+        "resize_storm": measure(resize_storm(), font),
+        "typing": measure(typing_session(), font),
+    }
+
+
+if __name__ == "__main__":
+    print(json.dumps(run(), indent=2))
@@ -0,0 +1,61 @@
+import json
+import os
+import statistics
+import sys
+import time
+
+os.environ.setdefault("QT_QPA_PLATFORM", "offscreen")
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "src"))
+
+from PyQt6.QtWidgets import QApplication
+
+from plot_view import PlotView
+
+# Sampling cost and frame times of the plot view: opening a plot, then a drag
+# of small pans, as the mouse would deliver them, and a settled redraw.
+
+EXPRESSIONS = ["x^2-3", "sin(x)×x", "tan(x)", "sin(1÷x)", "x!", "ln(x)"]
+DRAG_STEPS = 60
+
+# Widgets need an application for as long as the suite runs
+_app = QApplication.instance() or QApplication(sys.argv)
+
+
+def measure(expression):
+    start = time.perf_counter()
+    view = PlotView(expression)
+    view.resize(800, 600)
+    view.refine()
+    view.grab()
+    opened = time.perf_counter() - start
+
+    frames = []
+    for _ in range(DRAG_STEPS):
+        width = view.x1 - view.x0
+        start = time.perf_counter()
+        view.set_view(view.x0 + width / 200, view.x1 + width / 200, view.y0, view.y1)
+        view.grab()
+        frames.append(time.perf_counter() - start)
+
+    start = time.perf_counter()
+    view.refine_timer.stop()
+    view.refine()
+    view.grab()
+    settled = time.perf_counter() - start
+    frames.sort()
+    view.deleteLater()
+    return {
+        "open_ms": round(opened * 1000, 2),
+        "samples": len(view.sampler.xs),
+        "drag_frame_ms_median": round(statistics.median(frames) * 1000, 2),
+        "drag_frame_ms_max": round(frames[-1] * 1000, 2),
+        "settled_frame_ms": round(settled * 1000, 2),
+    }
+
+
+def run():
+    return {expression: measure(expression) for expression in EXPRESSIONS}
+
+
+if __name__ == "__main__":
+    print(json.dumps(run(), indent=2))
@@ -0,0 +1,123 @@
+import argparse
+import asyncio
+import json
+import os
+import subprocess
+import sys
+import tempfile
+import time
+
+ROOT = os.path.join(os.path.dirname(os.path.abspath(__file__)), "..")
+
+# Load generator for "--serve": connections that each keep a window of
+# requests in flight for a fixed time, reporting the sustained requests per
+# second and the latency seen by the client, first with fast expressions
+# only and then with a slow one (a large power, evaluated in the service's
+# pool) mixed in every so often. Run on its own it can also load a service
+# that is already running (--socket).
+
+FAST = ("12×34+sin(1)", "2^10", "1/3+1/7", "(5+3)÷4", "ln(10)×e")
+SLOW = "2^300000"
+SLOW_EVERY = 200
+CONNECTIONS = 4
+WINDOW = 32
+SECONDS = 3.0
+START_TIMEOUT = 30
+
+
+async def _connection(path, seconds, window, slow_every, latencies, counts):
+    reader, writer = await asyncio.open_unix_connection(path, limit=1 << 20)
+    sent = {}
+    next_id = 0
+    deadline = time.perf_counter() + seconds
+
+    def send():
+        nonlocal next_id
+        expression = SLOW if slow_every and next_id % slow_every == slow_every - 1 else FAST[next_id % len(FAST)]
+        writer.write(json.dumps({"id": next_id, "expr": expression}).encode() + b"\n")
+        sent[next_id] = (time.perf_counter(), expression is SLOW)
+        next_id += 1
+
+    for _ in range(window):
+        send()
+    while sent:
+        line = await reader.readline()
+        if not line:
+            break
+        reply = json.loads(line)
+        started, slow = sent.pop(reply["id"])
+        if not slow:
+            latencies.append(time.perf_counter() - started)
+        counts["slow" if slow else "fast"] += 1
+        if time.perf_counter() < deadline:
+            send()
+        if len(sent) < window // 2 or not sent:
+            await writer.drain()
+    writer.close()
+
+
+async def _stats(path):
+    reader, writer = await asyncio.open_unix_connection(path)
+    writer.write(b'{"id": "stats", "op": "stats"}\n')
+    reply = json.loads(await reader.readline())
+    writer.close()
+    return reply["stats"]
+
+
+async def _load(path, connections, seconds, window, slow_every):
+    latencies = []
+    counts = {"fast": 0, "slow": 0}
+    start = time.perf_counter()
+    await asyncio.gather(*(_connection(path, seconds, window, slow_every, latencies, counts)
+                           for _ in range(connections)))
+    elapsed = time.perf_counter() - start
+    latencies.sort()
+    return {
+        "requests_per_s": round((counts["fast"] + counts["slow"]) / elapsed),
+        "fast_requests": counts["fast"],
+        "slow_requests": counts["slow"],
+        "fast_p50_ms": round(latencies[len(latencies) // 2] * 1000, 3) if latencies else None,
+        "fast_p99_ms": round(latencies[int(len(latencies) * 0.99)] * 1000, 3) if latencies else None,
+    }
+
+
+def load(path, connections=CONNECTIONS, seconds=SECONDS, window=WINDOW):
+    report = {
+        "fast_only": asyncio.run(_load(path, connections, seconds, window, 0)),
+        "with_slow": asyncio.run(_load(path, connections, seconds, window, SLOW_EVERY)),
+        "server": asyncio.run(_stats(path)),
+    }
+    if report["with_slow"]["slow_requests"] and not report["server"]["pool"]["count"]:
+        raise RuntimeError(f"{SLOW} was not evaluated in the pool")
+    return report
+
+
+def run(connections=CONNECTIONS, seconds=SECONDS, window=WINDOW):
+    with tempfile.TemporaryDirectory() as tmp:
+        path = os.path.join(tmp, "eval.sock")
+        server = subprocess.Popen([sys.executable, os.path.join(ROOT, "src", "main.py"), "--serve",
+                                   "--socket", path], stderr=subprocess.DEVNULL)
+        try:
+            deadline = time.perf_counter() + START_TIMEOUT
+            while not os.path.exists(path):
+                if server.poll() is not None or time.perf_counter() > deadline:
+                    raise RuntimeError("the service did not start")
+                time.sleep(0.01)
+            return load(path, connections, seconds, window)
+        finally:
+            server.terminate()
+            server.wait()
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Load an evaluation service and report requests per second.")
+    parser.add_argument("--socket", help="load a running service instead of starting one")
+    parser.add_argument("-c", "--connections", type=int, default=CONNECTIONS)
+    parser.add_argument("-s", "--seconds", type=float, default=SECONDS)
+    parser.add_argument("-w", "--window", type=int, default=WINDOW, help="requests in flight per connection")
+    args = parser.parse_args()
+    if args.socket:
+        report = load(args.socket, args.connections, args.seconds, args.window)
+    else:
+        report = run(args.connections, args.seconds, args.window)
+    print(json.dumps(report, indent=2))
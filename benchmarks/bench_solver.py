@@ -0,0 +1,43 @@
+import json
+import os
+import statistics
+import sys
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "src"))
+
+import solver
+
+# Time to solve an equation as the live preview does on every keystroke:
+# parsing, compiling, the grid and narrowing every bracket, and formatting.
+
+EQUATIONS = [
+    "x^3 - 2x = 5",
+    "solve(sin(x) = 0.3, 0..10)",
+    "solve(tan(x) = 1, -20..20)",
+    "solve(sin(x), 0..1000)",
+    "x! = 120",
+    "e^x = 10x",
+]
+REPEAT = 20
+
+
+def measure(equation):
+    times = []
+    for _ in range(REPEAT):
+        start = time.perf_counter()
+        status, text = solver.solve(equation)
+        times.append(time.perf_counter() - start)
+    return {
+        "median_ms": round(statistics.median(times) * 1000, 3),
+        "max_ms": round(max(times) * 1000, 3),
+        "result": text,
+    }
+
+
+def run():
+    return {equation: measure(equation) for equation in EQUATIONS}
+
+
+if __name__ == "__main__":
+    print(json.dumps(run(), indent=2, ensure_ascii=False))
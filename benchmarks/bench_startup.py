@@ -0,0 +1,83 @@
+import json
+import os
+import statistics
+import subprocess
+import sys
+import time
+
+# Cold start of src/main.py and of the PyInstaller binary, from exec until the
+# window has painted its first frame. --profile-startup makes the process print
+# its own phase breakdown and exit once the first frame is done. "-e" runs,
+# which never import Qt, are compared with a bare interpreter.
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+RUNS = 5
+EVAL_RUNS = 20
+TIMEOUT = 60
+
+
+def _start_once(command):
+    env = dict(os.environ)
+    env.setdefault("QT_QPA_PLATFORM", "offscreen")
+    start = time.perf_counter()
+    result = subprocess.run(command + ["--profile-startup"], env=env, cwd=ROOT,
+                            capture_output=True, text=True, timeout=TIMEOUT)
+    wall = time.perf_counter() - start
+    if result.returncode != 0:
+        raise RuntimeError(result.stderr.strip() or f"exit status {result.returncode}")
+    report = json.loads(result.stdout.strip().splitlines()[-1])
+    return wall, report
+
+
+def measure(command, runs=RUNS):
+    walls, first_paints, reports = [], [], []
+    for _ in range(runs):
+        wall, report = _start_once(command)
+        walls.append(wall * 1000)
+        first_paints.append(report["time_to_first_paint_ms"])
+        reports.append(report)
+    return {
+        "runs": runs,
+        "wall_ms_median": round(statistics.median(walls), 2),
+        "wall_ms_min": round(min(walls), 2),
+        "time_to_first_paint_ms_median": round(statistics.median(first_paints), 2),
+        "phases_ms": reports[first_paints.index(min(first_paints))]["phases_ms"],
+    }
+
+
+def measure_eval(runs=EVAL_RUNS):
+    commands = {
+        "bare_interpreter": [sys.executable, "-c", "pass"],
+        "main_script": [sys.executable, os.path.join(ROOT, "src", "main.py"), "-e", "2+2"],
+        "oneshot_script": [sys.executable, os.path.join(ROOT, "src", "oneshot.py"), "-e", "2+2"],
+    }
+    results = {}
+    for name, command in commands.items():
+        walls = []
+        for _ in range(runs):
+            start = time.perf_counter()
+            subprocess.run(command, stdout=subprocess.DEVNULL, check=True, timeout=TIMEOUT)
+            walls.append((time.perf_counter() - start) * 1000)
+        results[f"{name}_ms_median"] = round(statistics.median(walls), 2)
+    return results
+
+
+def run(runs=RUNS):
+    results = {"eval": measure_eval()}
+    targets = {
+        "script": [sys.executable, os.path.join(ROOT, "src", "main.py")],
+        "binary": [os.path.join(ROOT, "98kalculator")],
+    }
+    for name, command in targets.items():
+        if not os.path.exists(command[-1]):
+            results[name] = {"skipped": f"{command[-1]} not found"}
+            continue
+        try:
+            results[name] = measure(command, runs)
+        except (OSError, RuntimeError, ValueError, subprocess.TimeoutExpired) as e:
+            results[name] = {"error": str(e)}
+    return results
+
+
+if __name__ == "__main__":
+    print(json.dumps(run(), indent=2))
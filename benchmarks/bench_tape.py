@@ -0,0 +1,64 @@
+import json
+import os
+import sys
+import time
+
+os.environ.setdefault("QT_QPA_PLATFORM", "offscreen")
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "src"))
+
+from PyQt6.QtCore import QEventLoop, QTimer
+from PyQt6.QtWidgets import QApplication
+
+from tape_panel import TapePanel
+
+# Pasting a block into the tape: how long until the window is back, until
+# the first result shows and until every line is done, and the longest the
+# event loop went without running meanwhile.
+
+LINES = 100_000
+TICK_MS = 5
+
+
+def _block(lines):
+    return "\n".join(f"{i} × 1.5 + sin({i})" if i % 500 else "1/0" for i in range(lines))
+
+
+def run(lines=LINES):
+    app = QApplication.instance() or QApplication(sys.argv)
+    panel = TapePanel()
+    text = _block(lines)
+    ticks = []
+    tick = QTimer()
+    tick.timeout.connect(lambda: ticks.append(time.perf_counter()))
+
+    start = time.perf_counter()
+    panel.evaluate(text)
+    returned = time.perf_counter() - start
+    panel.show()
+    first = None
+    loop = QEventLoop()
+    panel.process.finished.connect(lambda *args: QTimer.singleShot(0, loop.quit))
+    panel.model.dataChanged.connect(loop.quit)
+    tick.start(TICK_MS)
+    while panel.process is not None:
+        loop.exec()
+        if first is None and panel.model.results:
+            first = time.perf_counter() - start
+    elapsed = time.perf_counter() - start
+    tick.stop()
+    gaps = [b - a for a, b in zip(ticks, ticks[1:])]
+    panel.close()
+    app.processEvents()
+    return {
+        "lines": lines,
+        "paste_return_ms": round(returned * 1000, 2),
+        "first_result_ms": round(first * 1000, 2),
+        "all_results_s": round(elapsed, 2),
+        "lines_per_s": round(lines / elapsed),
+        "max_event_loop_gap_ms": round(max(gaps, default=0) * 1000, 2),
+        "total": panel.total.text(),
+    }
+
+
+if __name__ == "__main__":
+    print(json.dumps(run(), indent=2))
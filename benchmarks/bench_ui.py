@@ -0,0 +1,152 @@
+import json
+import os
+import statistics
+import sys
+import time
+
+os.environ.setdefault("QT_QPA_PLATFORM", "offscreen")
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "src"))
+
+from PyQt6.QtGui import QColor, QFont
+from PyQt6.QtWidgets import QApplication, QGraphicsDropShadowEffect, QLabel
+
+import main
+from glow import GlowLabel
+
+# Keystroke, resize and repaint costs on a real ModernCalculator. The window is
+# never shown, so no worker is started and nothing is written to the history.
+
+KEYS = "12×(34+56)÷7-8^2+sin(" + "9" * 12 + ")mod3" + "-123.456×789"
+INPUT_LENGTHS = (100, 1000, 5000)
+
+# Widgets need an application for as long as the suite runs
+_app = QApplication.instance() or QApplication(sys.argv)
+
+
+def _summary(samples):
+    samples = sorted(samples)
+    return {
+        "events": len(samples),
+        "mean_us": round(statistics.fmean(samples) * 1e6, 2),
+        "p50_us": round(samples[len(samples) // 2] * 1e6, 2),
+        "p99_us": round(samples[int(len(samples) * 0.99)] * 1e6, 2),
+        "max_us": round(samples[-1] * 1e6, 2),
+    }
+
+
+def _keys(count):
+    # Button labels, one per keystroke ("sin" and "mod" are single buttons)
+    keys = []
+    i = 0
+    while len(keys) < count:
+        for label in ("sin", "mod"):
+            if KEYS.startswith(label, i):
+                keys.append(label)
+                i += len(label)
+                break
+        else:
+            keys.append(KEYS[i])
+            i += 1
+        i %= len(KEYS)
+    return keys
+
+
+def keystrokes(window, length):
+    # Time from the button press until update_display has run, with the
+    # input growing to length keys; the debounced preview is timed apart
+    window.clear_all()
+    typed, previews = [], []
+    for key in _keys(length):
+        start = time.perf_counter()
+        window.on_button_click(key)
+        typed.append(time.perf_counter() - start)
+        window.preview_timer.stop()
+        start = time.perf_counter()
+        window.update_preview()
+        previews.append(time.perf_counter() - start)
+    return {
+        "input_length": len(window.current_input),
+        "keystroke": _summary(typed),
+        "preview": _summary(previews),
+    }
+
+
+def resize_storm(window):
+    # A window drag from the minimum width to 1400px and back, one event per
+    # pixel, over a short and a long display text
+    results = {}
+    widths = list(range(480, 1400)) + list(range(1400, 480, -1))
+    for name, text in (("short", "3.14159265"), ("long", "(1+2)×(3+4)÷(5+6)-7^8+9!" * 3)):
+        window.lbl_result.setText(text)
+        window.font_fitter = None
+        samples = []
+        for width in widths:
+            window.resize(width, 750)
+            start = time.perf_counter()
+            window.adjust_font_size()
+            samples.append(time.perf_counter() - start)
+        results[name] = _summary(samples)
+    return results
+
+
+def _repaints(label, texts, before_change=None):
+    samples = []
+    for text in texts:
+        if before_change is not None:
+            before_change(label)
+        label.setText(text)
+        start = time.perf_counter()
+        label.grab()
+        samples.append(time.perf_counter() - start)
+    return _summary(samples)
+
+
+def _result_label(cls):
+    label = cls("0")
+    font = QFont("Segoe UI")
+    font.setPixelSize(64)
+    label.setFont(font)
+    label.resize(440, 100)
+    return label
+
+
+def glow_repaint():
+    # Frame time of the result label while typing, twice over the same texts:
+    # with the old drop shadow effect, with the cached glow at typing speeds
+    # slow enough to render every glow, and with the cached glow under fast
+    # typing, where uncached glows are left for later
+    texts = [KEYS[:i] for i in range(1, 21)] * 2
+    color = QColor(187, 134, 252)
+
+    effect = _result_label(QLabel)
+    shadow = QGraphicsDropShadowEffect(effect)
+    shadow.setBlurRadius(20)
+    shadow.setColor(color)
+    shadow.setOffset(0, 0)
+    effect.setGraphicsEffect(shadow)
+
+    results = {"drop_shadow_effect": _repaints(effect, texts)}
+    for name, before_change in (("cached_slow_typing", lambda label: setattr(label, "last_change", 0.0)),
+                                ("cached_fast_typing", None)):
+        label = _result_label(GlowLabel)
+        label.set_glow(color, 20)
+        results[name] = _repaints(label, texts, before_change)
+        results[name]["glows_rendered"] = label.glows_rendered
+    return results
+
+
+def run():
+    window = main.ModernCalculator()
+    try:
+        return {
+            "keystroke_latency": {str(n): keystrokes(window, n) for n in INPUT_LENGTHS},
+            "resize_storm": resize_storm(window),
+            "glow_repaint": glow_repaint(),
+        }
+    finally:
+        window.evaluator.stop()
+        window.deleteLater()
+
+
+if __name__ == "__main__":
+    print(json.dumps(run(), indent=2))
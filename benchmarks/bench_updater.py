@@ -0,0 +1,77 @@
+import contextlib
+import io
+import json
+import os
+import subprocess
+import sys
+import tempfile
+import time
+
+ROOT = os.path.join(os.path.dirname(os.path.abspath(__file__)), "..")
+sys.path.insert(0, ROOT)
+
+import updater
+
+# The updater against a local bare repository standing in for GitHub: a
+# no-op check (in process and as a whole run of updater.py), an update that
+# only touches the README, and one that touches src/ and needs a rebuild.
+
+
+def _git(args, cwd):
+    subprocess.run(["git"] + args, cwd=cwd, check=True, capture_output=True)
+
+
+def _push_change(work, path, text):
+    with open(os.path.join(work, path), "a") as f:
+        f.write(text)
+    _git(["commit", "-qam", f"Change {path}"], work)
+    _git(["push", "-q", "origin", "HEAD"], work)
+
+
+def _update(clone):
+    with contextlib.redirect_stdout(io.StringIO()):
+        start = time.perf_counter()
+        changed = updater.update_repo(clone)
+        elapsed = time.perf_counter() - start
+    return {
+        "ms": round(elapsed * 1000, 2),
+        "changed_files": len(changed),
+        "rebuild": updater.needs_rebuild(changed),
+    }
+
+
+def run():
+    with tempfile.TemporaryDirectory() as tmp:
+        remote = os.path.join(tmp, "remote.git")
+        clone = os.path.join(tmp, "clone")
+        work = os.path.join(tmp, "work")
+        _git(["clone", "-q", "--bare", "--no-local", ROOT, remote], tmp)
+        _git(["clone", "-q", "--depth=1", f"file://{remote}", clone], tmp)
+        _git(["clone", "-q", remote, work], tmp)
+        for repo in (clone, work):
+            _git(["config", "user.email", "bench@localhost"], repo)
+            _git(["config", "user.name", "bench"], repo)
+        # Stands in for an installed binary, so a run without changes does
+        # not rebuild
+        open(os.path.join(clone, updater.BINARY_NAME), "w").close()
+
+        no_op = _update(clone)
+        start = time.perf_counter()
+        subprocess.run([sys.executable, os.path.join(ROOT, "updater.py"), "--repo", clone], stdin=subprocess.DEVNULL,
+                       stdout=subprocess.DEVNULL, check=True)
+        script_ms = (time.perf_counter() - start) * 1000
+
+        _push_change(work, "README.md", "\nUpdated.\n")
+        docs = _update(clone)
+        _push_change(work, "src/engine.py", "\n")
+        source = _update(clone)
+    return {
+        "no_op": no_op,
+        "no_op_script_ms": round(script_ms, 2),
+        "docs_change": docs,
+        "source_change": source,
+    }
+
+
+if __name__ == "__main__":
+    print(json.dumps(run(), indent=2))
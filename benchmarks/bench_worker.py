@@ -0,0 +1,86 @@
+import json
+import os
+import sys
+import time
+
+os.environ.setdefault("QT_QPA_PLATFORM", "offscreen")
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "src"))
+
+from PyQt6.QtCore import QCoreApplication, QEventLoop, QTimer
+
+import precise
+from background import BackgroundEvaluator
+
+# What the worker pool adds to "=": the round trip of a short expression
+# through a warm worker against evaluating it in process, the first
+# evaluation after cancelling a long one, and after a worker hit its limit.
+
+EXPRESSION = "12×34+sin(1)"
+ROUNDS = 300
+CANCELS = 10
+SETTLE_MS = 300
+
+
+def _wait(ms):
+    loop = QEventLoop()
+    QTimer.singleShot(ms, loop.quit)
+    loop.exec()
+
+
+def _round_trip(evaluator, expression):
+    loop = QEventLoop()
+    evaluator.finished.connect(loop.quit)
+    start = time.perf_counter()
+    evaluator.submit(expression)
+    loop.exec()
+    elapsed = time.perf_counter() - start
+    evaluator.finished.disconnect(loop.quit)
+    return elapsed
+
+
+def _ms(samples):
+    samples = sorted(samples)
+    return {
+        "p50_ms": round(samples[len(samples) // 2] * 1000, 3),
+        "max_ms": round(samples[-1] * 1000, 3),
+    }
+
+
+def run():
+    app = QCoreApplication.instance() or QCoreApplication(sys.argv)
+    evaluator = BackgroundEvaluator(cpu_limit=1, parent=app)
+    evaluator.warm()
+    _wait(SETTLE_MS)
+    _round_trip(evaluator, EXPRESSION)
+    trips = [_round_trip(evaluator, EXPRESSION) for _ in range(ROUNDS)]
+
+    start = time.perf_counter()
+    for _ in range(ROUNDS):
+        precise.calculate(EXPRESSION)
+    in_process = (time.perf_counter() - start) / ROUNDS
+
+    after_cancel = []
+    for _ in range(CANCELS):
+        evaluator.submit("99999999!")
+        _wait(SETTLE_MS)
+        evaluator.cancel()
+        after_cancel.append(_round_trip(evaluator, EXPRESSION))
+
+    # A job over the CPU limit ends its worker; the next job goes to a
+    # waiting one
+    limit = _round_trip(evaluator, "99999999!")
+    _wait(SETTLE_MS)
+    after_limit = _round_trip(evaluator, EXPRESSION)
+    evaluator.stop()
+    return {
+        "pool_size": evaluator.pool_size,
+        "round_trip": _ms(trips),
+        "in_process_ms": round(in_process * 1000, 4),
+        "after_cancel": _ms(after_cancel),
+        "over_limit_ms": round(limit * 1000, 1),
+        "after_limit_ms": round(after_limit * 1000, 3),
+    }
+
+
+if __name__ == "__main__":
+    print(json.dumps(run(), indent=2))
@@ -0,0 +1,66 @@
+import json
+import os
+import sys
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "src"))
+
+from worksheet import Worksheet
+
+# Incremental recomputation on large worksheets: building one, then changing
+# a line few others read, one at the root of a long chain, and a function
+# used everywhere.
+
+LINES = 5000
+
+
+def name(i):
+    # Names are letters only, as in the calculator's grammar
+    letters = ""
+    while True:
+        i, digit = divmod(i, 26)
+        letters += chr(ord("a") + digit)
+        if not i:
+            return "v" + letters
+
+
+def build():
+    lines = {0: "rate = 0.05", 1: "f(x) = x^2 + sin(x)", LINES: f"{name(1)} = 1"}
+    for i in range(2, LINES):
+        if i % 2:
+            lines[i] = f"{name(i)} = {name(i - 2)} × (1 + rate) + f({i % 7})"
+        else:
+            lines[i] = f"{name(i)} = {i} + sin(rate) × cos(rate)"
+    sheet = Worksheet()
+    sheet.update(lines)
+    return sheet
+
+
+def timed(sheet, line_id, text):
+    evaluated = sheet.evaluated
+    start = time.perf_counter()
+    changed = sheet.set(line_id, text)
+    return {
+        "ms": round((time.perf_counter() - start) * 1000, 2),
+        "lines_recomputed": len(changed),
+        "expressions_evaluated": sheet.evaluated - evaluated,
+    }
+
+
+def run():
+    start = time.perf_counter()
+    sheet = build()
+    built = time.perf_counter() - start
+    return {
+        "lines": LINES,
+        "build_ms": round(built * 1000, 2),
+        "change_leaf": timed(sheet, LINES - 1, f"{name(LINES - 1)} = 2"),
+        "change_chain_root": timed(sheet, LINES, f"{name(1)} = 2"),
+        "change_shared_variable": timed(sheet, 0, "rate = 0.06"),
+        "change_function": timed(sheet, 1, "f(x) = x^3"),
+        "shared_subexpressions": len(sheet.subtrees),
+    }
+
+
+if __name__ == "__main__":
+    print(json.dumps(run(), indent=2))
@@ -0,0 +1,84 @@
+import argparse
+import importlib
+import json
+import os
+import platform
+import subprocess
+import sys
+import time
+
+# Runs every benchmark and prints one JSON document, tagged with the commit it
+# ran on, so results from different commits can be compared:
+#
+#     QT_QPA_PLATFORM=offscreen python3 benchmarks/run.py -o bench/$(git rev-parse --short HEAD).json
+
+BENCH_DIR = os.path.dirname(os.path.abspath(__file__))
+SUITES = {
+    "engine": "bench_engine",
+    "factorial": "bench_factorial",
+    "ui": "bench_ui",
+    "animation": "bench_animation",
+    "font_fit": "bench_font_fit",
+    "plot": "bench_plot",
+    "solver": "bench_solver",
+    "worksheet": "bench_worksheet",
+    "updater": "bench_updater",
+    "worker": "bench_worker",
+    "tape": "bench_tape",
+    "service": "bench_service",
+    "startup": "bench_startup",
+}
+
+
+def _commit():
+    try:
+        return subprocess.run(["git", "rev-parse", "HEAD"], cwd=BENCH_DIR, capture_output=True,
+                              text=True, check=True).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def run(names):
+    os.environ.setdefault("QT_QPA_PLATFORM", "offscreen")
+    sys.path.insert(0, BENCH_DIR)
+    results = {}
+    for name in names:
+        start = time.perf_counter()
+        try:
+            results[name] = importlib.import_module(SUITES[name]).run()
+        except Exception as e:
+            # One broken suite (e.g. no PyQt6 here) should not lose the others
+            results[name] = {"error": f"{type(e).__name__}: {e}"}
+        results[name]["suite_seconds"] = round(time.perf_counter() - start, 2)
+    return {
+        "commit": _commit(),
+        "timestamp": int(time.time()),
+        "python": platform.python_version(),
+        "platform": platform.platform(),
+        "qt_platform": os.environ["QT_QPA_PLATFORM"],
+        "results": results,
+    }
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Run the 98kalculator benchmarks.")
+    parser.add_argument("suites", nargs="*", metavar="SUITE",
+                        help=f"suites to run (default: all of {', '.join(SUITES)})")
+    parser.add_argument("-o", "--output", help="write the JSON report to this file")
+    args = parser.parse_args(argv)
+    unknown = [name for name in args.suites if name not in SUITES]
+    if unknown:
+        parser.error(f"unknown suite: {', '.join(unknown)}")
+
+    report = json.dumps(run(args.suites or list(SUITES)), indent=2)
+    if args.output:
+        os.makedirs(os.path.dirname(os.path.abspath(args.output)), exist_ok=True)
+        with open(args.output, "w") as f:
+            f.write(report + "\n")
+    else:
+        print(report)
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -1,7 +1,11 @@
+import hashlib
+import importlib.metadata
+import json
 import os
 import shutil
 import subprocess
 import sys
+import time
 
 def install_dependencies():
     print("Checking and installing dependencies...")
@@ -30,7 +34,22 @@ def install_dependencies():
             print(f"Failed to install PyInstaller: {e}")
             sys.exit(1)
 
+    try:
+        import numpy
+        print("NumPy is already installed.")
+    except ImportError:
+        print("NumPy not found, installing...")
+        try:
+            subprocess.check_call([sys.executable, "-m", "pip", "install", "numpy", "--break-system-packages"])
+            print("NumPy installed successfully.")
+        except subprocess.CalledProcessError as e:
+            # Only plots need it, so carry on without
+            print(f"Failed to install NumPy, plots will be unavailable: {e}")
+
 def check_installed():
+    # The updater reinstalls without asking
+    if "--yes" in sys.argv[1:]:
+        return
     desktop_file = os.path.expanduser("~/.local/share/applications/98kalculator.desktop")
     if os.path.exists(desktop_file):
         print("\nWARNING: 98kalculator seems to be already installed.")
@@ -39,26 +58,98 @@ def check_installed():
             print("Installation aborted.")
             sys.exit(0)
             
+# PyInstaller options besides the paths; part of the build key
+BUILD_OPTIONS = ["--onefile", "--windowed", "--name", "98kalculator"]
+# Packages whose version changes what gets bundled
+BUILD_PACKAGES = ["PyQt6", "pyinstaller", "numpy"]
+KEY_FILE = "98kalculator.key"
+
+
+def package_version(name):
+    try:
+        return importlib.metadata.version(name)
+    except importlib.metadata.PackageNotFoundError:
+        return None
+
+
+def build_key(src_dir):
+    # Hash of everything the binary is made from: the sources, the Python
+    # and package versions, and the build options
+    digest = hashlib.sha256()
+    digest.update(json.dumps({
+        "python": sys.version,
+        "packages": {name: package_version(name) for name in BUILD_PACKAGES},
+        "options": BUILD_OPTIONS,
+    }, sort_keys=True).encode())
+    for root, dirs, files in os.walk(src_dir):
+        dirs[:] = sorted(d for d in dirs if d != "__pycache__")
+        for name in sorted(files):
+            if not name.endswith(".py"):
+                continue
+            path = os.path.join(root, name)
+            digest.update(os.path.relpath(path, src_dir).encode() + b"\0")
+            with open(path, "rb") as f:
+                digest.update(hashlib.sha256(f.read()).digest())
+    return digest.hexdigest()
+
+
+def read_build_record(path):
+    try:
+        with open(path) as f:
+            return json.load(f)
+    except (OSError, ValueError):
+        return {}
+
+
 def create_executable():
     print("Creating executable for 98kalculator...")
     app_dir = os.path.dirname(os.path.abspath(__file__))
     src_dir = os.path.join(app_dir, "src")
     main_script = os.path.join(src_dir, "main.py")
+    work_dir = os.path.join(app_dir, "build")
+    executable = os.path.join(app_dir, "98kalculator")
+    record_path = os.path.join(work_dir, KEY_FILE)
 
+    start = time.perf_counter()
+    key = build_key(src_dir)
+    record = read_build_record(record_path)
+    try:
+        stat = os.stat(executable)
+        built = record.get("key") == key and record.get("size") == stat.st_size \
+            and record.get("mtime") == stat.st_mtime_ns
+    except OSError:
+        built = False
+    if built:
+        print(f"Build cache hit ({key[:12]}): reusing the existing executable "
+              f"({time.perf_counter() - start:.2f}s).")
+        return
+
+    # PyInstaller keeps its analysis in the work directory; without --clean
+    # a rebuild only redoes what the changes invalidated
+    reused = os.path.isdir(os.path.join(work_dir, "98kalculator"))
+    print(f"Build cache miss ({key[:12]}): building "
+          f"{'incrementally from build/' if reused else 'from scratch'}...")
     try:
         subprocess.check_call(
             [
-                sys.executable, "-m", "PyInstaller",
-                "--onefile", "--windowed", "--name", "98kalculator",
-                main_script, "--distpath", app_dir,
+                sys.executable, "-m", "PyInstaller", "--noconfirm", *BUILD_OPTIONS,
+                main_script, "--distpath", app_dir, "--workpath", work_dir, "--specpath", app_dir,
             ]
         )
-        print("Executable created successfully.")
     except subprocess.CalledProcessError as e:
         print(f"Failed to create executable with PyInstaller: {e}")
         print("Please ensure PyInstaller is installed or install it manually.")
         sys.exit(1)
 
+    stat = os.stat(executable)
+    try:
+        os.makedirs(work_dir, exist_ok=True)
+        with open(record_path, "w") as f:
+            json.dump({"key": key, "size": stat.st_size, "mtime": stat.st_mtime_ns}, f)
+    except OSError as e:
+        print(f"Could not record the build key, the next install will rebuild: {e}")
+    print(f"Executable created successfully in {time.perf_counter() - start:.1f}s.")
+
 def create_desktop_file():
     print("Creating .desktop file...")
     app_dir = os.path.dirname(os.path.abspath(__file__))
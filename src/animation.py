@@ -0,0 +1,103 @@
+import time
+from collections import OrderedDict
+
+from PyQt6.QtCore import QObject, Qt, QTimer
+
+# One clock for every animation in the window, instead of an animation
+# object and a timer per widget per event. An animation moves a level from
+# one value to another over a duration and hands each new level to a
+# function, usually one that stores it and schedules a repaint; the levels
+# come from the time elapsed, not from a count of frames, so a frame that is
+# skipped costs nothing but its step. Starting an animation under a key that
+# is already running replaces it, so a key held down or typed fast restarts
+# one animation rather than queueing many.
+#
+# Each frame spends at most FRAME_BUDGET_MS on steps; the animations not
+# reached go first on the next frame. A frame that comes more than LATE_MS
+# after the previous one means the event loop is behind (a slow repaint),
+# and one within INPUT_MS of a keystroke (see input()) that more keys may be
+# on the way: either only finishes the animations whose time is up, so the
+# clock never adds repaints while input is waiting.
+
+FRAME_MS = 16
+FRAME_BUDGET_MS = 4
+LATE_MS = 40
+INPUT_MS = 16
+
+
+def _ease_out(progress):
+    return 1 - (1 - progress) * (1 - progress)
+
+
+class _Animation:
+    __slots__ = ("start", "end", "began", "duration", "apply")
+
+    def __init__(self, start, end, began, duration, apply):
+        self.start = start
+        self.end = end
+        self.began = began
+        self.duration = duration
+        self.apply = apply
+
+
+class AnimationClock(QObject):
+    def __init__(self, parent=None):
+        super().__init__(parent)
+        # key -> _Animation, the ones to step first at the front
+        self.running = OrderedDict()
+        self.timer = QTimer(self)
+        self.timer.setTimerType(Qt.TimerType.PreciseTimer)
+        self.timer.setInterval(FRAME_MS)
+        self.timer.timeout.connect(self.tick)
+        self.last_tick = 0.0
+        self.last_input = 0.0
+        # Counters for benchmarks
+        self.frames = 0
+        self.steps = 0
+        self.late_frames = 0
+        self.deferred_steps = 0
+
+    def animate(self, key, start, end, duration_ms, apply):
+        if start == end:
+            self.running.pop(key, None)
+            apply(end)
+            return
+        now = time.perf_counter()
+        self.running[key] = _Animation(start, end, now, duration_ms / 1000, apply)
+        self.running.move_to_end(key, last=False)
+        apply(start)
+        if not self.timer.isActive():
+            self.last_tick = now
+            self.timer.start()
+
+    def stop(self, key):
+        self.running.pop(key, None)
+
+    def input(self):
+        self.last_input = time.perf_counter()
+
+    def tick(self):
+        now = time.perf_counter()
+        late = now - self.last_tick > LATE_MS / 1000 or now - self.last_input < INPUT_MS / 1000
+        self.last_tick = now
+        self.frames += 1
+        self.late_frames += late
+        deadline = now + FRAME_BUDGET_MS / 1000
+        running = self.running
+        for count, key in enumerate(list(running)):
+            if count and time.perf_counter() > deadline:
+                self.deferred_steps += len(running) - count
+                break
+            animation = running[key]
+            progress = (now - animation.began) / animation.duration
+            if progress >= 1:
+                del running[key]
+                animation.apply(animation.end)
+            elif late:
+                continue
+            else:
+                running.move_to_end(key)
+                animation.apply(animation.start + (animation.end - animation.start) * _ease_out(progress))
+            self.steps += 1
+        if not running:
+            self.timer.stop()
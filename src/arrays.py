@@ -0,0 +1,252 @@
+import math
+
+import numpy as np
+
+import engine
+from formatting import format_result
+
+# Lists ([1, 2.5, 7]), ranges (1..1e6) and reductions (sum, mean, min, max,
+# prod). Operators and functions apply element-wise through NumPy ufuncs.
+# Lists and ranges are lazy: an array is its length and a function returning
+# any slice of it, so a reduction walks a range of any size in CHUNK-sized
+# slices and a list result only computes the elements it displays.
+
+CHUNK = 1 << 16
+# Elements shown at the start of a long list, before "…" and the last one
+SHOWN = 3
+
+BINARY = {
+    "+": np.add,
+    "-": np.subtract,
+    "*": np.multiply,
+    "/": np.true_divide,
+    "%": np.mod,
+    "^": np.power,
+}
+
+FUNCTIONS = {
+    "sin": np.sin,
+    "cos": np.cos,
+    "tan": np.tan,
+    "ln": np.log,
+    "log": np.log10,
+}
+
+# Lanczos approximation (g=7), for x! as gamma(x+1) over whole arrays
+_LANCZOS_G = 7
+_LANCZOS = np.array([
+    0.99999999999980993, 676.5203681218851, -1259.1392167224028, 771.32342877765313,
+    -176.61502916214059, 12.507343278686905, -0.13857109526572012,
+    9.9843695780195716e-6, 1.5056327351493116e-7,
+])
+
+
+def gamma(z):
+    z = np.asarray(z, dtype=float)
+    reflect = z < 0.5
+    w = np.where(reflect, 1 - z, z) - 1
+    series = _LANCZOS[0] + sum(c / (w + i) for i, c in enumerate(_LANCZOS[1:], 1))
+    t = w + _LANCZOS_G + 0.5
+    result = math.sqrt(2 * math.pi) * t ** (w + 0.5) * np.exp(-t) * series
+    # Gamma(z) Gamma(1 - z) = pi / sin(pi z)
+    return np.where(reflect, math.pi / (np.sin(math.pi * z) * result), result)
+
+
+def factorial(x):
+    return gamma(np.add(x, 1.0))
+
+
+def _element_factorial(x):
+    # Element-wise x! like the scalar one: whole numbers rounded where the
+    # approximation is off in the last bits, and none of the negative ones
+    x = np.asarray(x, dtype=float)
+    result = factorial(x)
+    whole = x == np.floor(x)
+    result[whole] = np.round(result[whole])
+    result[whole & (x < 0)] = np.nan
+    return result
+
+
+UNARY = {
+    "neg": np.negative,
+    "!": _element_factorial,
+}
+
+
+class LazyArray:
+    __slots__ = ("length", "block")
+
+    def __init__(self, length, block):
+        self.length = length
+        # block(start, stop) -> float64 array of those elements
+        self.block = block
+
+    def display(self):
+        if self.length <= SHOWN + 2:
+            items = self.block(0, self.length)
+        else:
+            items = np.r_[self.block(0, SHOWN), np.nan, self.block(self.length - 1, self.length)]
+        texts = [format_result(float(item)) for item in items]
+        if self.length > SHOWN + 2:
+            texts[SHOWN] = "…"
+        return f"[{', '.join(texts)}]"
+
+
+def _range(first, last):
+    first = float(first)
+    step = 1.0 if last >= first else -1.0
+    length = int(abs(last - first)) + 1
+    return LazyArray(length, lambda start, stop: first + step * np.arange(start, stop, dtype=float))
+
+
+def _concatenate(items):
+    # One array of scalars and arrays, in order
+    if all(item.__class__ is not LazyArray for item in items):
+        values = np.array(items, dtype=float)
+        return LazyArray(len(values), lambda start, stop: values[start:stop])
+    parts = [item if item.__class__ is LazyArray else LazyArray(1, lambda start, stop, item=item:
+                                                                np.full(stop - start, float(item)))
+             for item in items]
+    offsets = np.cumsum([0] + [part.length for part in parts])
+
+    def block(start, stop):
+        pieces = []
+        first = max(int(np.searchsorted(offsets, start, side="right")) - 1, 0)
+        for index in range(first, len(parts)):
+            offset = offsets[index]
+            if offset >= stop:
+                break
+            lo = max(start - offset, 0)
+            hi = min(stop - offset, parts[index].length)
+            if lo < hi:
+                pieces.append(parts[index].block(lo, hi))
+        return np.concatenate(pieces) if pieces else np.empty(0)
+    return LazyArray(int(offsets[-1]), block)
+
+
+def _element_wise(fn, *args):
+    arrays = [arg for arg in args if arg.__class__ is LazyArray]
+    length = arrays[0].length
+    if any(array.length != length for array in arrays):
+        raise engine.ExpressionError("lists of different lengths")
+
+    def block(start, stop):
+        with np.errstate(all="ignore"):
+            return fn(*(arg.block(start, stop) if arg.__class__ is LazyArray else arg for arg in args))
+    return LazyArray(length, block)
+
+
+def _chunks(array):
+    for start in range(0, array.length, CHUNK):
+        yield array.block(start, min(start + CHUNK, array.length))
+
+
+def _reduce(name, args):
+    # Reduces every element of every argument; partial results of each
+    # chunk are combined in Python
+    values = []
+    count = 0
+    for arg in args:
+        if arg.__class__ is not LazyArray:
+            values.append(float(arg))
+            count += 1
+            continue
+        count += arg.length
+        for chunk in _chunks(arg):
+            with np.errstate(all="ignore"):
+                if name in ("sum", "mean"):
+                    values.append(float(np.sum(chunk)))
+                elif name == "prod":
+                    values.append(float(np.prod(chunk)))
+                elif name == "min":
+                    values.append(float(np.min(chunk)))
+                else:
+                    values.append(float(np.max(chunk)))
+    if name == "sum":
+        return math.fsum(values)
+    if name == "prod":
+        return math.prod(values)
+    if not count:
+        raise engine.ExpressionError(f"{name} of nothing")
+    if name == "mean":
+        return math.fsum(values) / count
+    return min(values) if name == "min" else max(values)
+
+
+def _divisor_checked(array_op):
+    # An element divided by zero is a division by zero, as it is for numbers,
+    # rather than inf or nan; plots keep the plain ufuncs
+    def apply(left, right):
+        if not np.all(right):
+            raise ZeroDivisionError("division by zero")
+        return array_op(left, right)
+    return apply
+
+
+_CHECKED = {op: _divisor_checked(BINARY[op]) for op in ("/", "%")}
+
+
+def _binary(op, array_op):
+    def apply(left, right):
+        if left.__class__ is LazyArray or right.__class__ is LazyArray:
+            return _element_wise(array_op, left, right)
+        return op(left, right)
+    return apply
+
+
+def _unary(op, array_op):
+    def apply(arg):
+        if arg.__class__ is LazyArray:
+            return _element_wise(array_op, arg)
+        return op(arg)
+    return apply
+
+
+def _compile(node):
+    kind = node[0]
+    if kind == "num":
+        value = node[1]
+        return lambda env: value
+    if kind == "name":
+        name = node[1]
+
+        def lookup(env):
+            try:
+                return env[name]
+            except KeyError:
+                raise engine.ExpressionError(f"unknown name {name!r}") from None
+        return lookup
+    if kind == "bin":
+        op = _binary(engine.BINARY_OPS[node[1]], _CHECKED.get(node[1]) or BINARY[node[1]])
+        left = _compile(node[2])
+        right = _compile(node[3])
+        return lambda env: op(left(env), right(env))
+    if kind == "range":
+        first = _compile(node[1])
+        last = _compile(node[2])
+        return lambda env: _range(first(env), last(env))
+    if kind in ("list", "reduce"):
+        items = [_compile(item) for item in node[-1]]
+        if kind == "list":
+            return lambda env: _concatenate([item(env) for item in items])
+        name = node[1]
+        return lambda env: _reduce(name, [item(env) for item in items])
+    if kind == "call":
+        op = _unary(engine.FUNCTIONS[node[1]], FUNCTIONS[node[1]])
+    else:
+        op = _unary(engine.UNARY_OPS[kind], UNARY[kind])
+    arg = _compile(node[-1])
+    return lambda env: op(arg(env))
+
+
+def compile_ast(node):
+    # fn(env) -> a number, or a LazyArray for list results
+    fn = _compile(node)
+
+    def evaluate(env):
+        value = fn(env)
+        if value.__class__ is float and math.isnan(value):
+            # A reduction over elements outside a function's domain
+            raise engine.ExpressionError("undefined element")
+        return value
+    return evaluate
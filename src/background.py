@@ -0,0 +1,156 @@
+from collections import deque
+
+from PyQt6.QtCore import QObject, QProcess, QTimer, pyqtSignal
+
+import engine
+import precise
+import worker
+
+# Runs "=" evaluations in a worker process so the event loop keeps painting
+# whatever is being computed. A small pool of workers is started ahead of
+# time: the current one takes the jobs and the others wait, already started
+# and warm. Cancelling a job, or a worker dying, switches to a waiting worker
+# at once and starts a replacement in the background, so the next evaluation
+# never waits for a cold start. Nothing is ever evaluated in the window's
+# own process: a worker that cannot be started gives an error result.
+
+POOL_SIZE = 2
+FAILED_MESSAGE = "Can't start a worker"
+
+
+class BackgroundEvaluator(QObject):
+    # job id, expression, status, text, path (precise.FLOAT, EXACT or DECIMAL)
+    finished = pyqtSignal(int, str, str, str, str)
+
+    def __init__(self, cpu_limit=worker.CPU_LIMIT, memory_limit=worker.MEMORY_LIMIT_MB, parent=None,
+                 pool_size=POOL_SIZE):
+        super().__init__(parent)
+        self.cpu_limit = cpu_limit
+        self.memory_limit = memory_limit
+        self.pool_size = pool_size
+        self.process = None
+        self.spares = deque()
+        self.job = 0
+        self.expression = None
+        # Wall-clock backstop for workers stuck outside the CPU limit
+        self.watchdog = QTimer(self)
+        self.watchdog.setSingleShot(True)
+        self.watchdog.timeout.connect(self.on_timeout)
+
+    def spawn(self):
+        program, *args = worker.command(self.cpu_limit, self.memory_limit)
+        process = QProcess(self)
+        process.readyReadStandardOutput.connect(lambda process=process: self.on_output(process))
+        process.finished.connect(lambda *args, process=process: self.on_exit(process))
+        process.errorOccurred.connect(lambda error, process=process: self.on_error(process, error))
+        process.start(program, args)
+        return process
+
+    def start(self):
+        if self.process is None:
+            self.process = self.spares.popleft() if self.spares else self.spawn()
+
+    def warm(self):
+        self.start()
+        self.refill()
+
+    def refill(self):
+        # Starting a process costs the window a fork and exec, so the waiting
+        # workers are topped up after a job is sent, not before
+        while len(self.spares) + 1 < self.pool_size:
+            self.spares.append(self.spawn())
+
+    def busy(self):
+        return self.expression is not None
+
+    def submit(self, expression):
+        self.cancel()
+        self.start()
+        self.job += 1
+        self.expression = expression
+        # One line per job: pasted line breaks and tabs are only spacing; a
+        # worker that is still starting gets it once it is up
+        line = expression.replace("\n", " ").replace("\t", " ")
+        self.process.write(f"{self.job}\t{line}\n".encode())
+        if self.cpu_limit:
+            self.watchdog.start(int((self.cpu_limit * 2 + 1) * 1000))
+        self.refill()
+        return self.job
+
+    def cancel(self):
+        if not self.busy():
+            return
+        self.expression = None
+        self.watchdog.stop()
+        self.restart()
+
+    def restart(self):
+        process, self.process = self.process, None
+        if process is not None:
+            process.kill()
+        self.warm()
+
+    def stop(self):
+        self.expression = None
+        self.watchdog.stop()
+        processes = [self.process, *self.spares]
+        self.process = None
+        self.spares.clear()
+        for process in processes:
+            if process is not None:
+                process.kill()
+                process.waitForFinished(1000)
+
+    def deliver(self, status, text, path=precise.FLOAT):
+        expression, self.expression = self.expression, None
+        self.watchdog.stop()
+        self.finished.emit(self.job, expression, status, text, path)
+
+    def on_output(self, process):
+        if process is not self.process:
+            return
+        while process.canReadLine():
+            line = bytes(process.readLine()).decode(errors="replace").rstrip("\n")
+            try:
+                job, status, path, text = line.split("\t", 3)
+                job = int(job)
+            except ValueError:
+                # Not a reply; whatever the worker printed stays out of the window
+                continue
+            if self.busy() and job == self.job:
+                self.deliver(status, text, path)
+
+    def on_exit(self, process):
+        process.deleteLater()
+        if process in self.spares:
+            self.spares.remove(process)
+            return
+        if process is not self.process:
+            return
+        # The worker died on its own, most likely from the CPU or memory limit.
+        # An idle pool is not topped up until the next submit, so a worker
+        # that cannot start at all does not respawn in a loop.
+        self.process = None
+        if self.busy():
+            self.deliver(worker.LIMIT, worker.LIMIT_MESSAGE)
+            self.warm()
+
+    def on_error(self, process, error):
+        # A process that fails to start never finishes, so it is dropped here;
+        # the next submit tries a new one
+        if error != QProcess.ProcessError.FailedToStart:
+            return
+        process.deleteLater()
+        if process in self.spares:
+            self.spares.remove(process)
+            return
+        if process is not self.process:
+            return
+        self.process = None
+        if self.busy():
+            self.deliver(engine.ERROR, FAILED_MESSAGE)
+
+    def on_timeout(self):
+        if self.busy():
+            self.deliver(worker.LIMIT, worker.LIMIT_MESSAGE)
+            self.restart()
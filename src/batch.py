@@ -0,0 +1,243 @@
+import argparse
+import itertools
+import math
+import os
+import sys
+import time
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+
+import engine
+import formatting
+import precise
+import service
+import worker
+
+# Headless evaluation of one expression per line, with the same results as
+# "=" in the window (worker.evaluate). Everything is a generator pipeline, so
+# memory use does not depend on the size of the input. With a CPU limit, the
+# lines that can take long (see service.is_heavy) are evaluated one at a time
+# in a process of their own under it, and one going over it shows as too big
+# to compute instead of holding up the lines after it.
+
+CHUNK_SIZE = 2048
+# With --tape, output is flushed at least this often
+TAPE_FLUSH_MS = 20
+
+
+def read_expressions(stream):
+    for line in stream:
+        yield line.strip()
+
+
+def full_result(expression):
+    # Every digit of the result, as a lazy stream of text chunks. Results
+    # that floats could not be trusted with are shown as "=" shows them.
+    status, text, path = worker.evaluate(expression)
+    if status != engine.OK or path != precise.FLOAT:
+        return iter((text,))
+    status, value = engine.calculate_value(expression)
+    if status != engine.OK:
+        return iter((value,))
+    if value.__class__ is not int and value.__class__ is not float:
+        # Lists are shown as they are on screen
+        return iter((engine.format_value(value),))
+    return formatting.iter_full_result(value)
+
+
+def tape_line(expression):
+    # "<status>\t<value>\t<result>" for the calculator's tape: value is the
+    # result as a float for the running total, or empty
+    if not expression:
+        return "\t\t"
+    try:
+        status, text, _, value = precise.calculate_value(expression)
+    except MemoryError:
+        status, text, value = worker.LIMIT, worker.LIMIT_MESSAGE, None
+    if status != engine.OK:
+        return f"{status}\t\t{text}"
+    if value is None:
+        # Only known as far as it is shown
+        value = text
+    number = ""
+    try:
+        value = float(value)
+        if math.isfinite(value):
+            number = repr(value)
+    except (OverflowError, ValueError):
+        pass
+    return f"{status}\t{number}\t{text}"
+
+
+def _line(expression, all_digits, tape):
+    if tape:
+        return tape_line(expression)
+    if not expression:
+        return ""
+    if all_digits:
+        return full_result(expression)
+    return worker.evaluate(expression)[1]
+
+
+def _limited_line(expression, all_digits, tape, cpu_limit):
+    worker.set_cpu_limit(cpu_limit)
+    result = _line(expression, all_digits, tape)
+    return result if result.__class__ is str else "".join(result)
+
+
+def _evaluate_limited(expressions, all_digits, tape, cpu_limit):
+    pool = None
+    try:
+        for expression in expressions:
+            if not service.is_heavy(expression):
+                yield _line(expression, all_digits, tape)
+                continue
+            if pool is None:
+                pool = ProcessPoolExecutor(max_workers=1)
+            try:
+                yield pool.submit(_limited_line, expression, all_digits, tape, cpu_limit).result()
+            except BrokenProcessPool:
+                # Over the CPU limit (or out of memory); the next line that
+                # needs it gets a new process
+                pool.shutdown(wait=False)
+                pool = None
+                yield f"{worker.LIMIT}\t\t{worker.LIMIT_MESSAGE}" if tape else worker.LIMIT_MESSAGE
+    finally:
+        if pool is not None:
+            pool.shutdown(wait=False)
+
+
+def evaluate_expressions(expressions, all_digits=False, tape=False, cpu_limit=None):
+    if cpu_limit:
+        yield from _evaluate_limited(expressions, all_digits, tape, cpu_limit)
+        return
+    if tape:
+        for expression in expressions:
+            yield tape_line(expression)
+        return
+    if all_digits:
+        for expression in expressions:
+            yield full_result(expression) if expression else ""
+        return
+    calculate = worker.evaluate
+    for expression in expressions:
+        yield calculate(expression)[1] if expression else ""
+
+
+def _evaluate_chunk(chunk, all_digits=False, tape=False, cpu_limit=None):
+    return [result if result.__class__ is str else "".join(result)
+            for result in evaluate_expressions(chunk, all_digits, tape, cpu_limit)]
+
+
+def _chunks(iterable, size):
+    iterator = iter(iterable)
+    while True:
+        chunk = list(itertools.islice(iterator, size))
+        if not chunk:
+            return
+        yield chunk
+
+
+def evaluate_parallel(expressions, jobs=None, chunk_size=CHUNK_SIZE, all_digits=False, tape=False, cpu_limit=None):
+    # Chunks are submitted in order and results are yielded in the same order.
+    # Only a few chunks per worker are in flight, which keeps memory bounded
+    # and stops a fast reader from running ahead of the pool.
+    jobs = jobs or os.cpu_count() or 1
+    pending = deque()
+    with ProcessPoolExecutor(max_workers=jobs) as pool:
+        for chunk in _chunks(expressions, chunk_size):
+            pending.append(pool.submit(_evaluate_chunk, chunk, all_digits, tape, cpu_limit))
+            if len(pending) >= jobs * 2:
+                yield from pending.popleft().result()
+        while pending:
+            yield from pending.popleft().result()
+
+
+def run(stream, out, jobs=None, all_digits=False, tape=False, cpu_limit=None):
+    expressions = read_expressions(stream)
+    if jobs is None:
+        results = evaluate_expressions(expressions, all_digits, tape, cpu_limit)
+    else:
+        results = evaluate_parallel(expressions, jobs, all_digits=all_digits, tape=tape, cpu_limit=cpu_limit)
+    if tape:
+        _write_tape(results, out)
+        return
+    for result in results:
+        if result.__class__ is str:
+            out.write(result)
+        else:
+            out.writelines(result)
+        out.write("\n")
+    out.flush()
+
+
+def _write_tape(lines, out):
+    # A tape shows results while the rest are computed, so they are written
+    # as they come: the first straight away, then the ones gathered every
+    # TAPE_FLUSH_MS, in one write each even when stdout is unbuffered
+    pending = []
+    written = float("-inf")
+    for line in lines:
+        pending.append(line)
+        pending.append("\n")
+        now = time.perf_counter()
+        if (now - written) * 1000 >= TAPE_FLUSH_MS:
+            out.write("".join(pending))
+            out.flush()
+            pending.clear()
+            written = now
+    out.write("".join(pending))
+    out.flush()
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(
+        prog="98kalculator --batch",
+        description="Evaluate one expression per line and print one result per line.",
+    )
+    parser.add_argument("file", nargs="?", default="-", help="input file (default: stdin)")
+    parser.add_argument(
+        "-j", "--jobs", type=int, metavar="N", default=None,
+        help="evaluate in a pool of N processes (0 uses all cores)",
+    )
+    parser.add_argument(
+        "--all-digits", action="store_true",
+        help="print every digit of integer results instead of scientific notation",
+    )
+    parser.add_argument(
+        "--tape", action="store_true",
+        help="print status, value and result separated by tabs, flushed as they come",
+    )
+    parser.add_argument(
+        "--cpu-limit", type=int, metavar="SECONDS", default=None,
+        help="limit the CPU time of each line that can take long; one over it is too big to compute",
+    )
+    parser.add_argument(
+        "--memory-limit", type=int, metavar="MB", default=None,
+        help="limit the address space of the evaluating processes",
+    )
+    args = parser.parse_args(argv)
+    if args.memory_limit:
+        worker.set_memory_limit(args.memory_limit)
+    if args.tape:
+        # The calculator reads and writes the tape as UTF-8 whatever the locale
+        sys.stdin.reconfigure(encoding="utf-8")
+        sys.stdout.reconfigure(encoding="utf-8")
+
+    try:
+        if args.file == "-":
+            run(sys.stdin, sys.stdout, args.jobs, args.all_digits, args.tape, args.cpu_limit)
+        else:
+            with open(args.file, encoding="utf-8") as f:
+                run(f, sys.stdout, args.jobs, args.all_digits, args.tape, args.cpu_limit)
+    except OSError as e:
+        print(f"98kalculator: {e}", file=sys.stderr)
+        return 1
+    except KeyboardInterrupt:
+        return 130
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,362 @@
+import math
+import operator
+import re
+from functools import lru_cache
+
+import factorial
+from formatting import format_result
+
+# Expression engine used by the calculator window. It has no Qt dependency so it
+# can be imported by headless tools and benchmarks.
+
+OK = "ok"
+ZERO_DIVISION = "zero"
+ERROR = "error"
+
+ZERO_MESSAGE = "98k is coming for you"
+ERROR_MESSAGE = "Error"
+
+CACHE_SIZE = 512
+
+_SYMBOLS = str.maketrans({"×": "*", "÷": "/"})
+
+# A number never takes the first dot of "..", so 1..10 is a range
+_TOKEN_RE = re.compile(r"(?:\d|\.(?!\.))+(?:[eE][+-]?\d+)?|[^\W\d_]+|\*\*|\.\.|\S")
+_OPERATORS = frozenset("+-*/%^!(),[]") | {".."}
+_NUMBER_START = frozenset("0123456789.")
+
+
+class ExpressionError(ValueError):
+    pass
+
+
+def _pow(base, exp):
+    result = base ** exp
+    if isinstance(result, complex):
+        raise ValueError("complex result")
+    return result
+
+
+def _factorial(value):
+    if isinstance(value, float):
+        if not value.is_integer():
+            return factorial.gamma_factorial(value)
+        value = int(value)
+    return factorial.factorial(value)
+
+
+BINARY_OPS = {
+    "+": operator.add,
+    "-": operator.sub,
+    "*": operator.mul,
+    "/": operator.truediv,
+    "%": operator.mod,
+    "^": _pow,
+}
+
+UNARY_OPS = {
+    "neg": operator.neg,
+    "!": _factorial,
+}
+
+FUNCTIONS = {
+    "sin": math.sin,
+    "cos": math.cos,
+    "tan": math.tan,
+    "ln": math.log,
+    "log": math.log10,
+}
+
+CONSTANTS = {
+    "e": math.e,
+    "pi": math.pi,
+    "π": math.pi,
+}
+
+# Reductions over lists and ranges, evaluated by arrays.py
+REDUCTIONS = frozenset(("sum", "mean", "min", "max", "prod"))
+# What the text of any expression that needs arrays.py contains
+_ARRAYS_RE = re.compile(r"\[|\.\.|" + "|".join(sorted(REDUCTIONS)))
+
+
+def normalize(text):
+    return text.strip().translate(_SYMBOLS)
+
+
+def _token_value(token):
+    # Numbers become int/float, everything else stays a string: names are
+    # alphabetic, operators are single characters ("**" and "mod" are aliases).
+    if token in _OPERATORS:
+        return token
+    if token[0] in _NUMBER_START:
+        try:
+            return int(token) if token.isdigit() else float(token)
+        except ValueError:
+            raise ExpressionError(f"bad number {token!r}") from None
+    if token.isalpha():
+        return "%" if token == "mod" else token
+    if token == "**":
+        return "^"
+    raise ExpressionError(f"unexpected character {token!r}")
+
+
+def tokenize(text):
+    # Operators and plain integers, most of the tokens, are handled inline
+    return [token if token in _OPERATORS else int(token) if token.isdigit() else _token_value(token)
+            for token in _TOKEN_RE.findall(text)]
+
+
+def scan(text, pos=0):
+    # Yields (token, end offset) from pos onwards, for callers that keep the
+    # tokens of an unchanged prefix and only re-tokenize the tail.
+    for match in _TOKEN_RE.finditer(text[pos:].translate(_SYMBOLS)):
+        yield _token_value(match.group()), pos + match.end()
+
+
+_PRECEDENCE = {"+": 1, "-": 1, "*": 2, "/": 2, "%": 2, "^": 4}
+_UNARY_PRECEDENCE = 3
+
+
+class _Parser:
+    # Precedence climbing with Python's rules: + - < * / % < unary minus < ^ < !
+    # ^ is right associative and binds tighter than a leading minus, so -2^2 == -4.
+    # Unclosed parentheses are closed implicitly at the end of the input.
+    # Lists [a, b], ranges a..b and reductions sum(...) give the nodes
+    # ("list", items), ("range", first, last) and ("reduce", name, args).
+
+    def __init__(self, tokens, applications=False):
+        self.tokens = tokens
+        self.pos = 0
+        self.token = tokens[0] if tokens else None
+        # With applications, name(a, b) parses as ("apply", name, (a, b)) for
+        # user functions; what it means is left to the caller
+        self.applications = applications
+
+    def advance(self):
+        token = self.token
+        self.pos += 1
+        self.token = self.tokens[self.pos] if self.pos < len(self.tokens) else None
+        return token
+
+    def parse(self):
+        if self.token is None:
+            raise ExpressionError("empty expression")
+        node = self.range_expr()
+        if self.token is not None:
+            raise ExpressionError(f"unexpected {self.token!r}")
+        return node
+
+    def range_expr(self):
+        # Ranges bind looser than any operator: 1..n+1 is 1..(n+1)
+        node = self.expr(1)
+        if self.token == "..":
+            self.advance()
+            node = ("range", node, self.expr(1))
+        return node
+
+    def expr(self, min_prec):
+        token = self.token
+        if token == "-":
+            self.advance()
+            node = ("neg", self.expr(_UNARY_PRECEDENCE))
+        elif token == "+":
+            self.advance()
+            node = self.expr(_UNARY_PRECEDENCE)
+        else:
+            node = self.primary()
+
+        while True:
+            token = self.token
+            if token.__class__ is not str:
+                return node
+            prec = _PRECEDENCE.get(token)
+            if prec is None:
+                if token != "(" and token in _OPERATORS:
+                    return node
+                # Implicit multiplication: 2e, 2sin(1), (1+2)(3+4)
+                if min_prec > 2:
+                    return node
+                node = ("bin", "*", node, self.expr(3))
+                continue
+            if prec < min_prec:
+                return node
+            self.advance()
+            if prec == 4:
+                node = ("bin", token, node, self.expr(_UNARY_PRECEDENCE))
+            else:
+                node = ("bin", token, node, self.expr(prec + 1))
+
+    def primary(self):
+        token = self.advance()
+        if token is None:
+            raise ExpressionError("unexpected end of expression")
+        if token.__class__ is not str:
+            node = ("num", token)
+        elif token == "(":
+            node = self.group()
+        elif token == "[":
+            node = ("list", self.arguments("]"))
+        elif token in _OPERATORS:
+            raise ExpressionError(f"unexpected {token!r}")
+        elif token in FUNCTIONS:
+            if self.advance() != "(":
+                raise ExpressionError(f"{token} needs parentheses")
+            node = ("call", token, self.group())
+        elif token in REDUCTIONS:
+            if self.advance() != "(":
+                raise ExpressionError(f"{token} needs parentheses")
+            node = ("reduce", token, self.arguments())
+        elif self.applications and self.token == "(" and token not in CONSTANTS:
+            self.advance()
+            node = ("apply", token, self.arguments())
+        else:
+            node = ("name", token)
+        while self.token == "!":
+            self.advance()
+            node = ("!", node)
+        return node
+
+    def group(self):
+        node = self.range_expr()
+        token = self.advance()
+        if token is not None and token != ")":
+            raise ExpressionError(f"expected ')' but found {token!r}")
+        return node
+
+    def arguments(self, close=")"):
+        if self.token == close:
+            self.advance()
+            return ()
+        args = [self.range_expr()]
+        while self.token == ",":
+            self.advance()
+            args.append(self.range_expr())
+        token = self.advance()
+        if token is not None and token != close:
+            raise ExpressionError(f"expected {close!r} but found {token!r}")
+        return tuple(args)
+
+
+def parse(text, applications=False):
+    return _Parser(tokenize(text), applications).parse()
+
+
+def has_arrays(node):
+    # Whether node needs arrays.py: it has a list, range or reduction
+    kind = node[0]
+    if kind in ("list", "range", "reduce"):
+        return True
+    if kind in ("num", "name"):
+        return False
+    if kind == "apply":
+        return any(map(has_arrays, node[2]))
+    return any(has_arrays(child) for child in node[1:] if child.__class__ is tuple)
+
+
+_UNFOLDED = frozenset(("^", "!"))
+
+
+def _compile(node):
+    # Returns (fn, None) where fn(env) evaluates the node, or (None, value) for
+    # subtrees made only of literals and constants, which are folded here so
+    # they cost nothing per evaluation. Powers and factorials are never folded:
+    # they can take unbounded time, and compiling must not.
+    kind = node[0]
+    if kind == "num":
+        return None, node[1]
+    if kind == "name":
+        name = node[1]
+        if name in CONSTANTS:
+            return None, CONSTANTS[name]
+
+        def lookup(env):
+            try:
+                return env[name]
+            except KeyError:
+                raise ExpressionError(f"unknown name {name!r}") from None
+        return lookup, None
+    if kind == "bin":
+        fn = BINARY_OPS[node[1]]
+        left, left_value = _compile(node[2])
+        right, right_value = _compile(node[3])
+        if left is None and right is None and node[1] not in _UNFOLDED:
+            try:
+                return None, fn(left_value, right_value)
+            except Exception:
+                # Stay lazy so the error surfaces when the expression is evaluated
+                pass
+        left = left or _constant(left_value)
+        right = right or _constant(right_value)
+        return (lambda env: fn(left(env), right(env))), None
+    fn = FUNCTIONS[node[1]] if kind == "call" else UNARY_OPS[kind]
+    arg, arg_value = _compile(node[-1])
+    if arg is None and kind not in _UNFOLDED:
+        try:
+            return None, fn(arg_value)
+        except Exception:
+            pass
+    arg = arg or _constant(arg_value)
+    return (lambda env: fn(arg(env))), None
+
+
+def _constant(value):
+    return lambda env: value
+
+
+def compile_ast(node):
+    fn, value = _compile(node)
+    return fn or _constant(value)
+
+
+@lru_cache(maxsize=CACHE_SIZE)
+def _compile_normalized(key):
+    node = parse(key)
+    if _ARRAYS_RE.search(key) is not None and has_arrays(node):
+        # NumPy is only imported by expressions that need it
+        import arrays
+        return arrays.compile_ast(node)
+    return compile_ast(node)
+
+
+def compile_expression(text):
+    return _compile_normalized(normalize(text))
+
+
+def evaluate(text, env=None):
+    return compile_expression(text)(CONSTANTS if env is None else env)
+
+
+def calculate_value(text):
+    # Same outcomes as the calculator's "=" key: (OK, value) or (status, message)
+    if "0/0" in text or "0÷0" in text:
+        return ZERO_DIVISION, ZERO_MESSAGE
+    try:
+        value = evaluate(text)
+    except ZeroDivisionError:
+        return ZERO_DIVISION, ZERO_MESSAGE
+    except Exception:
+        return ERROR, ERROR_MESSAGE
+    if isinstance(value, float) and math.isnan(value):
+        return ZERO_DIVISION, ZERO_MESSAGE
+    return OK, value
+
+
+def format_value(value):
+    if value.__class__ is int or value.__class__ is float:
+        return format_result(value)
+    # A list from arrays.py
+    return value.display()
+
+
+def calculate(text):
+    # (status, text to display)
+    status, value = calculate_value(text)
+    if status != OK:
+        return status, value
+    try:
+        return OK, format_value(value)
+    except ZeroDivisionError:
+        # A list only computes its elements when it is shown
+        return ZERO_DIVISION, ZERO_MESSAGE
+    except Exception:
+        return ERROR, ERROR_MESSAGE
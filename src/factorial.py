@@ -0,0 +1,135 @@
+import math
+from collections import OrderedDict
+from decimal import Decimal, localcontext
+
+from formatting import log10_scientific
+
+# x! for the engines. Whole numbers get their exact factorial: small ones
+# straight from math.factorial, large ones through a bounded cache of the
+# factorials computed lately, from which a nearby n! is built by multiplying
+# in (or dividing out) the product of the numbers in between instead of
+# starting over. Other numbers get gamma(x + 1). approximate(x) gives the
+# displayed digits of a factorial too large for a float from Stirling's
+# series, without computing it.
+
+# Largest n whose n! fits a float
+MAX_FLOAT_FACTORIAL = 170
+# Below this n! costs less to compute than to look up
+CACHE_MIN = 1000
+CACHE_ENTRIES = 16
+CACHE_BITS = 1 << 27
+# A cached m! is extended up to n! when n - m is at most n // UPWARD_SPAN,
+# and brought down to it when m - n is at most DOWNWARD_SPAN
+UPWARD_SPAN = 8
+DOWNWARD_SPAN = 64
+# Digits of ln(x!) kept beyond those of its integer part
+LOG_DIGITS = 30
+# Largest x whose x! is approximated: the working precision grows with the
+# digits of x, and beyond it the exponent alone is too long to show
+MAX_APPROXIMATION = 10 ** 30
+
+_PI = Decimal("3.14159265358979323846264338327950288419716939937510582097494459")
+# Stirling's series past the first terms: 1/(12x) - 1/(360x^3) + …
+_STIRLING = (12, -360, 1260, -1680, 1188)
+
+
+def _product(low, high):
+    # low × (low + 1) × … × (high - 1), split in halves so the large
+    # multiplications are between numbers of similar size
+    if high - low <= 16:
+        return math.prod(range(low, high))
+    middle = (low + high) // 2
+    return _product(low, middle) * _product(middle, high)
+
+
+class FactorialCache:
+    def __init__(self, entries=CACHE_ENTRIES, bits=CACHE_BITS):
+        self.entries = entries
+        self.bits = bits
+        # n -> n!, least recently used first
+        self.values = OrderedDict()
+        self.size = 0
+        # Counters for benchmarks
+        self.hits = 0
+        self.steps = 0
+        self.misses = 0
+
+    def factorial(self, n):
+        value = self.values.get(n)
+        if value is not None:
+            self.values.move_to_end(n)
+            self.hits += 1
+            return value
+        value = self.from_nearby(n)
+        if value is None:
+            value = math.factorial(n)
+            self.misses += 1
+        else:
+            self.steps += 1
+        self.remember(n, value)
+        return value
+
+    def from_nearby(self, n):
+        above = min((m for m in self.values if m > n), default=None)
+        if above is not None and above - n <= DOWNWARD_SPAN:
+            return self.values[above] // _product(n + 1, above + 1)
+        below = max((m for m in self.values if m < n), default=None)
+        if below is not None and n - below <= n // UPWARD_SPAN:
+            return self.values[below] * _product(below + 1, n + 1)
+        return None
+
+    def remember(self, n, value):
+        bits = value.bit_length()
+        if bits > self.bits:
+            return
+        self.values[n] = value
+        self.size += bits
+        while len(self.values) > self.entries or self.size > self.bits:
+            _, old = self.values.popitem(last=False)
+            self.size -= old.bit_length()
+
+    def clear(self):
+        self.values.clear()
+        self.size = 0
+
+
+CACHE = FactorialCache()
+
+
+def factorial(n):
+    if n < CACHE_MIN:
+        return math.factorial(n)
+    return CACHE.factorial(n)
+
+
+def gamma_factorial(x):
+    # x! of a number that is not whole
+    return math.gamma(x + 1)
+
+
+def approximate(x):
+    # Display text of x! for x above MAX_FLOAT_FACTORIAL, up to
+    # MAX_APPROXIMATION
+    if not x <= MAX_APPROXIMATION:
+        raise OverflowError("factorial too large to approximate")
+    with localcontext() as ctx:
+        ctx.prec = LOG_DIGITS + len(str(int(x)))
+        x = Decimal(x)
+        log = x * x.ln() - x + (2 * _PI * x).ln() / 2
+        power = x
+        for denominator in _STIRLING:
+            log += 1 / (denominator * power)
+            power *= x * x
+        return log10_scientific(log / Decimal(10).ln())
+
+
+class Approximation:
+    # A factorial only ever displayed, for the live preview: any arithmetic
+    # on it fails, as too expensive
+    __slots__ = ("x",)
+
+    def __init__(self, x):
+        self.x = x
+
+    def display(self):
+        return approximate(self.x)
@@ -0,0 +1,78 @@
+from collections import OrderedDict
+
+from PyQt6.QtGui import QFont, QFontMetrics
+
+# Picks the largest pixel size at which a text fits a given width. Metrics are
+# built once per size, widths are memoized per (text, size) and the sizes are
+# binary searched, so a fit costs O(log sizes) width lookups instead of a
+# QFontMetrics construction per candidate size. A text longer than its
+# narrowest character allows at the smallest size is not measured at all:
+# measuring takes time in proportion to the length of the text.
+
+
+class FontFitter:
+    def __init__(self, font, max_size=64, min_size=20, step=2, cache_size=4096):
+        self.font = QFont(font)
+        self.sizes = sorted(range(max_size, min_size - 1, -step))
+        self.cache_size = cache_size
+        self.metrics = {}
+        self.widths = OrderedDict()
+        self.advances = {}
+        # Counters for benchmarks
+        self.metrics_built = 0
+        self.widths_measured = 0
+
+    def metrics_for(self, size):
+        fm = self.metrics.get(size)
+        if fm is None:
+            font = QFont(self.font)
+            font.setPixelSize(size)
+            fm = self.metrics[size] = QFontMetrics(font)
+            self.metrics_built += 1
+        return fm
+
+    def width(self, text, size):
+        key = (text, size)
+        widths = self.widths
+        width = widths.get(key)
+        if width is None:
+            width = widths[key] = self.metrics_for(size).horizontalAdvance(text)
+            self.widths_measured += 1
+            if len(widths) > self.cache_size:
+                widths.popitem(last=False)
+        else:
+            widths.move_to_end(key)
+        return width
+
+    def narrowest(self, text, size):
+        # Smallest advance of a character of the text
+        advances = self.advances.get(size)
+        if advances is None:
+            advances = self.advances[size] = {}
+        fm = None
+        narrowest = None
+        for char in set(text):
+            advance = advances.get(char)
+            if advance is None:
+                fm = fm or self.metrics_for(size)
+                advance = advances[char] = fm.horizontalAdvance(char)
+            if narrowest is None or advance < narrowest:
+                narrowest = advance
+        return narrowest or 0
+
+    def fit(self, text, target_width):
+        # Width grows with the size, so the largest fitting size is a boundary
+        # in the sorted list. Falls back to the smallest size if nothing fits.
+        sizes = self.sizes
+        best = sizes[0]
+        if len(text) * self.narrowest(text, best) > target_width:
+            return best
+        lo, hi = 0, len(sizes) - 1
+        while lo <= hi:
+            mid = (lo + hi) // 2
+            if self.width(text, sizes[mid]) <= target_width:
+                best = sizes[mid]
+                lo = mid + 1
+            else:
+                hi = mid - 1
+        return best
@@ -0,0 +1,111 @@
+import math
+from decimal import ROUND_FLOOR, Decimal, localcontext
+
+# Display formatting of results. Integers too long for the display go to
+# scientific notation straight from their bit length and top 64 bits, never
+# through a full int -> decimal conversion, so the cost does not depend on the
+# number of digits (and Python's int string-conversion limit never applies).
+
+MAX_LENGTH = 12
+SIGNIFICANT_DIGITS = 6
+CHUNK_DIGITS = 1024
+
+_LOG10_2 = Decimal("0.30102999566398119521373889472449302676818988146211")
+
+
+def _scientific(mantissa, exponent, sign=""):
+    text = f"{mantissa:.{SIGNIFICANT_DIGITS - 1}f}"
+    if text.startswith("10"):
+        # Rounding carried into a new digit: 9.999997e+20 -> 1.00000e+21
+        text = f"{1:.{SIGNIFICANT_DIGITS - 1}f}"
+        exponent += 1
+    return f"{sign}{text}e{'-' if exponent < 0 else '+'}{abs(exponent):02d}"
+
+
+def int_scientific(n):
+    if n.bit_length() < 1024:
+        # Fits a float, whose formatting is exact enough for 6 digits
+        return f"{float(n):.{SIGNIFICANT_DIGITS - 1}e}"
+    sign = "-" if n < 0 else ""
+    n = abs(n)
+    shift = n.bit_length() - 64
+    top = n >> shift
+    with localcontext() as ctx:
+        ctx.prec = 40
+        return log10_scientific(Decimal(top).log10() + shift * _LOG10_2, sign)
+
+
+def log10_scientific(log, sign=""):
+    # Scientific notation of the number whose log10 is the Decimal log
+    exponent = int(log.to_integral_value(rounding=ROUND_FLOOR))
+    return _scientific(10 ** float(log - exponent), exponent, sign)
+
+
+def format_result(value):
+    if isinstance(value, int):
+        if -10 ** (MAX_LENGTH - 1) < value < 10 ** MAX_LENGTH:
+            return str(value)
+        return int_scientific(value)
+
+    if value.is_integer():
+        if -10 ** (MAX_LENGTH - 1) < value < 10 ** MAX_LENGTH:
+            return str(int(value))
+        return f"{value:.{SIGNIFICANT_DIGITS - 1}e}"
+    text = f"{value:.8f}".rstrip('0').rstrip('.')
+    if text == "-0":
+        # Below the display resolution, where the sign is only noise
+        return "0"
+    if len(text) > MAX_LENGTH:
+        return f"{value:.{SIGNIFICANT_DIGITS - 1}e}"
+    return text
+
+
+def format_decimal(value):
+    # format_result for a Decimal, from its digits rather than a float, so
+    # high-precision results are rounded once, for display
+    if value == value.to_integral_value():
+        if -10 ** (MAX_LENGTH - 1) < value < 10 ** MAX_LENGTH:
+            return str(int(value))
+    else:
+        text = f"{value:.8f}".rstrip('0').rstrip('.')
+        if text == "-0":
+            return "0"
+        if len(text) <= MAX_LENGTH:
+            return text
+    exponent = value.adjusted()
+    return _scientific(float(abs(value).scaleb(-exponent)), exponent, "-" if value < 0 else "")
+
+
+def iter_digits(n, chunk_digits=CHUNK_DIGITS):
+    # Lazily yields the decimal expansion of n, most significant chunk first.
+    # n is split by divide and conquer on 10**(chunk_digits * 2**i), so the
+    # first chunks come out before the rest of the number is converted.
+    if n < 0:
+        yield "-"
+        n = -n
+    powers = [10 ** chunk_digits]
+    while powers[-1] <= n:
+        powers.append(powers[-1] * powers[-1])
+    yield from _split_digits(n, powers, len(powers) - 2, chunk_digits, False)
+
+
+def _split_digits(n, powers, level, chunk_digits, pad):
+    if level < 0:
+        text = str(n)
+        yield text.zfill(chunk_digits) if pad else text
+        return
+    high, low = divmod(n, powers[level])
+    if high or pad:
+        yield from _split_digits(high, powers, level - 1, chunk_digits, pad)
+        yield from _split_digits(low, powers, level - 1, chunk_digits, True)
+    else:
+        yield from _split_digits(low, powers, level - 1, chunk_digits, False)
+
+
+def iter_full_result(value):
+    # The "show all digits" form of a result, as a stream of text chunks
+    if isinstance(value, int):
+        return iter_digits(value)
+    if value.is_integer() and math.isfinite(value):
+        return iter_digits(int(value))
+    return iter((repr(value),))
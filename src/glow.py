@@ -0,0 +1,151 @@
+import time
+from collections import OrderedDict
+
+from PyQt6.QtCore import QPointF, QRectF, Qt, QTimer
+from PyQt6.QtGui import QFontMetrics, QImage, QPainter, QPixmap
+from PyQt6.QtWidgets import QGraphicsBlurEffect, QGraphicsPixmapItem, QGraphicsScene, QLabel
+
+# A QLabel with a neon glow behind its text. A QGraphicsDropShadowEffect
+# re-renders and blurs the whole label on every repaint; here the blurred text
+# is rendered once per (text, font) into a pixmap and reused, so a repaint is
+# a pixmap blit. While the text, font or size change faster than
+# FAST_CHANGE_MS (typing, resizing) glows that are not cached yet are skipped,
+# and drawn once things have been still for IDLE_MS. set_flash brightens the
+# glow by drawing it again at that opacity, for a new result to light up.
+
+FAST_CHANGE_MS = 120
+IDLE_MS = 150
+CACHE_SIZE = 64
+# The glow is blurred at this fraction of the screen resolution and scaled up
+# when drawn; a 20px blur looks the same and costs a quarter of the pixels
+GLOW_SCALE = 0.5
+
+_FORMAT = QImage.Format.Format_ARGB32_Premultiplied
+
+
+class GlowLabel(QLabel):
+    def __init__(self, text="", parent=None):
+        super().__init__(text, parent)
+        self.glow_color = None
+        self.glow_radius = 0
+        self.blur = None
+        self.glows = OrderedDict()
+        self.last_change = 0.0
+        self.fast = False
+        self.deferred = False
+        self.idle_timer = QTimer(self)
+        self.idle_timer.setSingleShot(True)
+        self.idle_timer.setInterval(IDLE_MS)
+        self.idle_timer.timeout.connect(self.on_idle)
+        self.flash = 0.0
+        # Counter for benchmarks
+        self.glows_rendered = 0
+
+    def set_glow(self, color, radius=20):
+        self.glow_color = color
+        self.glow_radius = radius
+        self.glows.clear()
+        if self.blur is None:
+            # One scene reused for every glow this label renders
+            self.blur = QGraphicsBlurEffect()
+            self.blur.setBlurHints(QGraphicsBlurEffect.BlurHint.PerformanceHint)
+            self.blur_item = QGraphicsPixmapItem()
+            self.blur_item.setGraphicsEffect(self.blur)
+            self.blur_scene = QGraphicsScene(self)
+            self.blur_scene.addItem(self.blur_item)
+        self.update()
+
+    def render_glow(self, text, ratio):
+        # The text in the glow color, blurred, with glow_radius pixels of
+        # room on every side
+        font = self.font()
+        fm = QFontMetrics(font)
+        radius = self.glow_radius
+        scale = ratio * GLOW_SCALE
+        width = round((fm.horizontalAdvance(text) + 2 * radius) * scale) or 1
+        height = round((fm.height() + 2 * radius) * scale) or 1
+
+        source = QImage(width, height, _FORMAT)
+        source.fill(Qt.GlobalColor.transparent)
+        painter = QPainter(source)
+        painter.scale(scale, scale)
+        painter.setFont(font)
+        painter.setPen(self.glow_color)
+        painter.drawText(QPointF(radius, radius + fm.ascent()), text)
+        painter.end()
+
+        self.blur_item.setPixmap(QPixmap.fromImage(source))
+        self.blur.setBlurRadius(radius * scale)
+        glow = QImage(width, height, _FORMAT)
+        glow.fill(Qt.GlobalColor.transparent)
+        painter = QPainter(glow)
+        area = QRectF(0, 0, width, height)
+        self.blur_scene.render(painter, area, area)
+        painter.end()
+        glow.setDevicePixelRatio(scale)
+        return QPixmap.fromImage(glow)
+
+    def set_flash(self, level):
+        self.flash = level
+        self.update()
+
+    def setText(self, text):
+        super().setText(text)
+        self.changed()
+
+    def setFont(self, font):
+        super().setFont(font)
+        self.changed()
+
+    def resizeEvent(self, event):
+        super().resizeEvent(event)
+        # The first resize only lays out a new label
+        if event.oldSize().isValid():
+            self.changed()
+
+    def changed(self):
+        now = time.perf_counter()
+        self.fast = (now - self.last_change) * 1000 < FAST_CHANGE_MS
+        self.last_change = now
+        if self.fast:
+            self.idle_timer.start()
+
+    def on_idle(self):
+        self.fast = False
+        if self.deferred:
+            self.deferred = False
+            self.update()
+
+    def glow(self):
+        ratio = self.devicePixelRatioF()
+        key = (self.text(), self.font().toString(), ratio)
+        glows = self.glows
+        glow = glows.get(key)
+        if glow is not None:
+            glows.move_to_end(key)
+            return glow
+        if self.fast:
+            self.deferred = True
+            return None
+        glow = glows[key] = self.render_glow(key[0], ratio)
+        self.glows_rendered += 1
+        if len(glows) > CACHE_SIZE:
+            glows.popitem(last=False)
+        return glow
+
+    def paintEvent(self, event):
+        if self.glow_color is not None and self.text():
+            glow = self.glow()
+            if glow is not None:
+                rect = self.style().itemTextRect(self.fontMetrics(), self.contentsRect(), self.alignment(),
+                                                 self.isEnabled(), self.text())
+                corner = QPointF(rect.left() - self.glow_radius, rect.top() - self.glow_radius)
+                painter = QPainter(self)
+                painter.setRenderHint(QPainter.RenderHint.SmoothPixmapTransform)
+                target = QRectF(corner, glow.deviceIndependentSize())
+                painter.drawPixmap(target, glow, QRectF(glow.rect()))
+                if self.flash:
+                    painter.setOpacity(self.flash)
+                    painter.drawPixmap(target, glow, QRectF(glow.rect()))
+                painter.end()
+        super().paintEvent(event)
@@ -0,0 +1,256 @@
+import json
+import mmap
+import os
+import re
+import time
+from array import array
+from collections import OrderedDict
+
+# Persistent calculation history. Records are appended to a JSON-lines log
+# and read back through a memory map. A sidecar file holds the end offset of
+# every record as packed uint64s, so opening the history reads that small file
+# instead of scanning the log, and any record can be fetched directly.
+# Searches go through a trigram index over "expression = result", built a
+# few milliseconds at a time while the history window is open rather than at
+# startup; a search made before it is complete scans the records it does not
+# cover yet.
+
+LOG_NAME = "history.jsonl"
+INDEX_NAME = "history.idx"
+RECORD_CACHE_SIZE = 1024
+# Records read from the map at a time while indexing
+INDEX_CHUNK = 64
+
+# Padding so that every character, including the first and last, is part of
+# a trigram; a gram starting with _START also marks a prefix.
+_START = "\x02"
+_END = "\x03"
+# Characters that JSON escapes or that can match across " = "
+_UNSCANNABLE = re.compile(r'[\s="\\\x00-\x1f\x7f]')
+# Not followed, up to the next unescaped quote, by a key's end or a key:
+# true of any match in a string, and of none in a key or a timestamp
+_NOT_KEY = r'(?![^"\n]*(?<!\\)"(?:[etr]")?: )'
+
+
+def default_directory():
+    data_home = os.environ.get("XDG_DATA_HOME") or os.path.expanduser("~/.local/share")
+    return os.path.join(data_home, "98kalculator")
+
+
+def _parse(line):
+    try:
+        data = json.loads(line)
+        return (data["e"], data["r"], data.get("t", 0))
+    except (ValueError, KeyError, TypeError):
+        return ("", "", 0)
+
+
+def _text(record):
+    return f"{record[0]} = {record[1]}".lower()
+
+
+def _grams(text):
+    return {text[i:i + 3] for i in range(len(text) - 2)}
+
+
+class HistoryStore:
+    def __init__(self, directory=None):
+        self.directory = directory or default_directory()
+        os.makedirs(self.directory, exist_ok=True)
+        self.log_path = os.path.join(self.directory, LOG_NAME)
+        self.index_path = os.path.join(self.directory, INDEX_NAME)
+
+        self.ends = array("Q")
+        self.size = 0
+        self.map = None
+        self.records = OrderedDict()
+        self.postings = {}
+        self.indexed = 0
+
+        self.log = open(self.log_path, "ab", buffering=0)
+        self.index = open(self.index_path, "ab", buffering=0)
+        self.load()
+
+    def load(self):
+        size = os.fstat(self.log.fileno()).st_size
+        with open(self.index_path, "rb") as f:
+            data = f.read()
+        ends = array("Q")
+        ends.frombytes(data[:len(data) - len(data) % ends.itemsize])
+        # Entries past the end of the log come from an interrupted append
+        valid = len(ends)
+        while valid and ends[valid - 1] > size:
+            valid -= 1
+        if valid != len(ends) or len(data) % ends.itemsize:
+            del ends[valid:]
+            self.index.truncate(len(ends) * ends.itemsize)
+        self.ends = ends
+        self.size = ends[-1] if ends else 0
+        if self.size < size:
+            self.scan_tail(size)
+
+    def scan_tail(self, size):
+        # Indexes records appended by another instance (or lost from the
+        # sidecar by a crash); normally there are none.
+        start = self.size
+        with open(self.log_path, "rb") as f:
+            f.seek(start)
+            tail = f.read(size - start)
+        new = array("Q")
+        pos = tail.find(b"\n")
+        while pos != -1:
+            new.append(start + pos + 1)
+            pos = tail.find(b"\n", pos + 1)
+        if new:
+            self.ends.extend(new)
+            self.index.write(new.tobytes())
+            self.size = new[-1]
+
+    def close(self):
+        if self.map is not None:
+            self.map.close()
+            self.map = None
+        self.log.close()
+        self.index.close()
+
+    def __len__(self):
+        return len(self.ends)
+
+    def append(self, expression, result):
+        line = json.dumps({"t": int(time.time()), "e": expression, "r": result}, ensure_ascii=False)
+        size = os.fstat(self.log.fileno()).st_size
+        if size != self.size:
+            self.scan_tail(size)
+        self.log.write(line.encode() + b"\n")
+        end = os.fstat(self.log.fileno()).st_size
+        self.ends.append(end)
+        self.index.write(array("Q", (end,)).tobytes())
+        self.size = end
+        return len(self.ends) - 1
+
+    def record(self, i):
+        # (expression, result, timestamp) of record i, oldest first
+        records = self.records
+        record = records.get(i)
+        if record is not None:
+            records.move_to_end(i)
+            return record
+        start = self.ends[i - 1] if i else 0
+        end = self.ends[i]
+        record = records[i] = _parse(self.read(start, end))
+        if len(records) > RECORD_CACHE_SIZE:
+            records.popitem(last=False)
+        return record
+
+    def read(self, start, end):
+        if self.map is None or len(self.map) < end:
+            if self.map is not None:
+                self.map.close()
+            with open(self.log_path, "rb") as f:
+                self.map = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+        return self.map[start:end]
+
+    def text(self, i):
+        return _text(self.record(i))
+
+    def index_step(self, budget):
+        # Adds records to the trigram index for about budget seconds, reading
+        # INDEX_CHUNK of them at a time in one slice of the map. Returns True
+        # once everything is indexed.
+        deadline = time.perf_counter() + budget
+        total = len(self.ends)
+        while self.indexed < total:
+            self.index_chunk(min(total, self.indexed + INDEX_CHUNK))
+            if time.perf_counter() >= deadline:
+                break
+        return self.indexed == total
+
+    def index_chunk(self, stop):
+        first = self.indexed
+        postings = self.postings
+        get = postings.get
+        for i, line in enumerate(self.lines(first, stop), first):
+            text = _START + _text(_parse(line)) + _END
+            for gram in {text[j:j + 3] for j in range(len(text) - 2)}:
+                ids = get(gram)
+                if ids is None:
+                    postings[gram] = array("I", (i,))
+                else:
+                    ids.append(i)
+        self.indexed = stop
+
+    def lines(self, first, stop):
+        if stop == first:
+            return []
+        return self.read(self.ends[first - 1] if first else 0, self.ends[stop - 1]).splitlines()
+
+    def search(self, query, prefix=False):
+        # Ids of the records whose "expression = result" contains query (or
+        # starts with it), oldest first. Records not indexed yet are scanned
+        # rather than waiting for the index.
+        query = query.lower()
+        if not query:
+            return array("I", range(len(self.ends)))
+        if prefix:
+            found = array("I", sorted(i for i in self.lookup(_START + query) if self.text(i).startswith(query)))
+        else:
+            found = array("I", sorted(i for i in self.lookup(query) if query in self.text(i)))
+        found.extend(self.scan(query, prefix))
+        return found
+
+    def scan(self, query, prefix):
+        # Matching records past the indexed ones. Their lines are searched as
+        # raw JSON for the longest piece of the query that JSON leaves as it
+        # is and that cannot span the " = " between expression and result;
+        # only the lines containing it outside the keys and the timestamp are
+        # parsed and checked.
+        first = self.indexed
+        stop = len(self.ends)
+        if stop == first:
+            return []
+        if prefix:
+            matches = lambda text: text.startswith(query)
+        else:
+            matches = lambda text: query in text
+        piece = max(_UNSCANNABLE.split(query), key=len)
+        if not piece:
+            return [i for i, line in enumerate(self.lines(first, stop), first) if matches(_text(_parse(line)))]
+        if prefix and query.startswith(piece):
+            pattern = '"e": "' + re.escape(piece)
+        else:
+            pattern = re.escape(piece) + _NOT_KEY
+        search = re.compile(pattern, re.IGNORECASE).search
+        data = self.read(self.ends[first - 1] if first else 0, self.ends[stop - 1]).decode(errors="replace")
+        found = []
+        i = first
+        counted = 0
+        position = 0
+        while True:
+            match = search(data, position)
+            if match is None:
+                return found
+            start = data.rfind("\n", 0, match.start()) + 1
+            end = data.find("\n", start)
+            i += data.count("\n", counted, start)
+            counted = start
+            if matches(_text(_parse(data[start:end]))):
+                found.append(i)
+            position = end
+
+    def lookup(self, padded):
+        # Indexed records with every trigram of padded: a superset of the
+        # matches, since sharing all trigrams does not guarantee one
+        if len(padded) <= 3:
+            # Every record containing a gram that contains the query is a match
+            candidates = set()
+            for gram, ids in self.postings.items():
+                if padded in gram:
+                    candidates.update(ids)
+            return candidates
+        lists = sorted((self.postings.get(gram, ()) for gram in _grams(padded)), key=len)
+        candidates = set(lists[0])
+        for ids in lists[1:]:
+            if not candidates:
+                break
+            candidates.intersection_update(ids)
+        return candidates
@@ -0,0 +1,118 @@
+from PyQt6.QtCore import QAbstractListModel, QModelIndex, Qt, QTimer, pyqtSignal
+from PyQt6.QtWidgets import QLineEdit, QListView, QVBoxLayout, QWidget
+
+# History window: a QListView over a lazy model. Rows are fetched from the
+# store only when the view paints them, newest first, and the trigram index
+# is built a few milliseconds at a time while the event loop is idle.
+
+SEARCH_DELAY_MS = 150
+# Time spent indexing per turn of the event loop
+INDEX_BUDGET_MS = 4
+
+
+class HistoryModel(QAbstractListModel):
+    def __init__(self, store, parent=None):
+        super().__init__(parent)
+        self.store = store
+        self.matches = None
+
+    def rowCount(self, parent=QModelIndex()):
+        if parent.isValid():
+            return 0
+        return len(self.store) if self.matches is None else len(self.matches)
+
+    def record_id(self, row):
+        if self.matches is None:
+            return len(self.store) - 1 - row
+        return self.matches[len(self.matches) - 1 - row]
+
+    def data(self, index, role=Qt.ItemDataRole.DisplayRole):
+        if not index.isValid():
+            return None
+        if role == Qt.ItemDataRole.DisplayRole:
+            expression, result, _ = self.store.record(self.record_id(index.row()))
+            return f"{expression} = {result}"
+        if role == Qt.ItemDataRole.TextAlignmentRole:
+            return Qt.AlignmentFlag.AlignRight | Qt.AlignmentFlag.AlignVCenter
+        return None
+
+    def set_query(self, query):
+        self.beginResetModel()
+        self.matches = self.store.search(query) if query else None
+        self.endResetModel()
+
+    def record_added(self):
+        # New records are the newest, i.e. row 0; a filtered view is left alone
+        if self.matches is None:
+            self.beginInsertRows(QModelIndex(), 0, 0)
+            self.endInsertRows()
+
+
+class HistoryPanel(QWidget):
+    expression_chosen = pyqtSignal(str)
+
+    def __init__(self, store, parent=None):
+        super().__init__(parent, Qt.WindowType.Tool)
+        self.setWindowTitle("98kalculator history")
+        self.setObjectName("HistoryPanel")
+        self.resize(420, 560)
+        self.store = store
+
+        layout = QVBoxLayout(self)
+        layout.setContentsMargins(12, 12, 12, 12)
+        layout.setSpacing(8)
+
+        self.search = QLineEdit()
+        self.search.setPlaceholderText("Search history")
+        self.search.setClearButtonEnabled(True)
+        layout.addWidget(self.search)
+
+        self.model = HistoryModel(store, self)
+        self.view = QListView()
+        # Uniform rows let the view lay out any number of rows without
+        # asking the model for each one
+        self.view.setUniformItemSizes(True)
+        self.view.setLayoutMode(QListView.LayoutMode.Batched)
+        self.view.setModel(self.model)
+        self.view.activated.connect(self.on_activated)
+        layout.addWidget(self.view)
+
+        self.search_timer = QTimer(self)
+        self.search_timer.setSingleShot(True)
+        self.search_timer.setInterval(SEARCH_DELAY_MS)
+        self.search_timer.timeout.connect(lambda: self.model.set_query(self.search.text()))
+        self.search.textChanged.connect(self.search_timer.start)
+
+        self.index_timer = QTimer(self)
+        self.index_timer.timeout.connect(self.index_slice)
+
+        self.setStyleSheet("""
+        QWidget#HistoryPanel { background-color: #050505; }
+        QLineEdit {
+            background-color: #121212; color: #e0e0e0;
+            border: 1px solid #3d0075; border-radius: 8px; padding: 6px;
+            font-family: 'Segoe UI', Roboto, sans-serif; font-size: 15px;
+        }
+        QListView {
+            background-color: #000000; color: #e0e0e0; border: none;
+            font-family: 'Segoe UI', Roboto, sans-serif; font-size: 16px;
+        }
+        QListView::item { padding: 4px; }
+        QListView::item:selected { background-color: #3d0075; color: #ffffff; }
+        """)
+
+    def showEvent(self, event):
+        super().showEvent(event)
+        self.index_timer.start(0)
+
+    def index_slice(self):
+        if self.store.index_step(INDEX_BUDGET_MS / 1000):
+            self.index_timer.stop()
+
+    def record_added(self):
+        self.model.record_added()
+
+    def on_activated(self, index):
+        expression, _, _ = self.store.record(self.model.record_id(index.row()))
+        if expression:
+            self.expression_chosen.emit(expression)
@@ -0,0 +1,185 @@
+import re
+from collections import deque
+
+# The calculator's input line as a gap buffer of tokens: the tokens left of the
+# cursor and the tokens right of it are two deques, so typing, backspace,
+# cursor moves and wrapping the whole input in "1/(...)" only touch the ends of
+# a deque. The length of the number at the cursor and the parenthesis depth on
+# each side are kept up to date as tokens come and go, never re-scanned. The
+# text is joined from the tokens only when it is read, once per change.
+
+MAX_DIGITS = 15
+CURSOR = "|"
+
+_TOKEN_RE = re.compile(r"[\d.]+(?:[eE][+-]?\d+)?|[^\W\d_]+\(?|\S")
+_DIGITS = frozenset("0123456789.")
+
+
+def _is_number(token):
+    return token[0] in _DIGITS
+
+
+def _depth(token):
+    if token[-1] == "(":
+        return 1
+    if token == ")":
+        return -1
+    return 0
+
+
+class InputBuffer:
+    def __init__(self, text="0"):
+        self.set(text)
+
+    def set(self, text):
+        self.before = deque(_TOKEN_RE.findall(text))
+        self.after = deque()
+        self.depth_before = sum(map(_depth, self.before))
+        self.depth_after = 0
+        self._changed()
+
+    def _changed(self):
+        self._text = self._display = None
+
+    @property
+    def text(self):
+        if self._text is None:
+            self._text = "".join(self.before) + "".join(self.after)
+        return self._text
+
+    def display_text(self):
+        if not self.after:
+            return self.text
+        if self._display is None:
+            self._display = "".join(self.before) + CURSOR + "".join(self.after)
+        return self._display
+
+    @property
+    def depth(self):
+        # Parentheses left open in the whole input
+        return self.depth_before + self.depth_after
+
+    def is_zero(self):
+        return len(self.before) == 1 and not self.after and self.before[0] == "0"
+
+    def number_length(self):
+        # Length of the number the cursor is in or right after
+        length = 0
+        if self.before and _is_number(self.before[-1]):
+            length += len(self.before[-1])
+        if self.after and _is_number(self.after[0]):
+            length += len(self.after[0])
+        return length
+
+    def _push(self, token):
+        before = self.before
+        if before and _is_number(token) and _is_number(before[-1]):
+            before[-1] += token
+        else:
+            before.append(token)
+            self.depth_before += _depth(token)
+        self._changed()
+
+    def _pop(self):
+        # Removes the last character left of the cursor; names such as
+        # "sin(" go as a whole
+        token = self.before.pop()
+        if _is_number(token) and len(token) > 1:
+            self.before.append(token[:-1])
+        else:
+            self.depth_before -= _depth(token)
+        self._changed()
+        return token[-1] if _is_number(token) else token
+
+    def insert_digit(self, digit, max_digits=MAX_DIGITS):
+        if self.number_length() >= max_digits:
+            return False
+        if self.is_zero() and digit != ".":
+            self.before[0] = digit
+            self._changed()
+        else:
+            self._push(digit)
+        return True
+
+    def insert(self, text, replace_zero=False):
+        tokens = _TOKEN_RE.findall(text)
+        if tokens == [")"] and self.depth_before <= 0:
+            # Nothing left of the cursor to close
+            return False
+        if replace_zero and self.is_zero():
+            self.before.clear()
+            self._changed()
+        for token in tokens:
+            self._push(token)
+        return True
+
+    def wrap(self, prefix, suffix):
+        # Puts the whole input inside prefix ... suffix. A cursor at the end
+        # stays at the end, after the suffix; anywhere else it is unmoved.
+        tokens = _TOKEN_RE.findall(prefix)
+        self.before.extendleft(reversed(tokens))
+        self.depth_before += sum(map(_depth, tokens))
+        self._changed()
+        tokens = _TOKEN_RE.findall(suffix)
+        if self.after:
+            self.after.extend(tokens)
+            self.depth_after += sum(map(_depth, tokens))
+        else:
+            for token in tokens:
+                self._push(token)
+
+    def backspace(self):
+        if self.before:
+            self._pop()
+        if not self.before and not self.after:
+            self.before.append("0")
+            self._changed()
+
+    def move_left(self):
+        if not self.before:
+            return False
+        token = self._pop()
+        after = self.after
+        if after and _is_number(token) and _is_number(after[0]):
+            after[0] = token + after[0]
+        else:
+            after.appendleft(token)
+            self.depth_after += _depth(token)
+        return True
+
+    def move_right(self):
+        after = self.after
+        if not after:
+            return False
+        token = after.popleft()
+        self.depth_after -= _depth(token)
+        if _is_number(token) and len(token) > 1:
+            after.appendleft(token[1:])
+            token = token[0]
+        self._push(token)
+        return True
+
+    def home(self):
+        self.after = self._joined()
+        self.before = deque()
+        self.depth_after += self.depth_before
+        self.depth_before = 0
+        self._changed()
+
+    def end(self):
+        self.before = self._joined()
+        self.after = deque()
+        self.depth_before += self.depth_after
+        self.depth_after = 0
+        self._changed()
+
+    def _joined(self):
+        # All tokens in one deque, copying the shorter side onto the longer
+        before, after = self.before, self.after
+        if before and after and _is_number(before[-1]) and _is_number(after[0]):
+            before[-1] += after.popleft()
+        if len(before) < len(after):
+            after.extendleft(reversed(before))
+            return after
+        before.extend(after)
+        return before
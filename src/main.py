@@ -1,32 +1,163 @@
 import sys
-import math
+
+# Launcher scripts call "-e" many times a minute, so it is handed over before
+# anything else is imported
+if __name__ == "__main__" and any(arg.startswith(("-e", "--eval")) for arg in sys.argv[1:]):
+    import oneshot
+    sys.exit(oneshot.main(sys.argv[1:]))
+
+import startup
+PROFILE = startup.StartupProfile()
+
 import os
-import re
-from PyQt6.QtCore import (
-    Qt, QSize, QPropertyAnimation, QRect, QEasingCurve, 
-    QPoint, QParallelAnimationGroup, QSequentialAnimationGroup
-)
-from PyQt6.QtGui import QFont, QIcon, QKeySequence, QShortcut, QColor, QPalette, QFontMetrics
+import resident
+
+# Entry points that never show a window are handled before the Qt imports
+if __name__ == "__main__":
+    if getattr(sys, "frozen", False):
+        import multiprocessing
+        multiprocessing.freeze_support()
+
+    status = resident.forward(sys.argv[1:])
+    if status is not None:
+        sys.exit(status)
+
+    if "--worker" in sys.argv[1:]:
+        import worker
+        sys.exit(worker.main(sys.argv[1:]))
+
+    if "--serve" in sys.argv[1:]:
+        import service
+        args = sys.argv[1:]
+        args.remove("--serve")
+        sys.exit(service.main(args))
+
+    if "--batch" in sys.argv[1:]:
+        import batch
+        args = sys.argv[1:]
+        args.remove("--batch")
+        sys.exit(batch.main(args))
+PROFILE.mark("launch_checks")
+
+import argparse
+import engine
+import history
+import precise
+import preview
+import worker
+from animation import AnimationClock
+from background import BackgroundEvaluator
+from fontfit import FontFitter
+from glow import GlowLabel
+from inputbuffer import InputBuffer
+from PyQt6.QtCore import QRectF, Qt, QTimer, pyqtSignal
+from PyQt6.QtGui import QKeySequence, QShortcut, QColor, QPainter, QPainterPath, QPen
 from PyQt6.QtWidgets import (
     QApplication, QMainWindow, QWidget, QVBoxLayout, QGridLayout, 
-    QPushButton, QLabel, QSizePolicy, QGraphicsDropShadowEffect
+    QPushButton, QLabel, QSizePolicy
 )
-
-os.environ['QT_QPA_PLATFORM'] = 'wayland'
+PROFILE.mark("imports")
+
+# Wayland unless the environment asks for another platform (e.g. offscreen)
+os.environ.setdefault('QT_QPA_PLATFORM', 'wayland')
+
+# Typing faster than this only re-evaluates the preview once the burst ends
+PREVIEW_DELAY_MS = 40
+# Evaluations taking longer than this show a "computing…" hint
+COMPUTING_DELAY_MS = 150
+# Shown next to results that floats could not be trusted with
+PRECISION_LABELS = {precise.EXACT: "exact", precise.DECIMAL: "high precision"}
+# Animation lengths: hover fading in and out, the flash of a pressed button
+# (clicked or typed) and of the glow behind a new result
+HOVER_MS = 120
+PRESS_MS = 220
+RESULT_MS = 400
+
+BUTTON_RADIUS = 16
+# Hover per button class: what is added to the button's colors (the
+# difference to its hover background) and the border drawn around it
+HOVER_LIGHT = {
+    "btn-number": (QColor(16, 16, 16), QColor(61, 0, 117), 1),
+    "btn-operator": (QColor(20, 12, 14), QColor(124, 77, 255), 1),
+    "btn-science": (QColor(26, 26, 28), QColor(61, 0, 117), 1),
+    "btn-action": (QColor(25, 10, 10), QColor(61, 0, 117), 1),
+    "btn-equals": (QColor(26, 77, 21), QColor(255, 255, 255), 2),
+}
+PRESS_LIGHT = QColor(61, 0, 117)
 
 class AnimatedButton(QPushButton):
-    def __init__(self, text, btn_type="btn-number", parent=None):
+    # Hover and press are drawn over the stylesheet's painting, with levels
+    # that the window's AnimationClock moves between 0 and 1
+    def __init__(self, text, btn_type="btn-number", clock=None, parent=None):
         super().__init__(text, parent)
         self.setProperty("class", btn_type)
         self.setText(text)
         self.setSizePolicy(QSizePolicy.Policy.Expanding, QSizePolicy.Policy.Expanding)
+        self.clock = clock
+        self.light, self.border_color, self.border_width = HOVER_LIGHT[btn_type]
+        self.hover = 0.0
+        self.press = 0.0
+
+    def enterEvent(self, event):
+        super().enterEvent(event)
+        self.clock.animate((self, "hover"), self.hover, 1.0, HOVER_MS, self.set_hover)
+
+    def leaveEvent(self, event):
+        super().leaveEvent(event)
+        self.clock.animate((self, "hover"), self.hover, 0.0, HOVER_MS, self.set_hover)
+
+    def flash(self):
+        self.clock.animate((self, "press"), 1.0, 0.0, PRESS_MS, self.set_press)
+
+    def set_hover(self, level):
+        self.hover = level
+        self.update()
+
+    def set_press(self, level):
+        self.press = level
+        self.update()
+
+    def paintEvent(self, event):
+        super().paintEvent(event)
+        if not (self.hover or self.press):
+            return
+        painter = QPainter(self)
+        painter.setRenderHint(QPainter.RenderHint.Antialiasing)
+        half = self.border_width / 2
+        path = QPainterPath()
+        path.addRoundedRect(QRectF(self.rect()).adjusted(half, half, -half, -half), BUTTON_RADIUS, BUTTON_RADIUS)
+        # Added rather than painted over, so the label stays readable
+        painter.setCompositionMode(QPainter.CompositionMode.CompositionMode_Plus)
+        if self.hover:
+            painter.setOpacity(self.hover)
+            painter.fillPath(path, self.light)
+        if self.press:
+            painter.setOpacity(self.press)
+            painter.fillPath(path, PRESS_LIGHT)
+        if self.hover:
+            painter.setCompositionMode(QPainter.CompositionMode.CompositionMode_SourceOver)
+            painter.setOpacity(self.hover)
+            painter.strokePath(path, QPen(self.border_color, self.border_width))
+        painter.end()
 
 class ModernCalculator(QMainWindow):
-    def __init__(self):
+    # Emitted once the first frame is on screen and the deferred setup is done
+    startup_finished = pyqtSignal()
+
+    def __init__(self, cpu_limit=worker.CPU_LIMIT, memory_limit=worker.MEMORY_LIMIT_MB):
         super().__init__()
         self.setWindowTitle("98kalculator")
         self.setMinimumSize(480, 680)
         self.resize(500, 750)
+        self.font_fitter = None
+        self.result_font_size = None
+        self.first_paint_seen = False
+        self.history = None
+        self.history_panel = None
+        self.worksheet_panel = None
+        self.tape_panel = None
+        self.plot_view = None
+        self.clock = AnimationClock(self)
         
         self.central_widget = QWidget()
         self.setCentralWidget(self.central_widget)
@@ -34,13 +165,31 @@ class ModernCalculator(QMainWindow):
         self.main_layout.setContentsMargins(0, 0, 0, 0)
         self.main_layout.setSpacing(0)
 
+        # Only what the first frame shows is built here; shortcuts and the glow
+        # effect are added by finish_startup once the window has painted.
         self.setup_display()
         self.setup_buttons()
+        self.evaluator = BackgroundEvaluator(cpu_limit, memory_limit, self)
+        self.evaluator.finished.connect(self.on_result)
+        self.computing_timer = QTimer(self)
+        self.computing_timer.setSingleShot(True)
+        self.computing_timer.setInterval(COMPUTING_DELAY_MS)
+        self.computing_timer.timeout.connect(lambda: self.lbl_preview.setText("computing…"))
+        PROFILE.mark("widgets")
         self.setStyleSheet(self.get_stylesheet())
+        PROFILE.mark("stylesheet")
         
-        self.current_input = "0"
+        self.buffer = InputBuffer()
         self.reset_next = False
 
+    @property
+    def current_input(self):
+        return self.buffer.text
+
+    @current_input.setter
+    def current_input(self, text):
+        self.buffer.set(text)
+
     def setup_display(self):
         self.display_container = QWidget()
         self.display_container.setObjectName("DisplayContainer")
@@ -48,24 +197,30 @@ class ModernCalculator(QMainWindow):
         self.display_layout.setContentsMargins(25, 40, 25, 15)
         self.display_layout.setSpacing(5)
 
-        shadow = QGraphicsDropShadowEffect(self)
-        shadow.setBlurRadius(20)
-        shadow.setColor(QColor(187, 134, 252))
-        shadow.setOffset(0, 0)
-        
         self.lbl_history = QLabel("")
         self.lbl_history.setAlignment(Qt.AlignmentFlag.AlignRight | Qt.AlignmentFlag.AlignBottom)
         self.lbl_history.setObjectName("HistoryLabel")
         self.display_layout.addWidget(self.lbl_history)
 
-        self.lbl_result = QLabel("0")
+        self.lbl_result = GlowLabel("0")
         self.lbl_result.setAlignment(Qt.AlignmentFlag.AlignRight | Qt.AlignmentFlag.AlignBottom)
         self.lbl_result.setObjectName("ResultLabel")
         # Prevent the label from pushing the window wider; let it shrink/clip so our resize logic works
         self.lbl_result.setSizePolicy(QSizePolicy.Policy.Ignored, QSizePolicy.Policy.Preferred)
-        self.lbl_result.setGraphicsEffect(shadow)
         self.display_layout.addWidget(self.lbl_result)
 
+        self.lbl_preview = QLabel("")
+        self.lbl_preview.setAlignment(Qt.AlignmentFlag.AlignRight | Qt.AlignmentFlag.AlignTop)
+        self.lbl_preview.setObjectName("PreviewLabel")
+        self.lbl_preview.setSizePolicy(QSizePolicy.Policy.Ignored, QSizePolicy.Policy.Preferred)
+        self.display_layout.addWidget(self.lbl_preview)
+
+        self.preview = preview.LivePreview()
+        self.preview_timer = QTimer(self)
+        self.preview_timer.setSingleShot(True)
+        self.preview_timer.setInterval(PREVIEW_DELAY_MS)
+        self.preview_timer.timeout.connect(self.update_preview)
+
         self.main_layout.addWidget(self.display_container, stretch=3)
 
     def setup_buttons(self):
@@ -83,13 +238,17 @@ class ModernCalculator(QMainWindow):
             ("x!", 5, 0, "btn-science"), ("e", 5, 1, "btn-science"), ("0", 5, 2, "btn-number"), (".", 5, 3, "btn-number"), ("=", 5, 4, "btn-equals"),
         ]
 
+        self.buttons = {}
         for text, r, c, cls in buttons:
-            btn = AnimatedButton(text, cls)
+            btn = AnimatedButton(text, cls, self.clock)
+            self.buttons[text] = btn
             self.buttons_layout.addWidget(btn, r, c)
             btn.clicked.connect(lambda checked, t=text: self.on_button_click(t))
 
         self.main_layout.addWidget(self.buttons_container, stretch=6)
-        self.setup_shortcuts()
+
+    def setup_glow(self):
+        self.lbl_result.set_glow(QColor(187, 134, 252), 20)
 
     def setup_shortcuts(self):
         key_map = {
@@ -103,7 +262,8 @@ class ModernCalculator(QMainWindow):
             Qt.Key.Key_Enter: "=", Qt.Key.Key_Escape: "C",
             Qt.Key.Key_Backspace: "DEL",
             Qt.Key.Key_Exclam: "x!", Qt.Key.Key_Percent: "mod",
-            Qt.Key.Key_AsciiCircum: "^"
+            Qt.Key.Key_AsciiCircum: "^", Qt.Key.Key_X: "x",
+            Qt.Key.Key_BracketLeft: "[", Qt.Key.Key_BracketRight: "]", Qt.Key.Key_Comma: ","
         }
         
         for key, text in key_map.items():
@@ -112,10 +272,25 @@ class ModernCalculator(QMainWindow):
             else:
                 QShortcut(QKeySequence(key), self).activated.connect(lambda t=text: self.on_button_click(t))
 
+        for key, move in ((Qt.Key.Key_Left, self.buffer.move_left), (Qt.Key.Key_Right, self.buffer.move_right),
+                          (Qt.Key.Key_Home, self.buffer.home), (Qt.Key.Key_End, self.buffer.end)):
+            QShortcut(QKeySequence(key), self).activated.connect(lambda m=move: self.move_cursor(m))
+
+        QShortcut(QKeySequence("Ctrl+H"), self).activated.connect(self.toggle_history)
+        QShortcut(QKeySequence("Ctrl+P"), self).activated.connect(self.show_plot)
+        QShortcut(QKeySequence("Ctrl+W"), self).activated.connect(self.toggle_worksheet)
+        QShortcut(QKeySequence(QKeySequence.StandardKey.Paste), self).activated.connect(self.paste)
+
     def on_button_click(self, text):
+        # Any key, Esc included, abandons a running evaluation
+        self.cancel_calculation()
+        self.clock.input()
+        button = self.buttons.get(text)
+        if button is not None:
+            button.flash()
         if text in "0123456789.":
             self.handle_number(text)
-        elif text in "+-×÷^mod":
+        elif text in "+-×÷^mod,":
             self.handle_operator(text)
         elif text == "=":
             self.calculate()
@@ -129,131 +304,199 @@ class ModernCalculator(QMainWindow):
             self.handle_inv()
         elif text == "x!":
             self.handle_fact()
-        elif text == "e":
-            self.handle_const("e")
-        elif text in ["(", ")"]:
+        elif text in ["e", "x"]:
+            self.handle_const(text)
+        elif text in ["(", ")", "[", "]"]:
             self.add_explicit(text)
 
     def handle_number(self, num):
         if self.reset_next:
-            self.current_input = "0"
+            self.buffer.set("0")
             self.reset_next = False
-        
-
-        match = re.search(r'([\d\.]+)$', self.current_input)
-        if match:
-            current_num_segment = match.group(1)
-            if len(current_num_segment) >= 15 and not self.reset_next:
-                return
-
-        if self.current_input == "0" and num != ".":
-            self.current_input = num
-        else:
-            self.current_input += num
-        self.update_display()
+        if self.buffer.insert_digit(num):
+            self.update_display()
 
     def handle_operator(self, op):
         self.reset_next = False
         if op == "mod": op = "%"
-        self.current_input += op
+        self.buffer.insert(op)
         self.update_display()
 
     def handle_func(self, func):
-        if self.reset_next: self.current_input = ""; self.reset_next = False
-        if self.current_input == "0": self.current_input = func + "("
-        else: self.current_input += func + "("
+        if self.reset_next: self.buffer.set(""); self.reset_next = False
+        self.buffer.insert(func + "(", replace_zero=True)
         self.update_display()
 
     def handle_pow2(self):
-        self.current_input += "^2"
+        self.buffer.insert("^2")
         self.update_display()
 
     def handle_inv(self):
         if self.reset_next: self.reset_next = False
-        self.current_input = "1/(" + self.current_input + ")"
+        self.buffer.wrap("1/(", ")")
         self.update_display()
         
     def handle_fact(self):
         if self.reset_next: self.reset_next = False
-        self.current_input += "!"
+        self.buffer.insert("!")
         self.update_display()
         
     def handle_const(self, c):
-        if self.reset_next: self.current_input = c; self.reset_next = False
-        elif self.current_input == "0": self.current_input = c
-        else: self.current_input += c
+        if self.reset_next: self.buffer.set("0"); self.reset_next = False
+        self.buffer.insert(c, replace_zero=True)
         self.update_display()
         
     def add_explicit(self, t):
-        if self.reset_next: self.current_input = ""; self.reset_next = False
-        if self.current_input == "0": self.current_input = t
-        else: self.current_input += t
+        if self.reset_next: self.buffer.set(""); self.reset_next = False
+        if self.buffer.insert(t, replace_zero=True):
+            self.update_display()
+
+    def move_cursor(self, move):
+        # Editing a result in place keeps it instead of starting over
+        self.reset_next = False
+        move()
         self.update_display()
 
     def calculate(self):
-        expression = self.current_input
-        
-        if "0/0" in expression or "0÷0" in expression:
-             self.lbl_result.setText("98k is coming for you")
-             self.current_input = "0"
-             self.reset_next = True
-             return
-             
-        expression = expression.replace("×", "*").replace("÷", "/")
-        expression = expression.replace("^", "**")
-        expression = expression.replace("mod", "%")
-        
-        expression = expression.replace("sin", "math.sin")
-        expression = expression.replace("cos", "math.cos")
-        expression = expression.replace("tan", "math.tan")
-        expression = expression.replace("ln", "math.log")
-        expression = expression.replace("log", "math.log10")
-        
-        expression = re.sub(r'(\d+)!', r'math.factorial(\1)', expression)
-        
+        # An equation shows its roots, and an expression in x has no single
+        # value, so "=" plots it instead
+        roots = self.equation_roots()
+        if roots is not None:
+            self.lbl_preview.setText(roots)
+            return
+        if "x" in self.current_input and self.show_plot():
+            return
+        self.computing_timer.start()
+        self.evaluator.submit(self.current_input)
+
+    def equation_roots(self):
+        # The roots of an equation in the input, or None if it is not one
+        if "=" not in self.current_input and "solve" not in self.current_input:
+            return None
         try:
-            res = eval(expression, {"__builtins__": None, "math": math})
-            
-            if isinstance(res, float) and math.isnan(res):
-                 self.lbl_result.setText("98k is coming for you")
-                 self.reset_next = True
-                 return
-
-            if isinstance(res, float):
-                if res.is_integer():
-                   result_str = str(int(res))
-                else:
-                   result_str = f"{res:.8f}".rstrip('0').rstrip('.')
-            else:
-                result_str = str(res)
+            import solver
+        except ImportError:
+            return "equations need NumPy"
+        return solver.solve(self.current_input)[1]
 
-            if len(result_str) > 12:
-                try:
-                    val = float(res)
-                    result_str = f"{val:.5e}"
-                except:
-                    pass 
-
-            self.current_input = result_str
-            self.lbl_history.setText(expression.replace("math.", "") + " =")
-            self.update_display()
-            self.reset_next = True
-            
-        except ZeroDivisionError:
-            self.lbl_result.setText("98k is coming for you")
-            self.reset_next = True
+    def show_plot(self):
+        try:
+            import plot
+            from plot_view import PlotView
+        except ImportError:
+            self.lbl_preview.setText("plots need NumPy")
+            return False
+        if not plot.has_variable(self.current_input):
+            return False
+        try:
+            view = PlotView(self.current_input, self)
         except Exception:
-            self.lbl_result.setText("Error")
+            self.lbl_preview.setText("can't plot this")
+            return True
+        if self.plot_view is not None:
+            self.plot_view.close()
+        self.plot_view = view
+        view.show()
+        return True
+
+    def cancel_calculation(self):
+        if self.evaluator.busy():
+            self.evaluator.cancel()
+            self.computing_timer.stop()
+            self.lbl_preview.setText("")
+
+    def on_result(self, job, expression, status, result_str, path=precise.FLOAT):
+        self.computing_timer.stop()
+        if status != engine.OK:
+            self.lbl_result.setText(result_str)
+            self.lbl_preview.setText("")
+            if "0/0" in expression or "0÷0" in expression:
+                self.current_input = "0"
             self.reset_next = True
+            return
+
+        self.current_input = result_str
+        label = PRECISION_LABELS.get(path)
+        self.lbl_history.setText(f"{expression} =  · {label}" if label else expression + " =")
+        self.update_display()
+        self.clock.animate((self.lbl_result, "flash"), 1.0, 0.0, RESULT_MS, self.lbl_result.set_flash)
+        self.reset_next = True
+        self.record_history(expression, result_str)
+
+    def open_history(self):
+        try:
+            self.history = history.HistoryStore()
+        except OSError:
+            self.history = None
+
+    def record_history(self, expression, result):
+        if self.history is None:
+            return
+        try:
+            self.history.append(expression, result)
+        except OSError:
+            return
+        if self.history_panel is not None:
+            self.history_panel.record_added()
+
+    def toggle_history(self):
+        if self.history is None:
+            return
+        if self.history_panel is None:
+            from history_panel import HistoryPanel
+            self.history_panel = HistoryPanel(self.history, self)
+            self.history_panel.expression_chosen.connect(self.load_expression)
+        if self.history_panel.isVisible():
+            self.history_panel.hide()
+        else:
+            self.history_panel.show()
+            self.history_panel.search.setFocus()
+
+    def toggle_worksheet(self):
+        if self.worksheet_panel is None:
+            from worksheet_panel import WorksheetPanel
+            self.worksheet_panel = WorksheetPanel(self)
+        if self.worksheet_panel.isVisible():
+            self.worksheet_panel.hide()
+        else:
+            self.worksheet_panel.show()
+            self.worksheet_panel.editor.setFocus()
+
+    def paste(self):
+        # One line goes into the input; a block of lines opens the tape
+        text = QApplication.clipboard().text().strip()
+        if not text:
+            return
+        if "\n" not in text and "\r" not in text:
+            self.cancel_calculation()
+            if self.reset_next:
+                self.buffer.set("")
+                self.reset_next = False
+            self.buffer.insert(text, replace_zero=True)
+            self.update_display()
+            return
+        if self.tape_panel is None:
+            from tape_panel import TapePanel
+            self.tape_panel = TapePanel(self)
+            self.tape_panel.expression_chosen.connect(self.load_expression)
+        self.tape_panel.evaluate(text)
+        self.tape_panel.show()
+        self.tape_panel.raise_()
+
+    def load_expression(self, expression):
+        self.cancel_calculation()
+        self.current_input = expression
+        self.reset_next = False
+        self.update_display()
+        self.activateWindow()
 
     def backspace(self):
+        self.cancel_calculation()
         if self.reset_next:
-            self.current_input = "0"
+            self.buffer.set("0")
             self.reset_next = False
-        elif len(self.current_input) > 1:
-            self.current_input = self.current_input[:-1]
         else:
-            self.current_input = "0"
+            self.buffer.backspace()
         self.update_display()
 
     def clear_all(self):
@@ -263,8 +506,21 @@ class ModernCalculator(QMainWindow):
         self.update_display()
 
     def update_display(self):
-        self.lbl_result.setText(self.current_input)
+        self.lbl_result.setText(self.buffer.display_text())
         self.adjust_font_size()
+        # Restarting the timer drops the pending evaluation of the previous keystroke
+        self.preview_timer.start()
+
+    def update_preview(self):
+        roots = None if self.reset_next else self.equation_roots()
+        if roots is not None:
+            self.lbl_preview.setText(roots)
+            return
+        value = None if self.reset_next else self.preview.evaluate(self.current_input)
+        if value is None or value == self.current_input:
+            self.lbl_preview.setText("")
+        else:
+            self.lbl_preview.setText("= " + value)
 
     def adjust_font_size(self):
         text = self.lbl_result.text()
@@ -276,22 +532,34 @@ class ModernCalculator(QMainWindow):
         target_width = self.width() - 60
         if target_width <= 0:
              return
-             
-        base_size = 64
-        min_size = 20
-        
+
+        if self.font_fitter is None:
+            self.font_fitter = FontFitter(self.lbl_result.font())
+        size = self.font_fitter.fit(text, target_width)
+        if size == self.result_font_size:
+            return
+
+        self.result_font_size = size
         font = self.lbl_result.font()
-        font.setPixelSize(base_size)
-        
-        # Iteratively reduce font size until it fits
-        for size in range(base_size, min_size - 1, -2): # Step -2 for smoother transition
-            font.setPixelSize(size)
-            fm = QFontMetrics(font)
-            if fm.horizontalAdvance(text) <= target_width:
-                break
-        
+        font.setPixelSize(size)
         self.lbl_result.setFont(font)
     
+    def paintEvent(self, event):
+        super().paintEvent(event)
+        if not self.first_paint_seen:
+            self.first_paint_seen = True
+            # Runs after this paint cycle has been flushed to the screen
+            QTimer.singleShot(0, self.finish_startup)
+
+    def finish_startup(self):
+        PROFILE.mark("first_frame")
+        self.setup_shortcuts()
+        self.setup_glow()
+        self.evaluator.warm()
+        self.open_history()
+        PROFILE.mark("deferred_setup")
+        self.startup_finished.emit()
+
     def resizeEvent(self, event):
         self.adjust_font_size()
         super().resizeEvent(event)
@@ -314,6 +582,12 @@ class ModernCalculator(QMainWindow):
             opacity: 0.7;
         }
         
+        QLabel#PreviewLabel {
+            color: #8a8a9a;
+            font-family: 'Segoe UI', Roboto, sans-serif;
+            font-size: 22px;
+        }
+        
         QLabel#ResultLabel {
             color: #ffffff;
             font-family: 'Segoe UI', Roboto, sans-serif;
@@ -331,11 +605,6 @@ class ModernCalculator(QMainWindow):
             color: #e0e0e0;
         }
         
-        QPushButton:hover {
-            background-color: #2a2a2a;
-            border: 1px solid #3d0075;
-        }
-        
         QPushButton:pressed {
             background-color: #3d0075;
             color: #ffffff;
@@ -346,10 +615,6 @@ class ModernCalculator(QMainWindow):
             color: #ffffff;
             font-size: 24px;
         }
-        QPushButton[class="btn-operator"]:hover {
-            background-color: #4527a0;
-            border: 1px solid #7c4dff;
-        }
 
         QPushButton[class="btn-science"] {
             background-color: #121212;
@@ -357,18 +622,11 @@ class ModernCalculator(QMainWindow):
             font-size: 18px;
             font-style: italic;
         }
-        QPushButton[class="btn-science"]:hover {
-            background-color: #2c2c2e;
-            color: #d0bcff;
-        }
 
         QPushButton[class="btn-action"] {
             background-color: #2b1111;
             color: #ff5252;
         }
-        QPushButton[class="btn-action"]:hover {
-            background-color: #441b1b;
-        }
 
         QPushButton[class="btn-equals"] {
             background-color: #6200ea;
@@ -376,14 +634,25 @@ class ModernCalculator(QMainWindow):
             font-size: 32px;
             border-radius: 16px;
         }
-        QPushButton[class="btn-equals"]:hover {
-            background-color: #7c4dff;
-            border: 2px solid #ffffff;
-        }
         """
 
 if __name__ == "__main__":
+    parser = argparse.ArgumentParser(add_help=False)
+    parser.add_argument("--cpu-limit", type=int, default=worker.CPU_LIMIT)
+    parser.add_argument("--memory-limit", type=int, default=worker.MEMORY_LIMIT_MB)
+    options, _ = parser.parse_known_args()
+
     app = QApplication(sys.argv)
-    window = ModernCalculator()
-    window.show()
+    PROFILE.mark("qapplication")
+    window = ModernCalculator(options.cpu_limit, options.memory_limit)
+    app.aboutToQuit.connect(window.evaluator.stop)
+    if PROFILE.enabled:
+        window.startup_finished.connect(PROFILE.print_report)
+        window.startup_finished.connect(app.quit)
+    if "--resident" in sys.argv[1:]:
+        resident.start_server(window, app)
+        if "--hidden" not in sys.argv[1:]:
+            window.show()
+    else:
+        window.show()
     sys.exit(app.exec())
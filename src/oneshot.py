@@ -0,0 +1,83 @@
+import os
+import signal
+import sys
+
+import engine
+import worker
+
+# "-e EXPRESSION": evaluates one expression the way "=" does in the window,
+# prints the result and exits. main.py hands over to this before anything Qt
+# is imported, so a launcher script pays for the interpreter and the engine
+# only. The exit status tells the outcomes apart.
+
+EXIT_OK = 0
+EXIT_ERROR = 1
+# 2 is what argparse exits with for a bad command line
+EXIT_ZERO_DIVISION = 3
+EXIT_LIMIT = 4
+
+EXIT_CODES = {
+    engine.OK: EXIT_OK,
+    engine.ERROR: EXIT_ERROR,
+    engine.ZERO_DIVISION: EXIT_ZERO_DIVISION,
+    worker.LIMIT: EXIT_LIMIT,
+}
+
+
+def _over_cpu_limit(signum, frame):
+    print(worker.LIMIT_MESSAGE, file=sys.stderr)
+    sys.stderr.flush()
+    os._exit(EXIT_LIMIT)
+
+
+def _expression(argv):
+    # The expression of a plain "-e EXPRESSION" command line, or None for
+    # anything else. argparse costs more to import than the evaluation
+    # itself, so it is only used for the other command lines.
+    if len(argv) == 2 and argv[0] in ("-e", "--eval"):
+        return argv[1]
+    if len(argv) == 1 and argv[0].startswith("--eval="):
+        return argv[0][len("--eval="):]
+    if len(argv) == 1 and argv[0].startswith("-e") and not argv[0].startswith("--"):
+        return argv[0][2:]
+    return None
+
+
+def _parse(argv):
+    import argparse
+
+    parser = argparse.ArgumentParser(
+        prog="98kalculator",
+        description="Evaluate one expression, print the result and exit.",
+        epilog=f"Exit status: {EXIT_OK} for a result, {EXIT_ERROR} for an invalid expression, "
+               f"{EXIT_ZERO_DIVISION} for a division by zero, {EXIT_LIMIT} when over a limit.",
+    )
+    parser.add_argument("-e", "--eval", required=True, metavar="EXPRESSION", help="expression to evaluate")
+    parser.add_argument("--cpu-limit", type=int, metavar="SECONDS", default=worker.CPU_LIMIT,
+                        help=f"CPU time limit (default: {worker.CPU_LIMIT})")
+    parser.add_argument("--memory-limit", type=int, metavar="MB", default=worker.MEMORY_LIMIT_MB,
+                        help=f"memory limit (default: {worker.MEMORY_LIMIT_MB})")
+    args = parser.parse_args(argv)
+    return args.eval, args.cpu_limit, args.memory_limit
+
+
+def main(argv):
+    expression = _expression(argv)
+    if expression is None:
+        expression, cpu_limit, memory_limit = _parse(argv)
+    else:
+        cpu_limit, memory_limit = worker.CPU_LIMIT, worker.MEMORY_LIMIT_MB
+
+    if memory_limit:
+        worker.set_memory_limit(memory_limit)
+    if cpu_limit:
+        signal.signal(signal.SIGXCPU, _over_cpu_limit)
+        worker.set_cpu_limit(cpu_limit)
+
+    status, text, _ = worker.evaluate(expression)
+    print(text, file=sys.stdout if status == engine.OK else sys.stderr)
+    return EXIT_CODES.get(status, EXIT_ERROR)
+
+
+if __name__ == "__main__":
+    sys.exit(main(sys.argv[1:]))
@@ -0,0 +1,202 @@
+import math
+
+import numpy as np
+
+import arrays
+import engine
+
+# Plotting of expressions in x. The expression is parsed with the engine's
+# grammar and compiled once into NumPy ufunc calls, so a whole array of x
+# values is evaluated per call. Samples are kept in sorted arrays per function
+# and reused across pans and zooms: a view only evaluates the x values of its
+# sampling lattice that are not already covered, then refines where straight
+# lines between samples would be visibly wrong (curvature, discontinuities,
+# edges of the domain).
+
+VARIABLE = "x"
+BASE_SAMPLES = 512
+MAX_ROUNDS = 10
+# Largest visible error of the polyline, as a fraction of the view height
+TOLERANCE = 0.002
+MAX_CACHED = 1 << 20
+
+
+def _compile(node, lookup=None):
+    kind = node[0]
+    if kind == "num":
+        value = float(node[1])
+        return lambda x: value
+    if kind == "name":
+        name = node[1]
+        if name == VARIABLE:
+            return lambda x: x
+        if name in engine.CONSTANTS:
+            value = engine.CONSTANTS[name]
+            return lambda x: value
+        if lookup is None:
+            raise engine.ExpressionError(f"unknown name {name!r}")
+        value = float(lookup(name))
+        return lambda x: value
+    if kind == "bin":
+        fn = arrays.BINARY[node[1]]
+        left = _compile(node[2], lookup)
+        right = _compile(node[3], lookup)
+        return lambda x: fn(left(x), right(x))
+    if kind == "call":
+        fn = arrays.FUNCTIONS[node[1]]
+    elif kind == "neg":
+        fn = np.negative
+    elif kind == "!":
+        fn = arrays.factorial
+    else:
+        raise engine.ExpressionError("lists can't be plotted")
+    arg = _compile(node[-1], lookup)
+    return lambda x: fn(arg(x))
+
+
+def has_variable(text):
+    try:
+        return VARIABLE in engine.tokenize(engine.normalize(text))
+    except engine.ExpressionError:
+        return False
+
+
+def compile_function(text):
+    return compile_node(engine.parse(engine.normalize(text)))
+
+
+def compile_node(node, lookup=None):
+    # f(xs) -> ys over float64 arrays; values outside the domain become NaN.
+    # Names other than x and the constants are looked up once, here.
+    fn = _compile(node, lookup)
+
+    def evaluate(xs):
+        with np.errstate(all="ignore"):
+            ys = np.array(np.broadcast_to(fn(xs), xs.shape), dtype=float)
+        ys[~np.isfinite(ys)] = np.nan
+        return ys
+    return evaluate
+
+
+class Sampler:
+    def __init__(self, fn):
+        self.fn = fn
+        self.xs = np.empty(0)
+        self.ys = np.empty(0)
+        # Counter for benchmarks
+        self.evaluated = 0
+
+    def add(self, xs):
+        ys = self.fn(xs)
+        self.evaluated += len(xs)
+        at = np.searchsorted(self.xs, xs)
+        self.xs = np.insert(self.xs, at, xs)
+        self.ys = np.insert(self.ys, at, ys)
+
+    def cover(self, x0, x1, samples=BASE_SAMPLES):
+        # Samples [x0, x1] on a lattice of power-of-two spacing, so that views
+        # panned or zoomed by powers of two land on the same x values and only
+        # the newly exposed part of a view is evaluated
+        step = 2.0 ** math.floor(math.log2((x1 - x0) / samples))
+        grid = np.arange(math.floor(x0 / step), math.ceil(x1 / step) + 1) * step
+        if len(self.xs):
+            at = np.searchsorted(self.xs, grid)
+            left = self.xs[np.maximum(at - 1, 0)]
+            right = self.xs[np.minimum(at, len(self.xs) - 1)]
+            gap = np.minimum(np.abs(grid - left), np.abs(right - grid))
+            grid = grid[gap > step / 2]
+        if len(grid):
+            self.add(grid)
+        self.trim(x0, x1)
+
+    def trim(self, x0, x1):
+        # Bounds memory: past MAX_CACHED samples, keep the current view and
+        # one view width on each side
+        if len(self.xs) <= MAX_CACHED:
+            return
+        width = x1 - x0
+        lo, hi = np.searchsorted(self.xs, (x0 - width, x1 + width))
+        self.xs = self.xs[lo:hi].copy()
+        self.ys = self.ys[lo:hi].copy()
+
+    def window(self, x0, x1):
+        # Samples in [x0, x1] plus one on each side, so lines reach the edges
+        lo, hi = np.searchsorted(self.xs, (x0, x1), side="right")
+        lo = max(lo - 1, 0)
+        hi = min(hi + 1, len(self.xs))
+        return self.xs[lo:hi], self.ys[lo:hi]
+
+    def flagged(self, x0, x1, y_span):
+        # Intervals whose straight line may be visibly wrong, as (left, right)
+        xs, ys = self.window(x0, x1)
+        if len(xs) < 3:
+            return xs[:-1], xs[1:]
+        tolerance = y_span * TOLERANCE
+        flags = np.zeros(len(xs) - 1, dtype=bool)
+        with np.errstate(all="ignore"):
+            # Curvature: the middle of three samples is off the line through
+            # the outer two
+            weight = (xs[1:-1] - xs[:-2]) / (xs[2:] - xs[:-2])
+            expected = ys[:-2] + (ys[2:] - ys[:-2]) * weight
+            bent = np.abs(ys[1:-1] - expected) > tolerance
+            flags[:-1] |= bent
+            flags[1:] |= bent
+            # Domain edges and jumps
+            finite = np.isfinite(ys)
+            flags |= finite[:-1] != finite[1:]
+            flags |= np.abs(np.diff(ys)) > y_span / 2
+        min_width = (x1 - x0) / BASE_SAMPLES / 2 ** MAX_ROUNDS
+        flags &= np.diff(xs) > min_width
+        return xs[:-1][flags], xs[1:][flags]
+
+    def refine(self, x0, x1, y_span, rounds=MAX_ROUNDS, budget=BASE_SAMPLES * 8):
+        # Bisects flagged intervals, a whole round per vectorized call
+        for _ in range(rounds):
+            left, right = self.flagged(x0, x1, y_span)
+            if not len(left) or budget <= 0:
+                break
+            mid = ((left + right) / 2)[:budget]
+            budget -= len(mid)
+            self.add(mid)
+
+    def polyline(self, x0, x1, y_span, columns):
+        # Points to draw for [x0, x1] on a view columns pixels wide, with NaN
+        # where the line must break. Above a few samples per pixel column the
+        # samples are reduced to each column's min and max, which draws the
+        # same pixels in bounded time.
+        xs, ys = self.window(x0, x1)
+        if len(xs) < 2:
+            return xs, ys
+        with np.errstate(all="ignore"):
+            # A jump left after refinement down to the minimum width is a
+            # discontinuity (e.g. tan at pi/2), not a steep line
+            min_width = (x1 - x0) / BASE_SAMPLES / 2 ** (MAX_ROUNDS - 2)
+            jumps = np.flatnonzero((np.abs(np.diff(ys)) > y_span) & (np.diff(xs) < min_width))
+        if len(jumps):
+            xs = np.insert(xs, jumps + 1, xs[jumps])
+            ys = np.insert(ys, jumps + 1, np.nan)
+        if len(xs) <= columns * 4:
+            return xs, ys
+
+        column = ((xs - x0) * (columns / (x1 - x0))).astype(np.int64)
+        starts = np.flatnonzero(np.r_[True, np.diff(column) != 0])
+        with np.errstate(all="ignore"):
+            low = np.fmin.reduceat(ys, starts)
+            high = np.fmax.reduceat(ys, starts)
+        broken = np.logical_or.reduceat(np.isnan(ys), starts)
+        px = np.repeat(xs[starts], 3)
+        py = np.column_stack((low, high, np.where(broken, np.nan, high))).ravel()
+        return px, py
+
+
+def auto_range(ys):
+    # A y range showing most of the finite values, ignoring the tails that
+    # poles such as tan's would otherwise stretch it with
+    finite = ys[np.isfinite(ys)]
+    if not len(finite):
+        return -1.0, 1.0
+    low, high = np.percentile(finite, (2, 98))
+    if high - low < 1e-9:
+        return float(low) - 1, float(high) + 1
+    pad = (high - low) * 0.1
+    return float(low - pad), float(high + pad)
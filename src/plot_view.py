@@ -0,0 +1,145 @@
+import numpy as np
+from PyQt6.QtCore import QPointF, Qt, QTimer
+from PyQt6.QtGui import QColor, QPainter, QPen, QPolygonF
+from PyQt6.QtWidgets import QWidget
+
+import plot
+
+# Plot window. Dragging pans and the wheel zooms around the pointer; both only
+# move the view and sample what it newly exposes, and refinement is left to a
+# timer that runs once the view has stopped moving. Drawing goes from the
+# sample arrays to QPolygonF memory without a Python loop over points.
+
+REFINE_DELAY_MS = 30
+ZOOM_STEP = 1.25
+BACKGROUND = QColor("#000000")
+GRID = QColor("#1a1a1a")
+AXES = QColor("#3d0075")
+CURVE = QColor("#bb86fc")
+
+
+def _polygon(px, py):
+    # A QPolygonF filled straight from two coordinate arrays
+    polygon = QPolygonF()
+    polygon.fill(QPointF(), len(px))
+    buffer = polygon.data()
+    buffer.setsize(len(px) * 16)
+    points = np.frombuffer(buffer, dtype=np.float64).reshape(-1, 2)
+    points[:, 0] = px
+    points[:, 1] = py
+    return polygon
+
+
+def _nice_step(span, count=8):
+    raw = span / count
+    magnitude = 10.0 ** np.floor(np.log10(raw))
+    for factor in (1, 2, 5, 10):
+        if raw <= factor * magnitude:
+            return factor * magnitude
+    return 10 * magnitude
+
+
+class PlotView(QWidget):
+    def __init__(self, expression, parent=None):
+        super().__init__(parent, Qt.WindowType.Tool)
+        self.setWindowTitle(f"y = {expression}")
+        self.setMinimumSize(320, 240)
+        self.resize(640, 480)
+        self.sampler = plot.Sampler(plot.compile_function(expression))
+        self.x0, self.x1 = -10.0, 10.0
+        self.sampler.cover(self.x0, self.x1)
+        self.y0, self.y1 = plot.auto_range(self.sampler.ys)
+        self.drag = None
+
+        self.refine_timer = QTimer(self)
+        self.refine_timer.setSingleShot(True)
+        self.refine_timer.setInterval(REFINE_DELAY_MS)
+        self.refine_timer.timeout.connect(self.refine)
+        self.refine_timer.start()
+
+    def set_view(self, x0, x1, y0, y1):
+        self.x0, self.x1, self.y0, self.y1 = x0, x1, y0, y1
+        self.sampler.cover(x0, x1)
+        self.refine_timer.start()
+        self.update()
+
+    def refine(self):
+        self.sampler.refine(self.x0, self.x1, self.y1 - self.y0)
+        self.update()
+
+    def to_screen(self, x, y):
+        sx = (x - self.x0) * (self.width() / (self.x1 - self.x0))
+        sy = (self.y1 - y) * (self.height() / (self.y1 - self.y0))
+        return sx, sy
+
+    def from_screen(self, sx, sy):
+        x = self.x0 + sx * (self.x1 - self.x0) / self.width()
+        y = self.y1 - sy * (self.y1 - self.y0) / self.height()
+        return x, y
+
+    def paintEvent(self, event):
+        painter = QPainter(self)
+        painter.fillRect(self.rect(), BACKGROUND)
+        self.draw_grid(painter)
+        # Antialiasing is the bulk of the drawing cost, so a moving view
+        # goes without until it settles
+        moving = self.refine_timer.isActive()
+        painter.setRenderHint(QPainter.RenderHint.Antialiasing, not moving)
+        painter.setPen(QPen(CURVE, 2))
+
+        xs, ys = self.sampler.polyline(self.x0, self.x1, self.y1 - self.y0, self.width())
+        if len(xs) < 2:
+            return
+        sx, sy = self.to_screen(xs, ys)
+        # Keep far-off values from overflowing the painter's coordinates
+        sy = np.clip(sy, -self.height(), 2 * self.height())
+        finite = np.isfinite(sy)
+        edges = np.flatnonzero(np.diff(np.r_[False, finite, False].astype(np.int8)))
+        for start, stop in zip(edges[::2], edges[1::2]):
+            if stop - start > 1:
+                painter.drawPolyline(_polygon(sx[start:stop], sy[start:stop]))
+
+    def draw_grid(self, painter):
+        painter.setPen(QPen(GRID, 1))
+        for lo, hi, vertical in ((self.x0, self.x1, True), (self.y0, self.y1, False)):
+            step = _nice_step(hi - lo)
+            for value in np.arange(np.ceil(lo / step), np.floor(hi / step) + 1) * step:
+                if vertical:
+                    sx, _ = self.to_screen(value, 0)
+                    painter.drawLine(QPointF(sx, 0), QPointF(sx, self.height()))
+                else:
+                    _, sy = self.to_screen(0, value)
+                    painter.drawLine(QPointF(0, sy), QPointF(self.width(), sy))
+        painter.setPen(QPen(AXES, 2))
+        ox, oy = self.to_screen(0, 0)
+        painter.drawLine(QPointF(ox, 0), QPointF(ox, self.height()))
+        painter.drawLine(QPointF(0, oy), QPointF(self.width(), oy))
+
+    def mousePressEvent(self, event):
+        if event.button() == Qt.MouseButton.LeftButton:
+            self.drag = (event.position(), self.x0, self.x1, self.y0, self.y1)
+
+    def mouseMoveEvent(self, event):
+        if self.drag is None:
+            return
+        start, x0, x1, y0, y1 = self.drag
+        delta = event.position() - start
+        dx = delta.x() * (x1 - x0) / self.width()
+        dy = delta.y() * (y1 - y0) / self.height()
+        self.set_view(x0 - dx, x1 - dx, y0 + dy, y1 + dy)
+
+    def mouseReleaseEvent(self, event):
+        self.drag = None
+
+    def wheelEvent(self, event):
+        factor = ZOOM_STEP if event.angleDelta().y() < 0 else 1 / ZOOM_STEP
+        pos = event.position()
+        x, y = self.from_screen(pos.x(), pos.y())
+        self.set_view(x + (self.x0 - x) * factor, x + (self.x1 - x) * factor,
+                      y + (self.y0 - y) * factor, y + (self.y1 - y) * factor)
+
+    def keyPressEvent(self, event):
+        if event.key() == Qt.Key.Key_Escape:
+            self.close()
+        else:
+            super().keyPressEvent(event)
@@ -0,0 +1,522 @@
+import math
+from decimal import Decimal, DivisionByZero, getcontext, localcontext
+from fractions import Fraction
+from functools import lru_cache
+
+import engine
+import factorial
+from formatting import format_decimal, format_result
+
+# Adaptive-precision evaluation for the "=" key. Expressions are evaluated in
+# floats as before, carrying a bound on the absolute error of every
+# intermediate value (running error analysis: each float operation adds half
+# an ulp of its result, and errors in the operands are propagated through the
+# operation's derivative). If every value inside result ± bound displays the
+# same digits, the float result is shown. Otherwise the expression is
+# evaluated again exactly with Fractions when it only uses rational
+# operations, or with Decimals at increasing precision until two precisions
+# display the same digits. A factorial on its own that is too large for a
+# float is shown from Stirling's series rather than computed, up to
+# factorial.MAX_APPROXIMATION; beyond it, it is too big to compute.
+
+FLOAT = "float"
+EXACT = "exact"
+DECIMAL = "decimal"
+
+# A result too large to compute or to show; the worker's limits give it too
+LIMIT = "limit"
+LIMIT_MESSAGE = "Too big to compute"
+
+PRECISIONS = (40, 80, 160, 320)
+# Largest integer exponent and factorial argument evaluated exactly, and
+# largest numerator or denominator of a power evaluated exactly, in bits
+MAX_EXACT_POWER = 4096
+MAX_EXACT_FACTORIAL = 5000
+MAX_EXACT_BITS = 1 << 20
+
+_UNIT = 2.0 ** -53
+# Libm functions are accurate to about an ulp
+_LIBM = 4 * _UNIT
+_TINY = 5e-324
+
+
+class _Untrusted(ArithmeticError):
+    # The float path cannot bound its error (overflow, a domain edge within
+    # the error, a division by a value that may be zero)
+    pass
+
+
+class _Inexact(ArithmeticError):
+    # The exact path met an irrational operation
+    pass
+
+
+class _Unstable(ArithmeticError):
+    # The digits change with every precision
+    pass
+
+
+# Float evaluation with error bounds: fn() -> (value, error)
+
+def _rounded(value, error):
+    if value.__class__ is float:
+        if not math.isfinite(value):
+            raise _Untrusted("overflow")
+        return value, error + abs(value) * _UNIT
+    return value, error
+
+
+def _add(a, ea, b, eb):
+    return _rounded(a + b, ea + eb)
+
+
+def _sub(a, ea, b, eb):
+    return _rounded(a - b, ea + eb)
+
+
+def _mul(a, ea, b, eb):
+    return _rounded(a * b, abs(a) * eb + abs(b) * ea + ea * eb)
+
+
+def _div(a, ea, b, eb):
+    if eb and eb >= abs(b):
+        raise _Untrusted("divisor may be zero")
+    value = a / b
+    return _rounded(value, (abs(a) * eb + abs(b) * ea) / (abs(b) * (abs(b) - eb)))
+
+
+def _mod(a, ea, b, eb):
+    if eb and eb >= abs(b):
+        raise _Untrusted("divisor may be zero")
+    value = a % b
+    error = ea + abs(a / b) * eb + eb if ea or eb else 0
+    if error and min(abs(value), abs(b - value)) <= error:
+        # The true remainder may be on the other side of a wrap-around
+        raise _Untrusted("remainder near a multiple")
+    return _rounded(value, error)
+
+
+def _power(a, ea, b, eb):
+    value = engine.BINARY_OPS["^"](a, b)
+    if value.__class__ is not float:
+        return value, 0
+    if not ea and not eb:
+        return _rounded(value, abs(value) * _LIBM)
+    if a == 0 or ea >= abs(a):
+        raise _Untrusted("base may be zero")
+    error = abs(value) * (abs(b) * ea / (abs(a) - ea) + abs(math.log(abs(a))) * eb)
+    # The bound is first order; past ~1 it says nothing
+    if error > abs(value):
+        raise _Untrusted("error too large")
+    return _rounded(value, error + abs(value) * _LIBM)
+
+
+FLOAT_BINARY = {
+    "+": _add,
+    "-": _sub,
+    "*": _mul,
+    "/": _div,
+    "%": _mod,
+    "^": _power,
+}
+
+
+def _sin(a, ea):
+    return math.sin(a), ea + _LIBM
+
+
+def _cos(a, ea):
+    return math.cos(a), ea + _LIBM
+
+
+def _tan(a, ea):
+    value = math.tan(a)
+    slope = 1 + value * value
+    if ea * slope > 1:
+        raise _Untrusted("near a pole")
+    return value, ea * slope * 2 + abs(value) * _LIBM
+
+
+def _ln(a, ea):
+    if ea and ea >= abs(a):
+        raise _Untrusted("argument may be zero")
+    value = math.log(a)
+    return value, ea / (a - ea) + abs(value) * _LIBM
+
+
+def _log10(a, ea):
+    if ea and ea >= abs(a):
+        raise _Untrusted("argument may be zero")
+    value = math.log10(a)
+    return value, ea / ((a - ea) * math.log(10)) + abs(value) * _LIBM
+
+
+def _neg(a, ea):
+    return -a, ea
+
+
+def _factorial(a, ea):
+    if a.__class__ is int or a.is_integer():
+        if ea:
+            raise _Untrusted("inexact factorial argument")
+        return engine.UNARY_OPS["!"](a), 0
+    value = factorial.gamma_factorial(a)
+    if ea:
+        # Twice the change of gamma over a ± ea, in case it turns inside
+        ea = 2 * max(abs(factorial.gamma_factorial(a - ea) - value),
+                     abs(factorial.gamma_factorial(a + ea) - value))
+    return _rounded(value, ea + abs(value) * _LIBM)
+
+
+FLOAT_UNARY = {
+    "sin": _sin,
+    "cos": _cos,
+    "tan": _tan,
+    "ln": _ln,
+    "log": _log10,
+    "neg": _neg,
+    "!": _factorial,
+}
+
+
+def float_literal(value):
+    # (value, error) of a number as parsed
+    if value.__class__ is not float:
+        return value, 0
+    # Only the shortest repr is known; a decimal literal that is not a binary
+    # fraction was rounded on the way in
+    if Decimal(value) == Decimal(repr(value)) and value:
+        return value, 0
+    return value, max(abs(value) * _UNIT, _TINY)
+
+
+def float_constant(name):
+    # (value, error) of a named constant
+    value = engine.CONSTANTS[name]
+    return value, abs(value) * _UNIT
+
+
+def _compile_float(node):
+    kind = node[0]
+    if kind == "num":
+        result = float_literal(node[1])
+        return lambda: result
+    if kind == "name":
+        name = node[1]
+        if name not in engine.CONSTANTS:
+            raise engine.ExpressionError(f"unknown name {name!r}")
+        result = float_constant(name)
+        return lambda: result
+    if kind == "bin":
+        op = FLOAT_BINARY[node[1]]
+        left = _compile_float(node[2])
+        right = _compile_float(node[3])
+        return lambda: op(*left(), *right())
+    op = FLOAT_UNARY[node[1] if kind == "call" else kind]
+    arg = _compile_float(node[-1])
+    return lambda: op(*arg())
+
+
+def trusted(value, error):
+    if not error:
+        return True
+    if not math.isfinite(error):
+        return False
+    text = format_result(value)
+    try:
+        return format_result(value - error) == text == format_result(value + error)
+    except (OverflowError, ValueError):
+        return False
+
+
+# Exact evaluation with Fractions
+
+def _exact_power(a, b):
+    if b.denominator != 1 or abs(b) > MAX_EXACT_POWER:
+        raise _Inexact("power")
+    if abs(b) * max(a.numerator.bit_length(), a.denominator.bit_length()) > MAX_EXACT_BITS:
+        raise _Inexact("power too large")
+    return a ** int(b)
+
+
+def _exact_mod(a, b):
+    return a % b
+
+
+def _exact_factorial(a):
+    if a.denominator != 1 or a > MAX_EXACT_FACTORIAL:
+        raise _Inexact("factorial")
+    return Fraction(factorial.factorial(int(a)))
+
+
+def _inexact():
+    raise _Inexact("function")
+
+
+_EXACT_BINARY = dict(engine.BINARY_OPS, **{"%": _exact_mod, "^": _exact_power})
+_EXACT_UNARY = {"neg": lambda a: -a, "!": _exact_factorial}
+
+
+def _compile_exact(node):
+    kind = node[0]
+    if kind == "num":
+        value = Fraction(repr(node[1]))
+        return lambda: value
+    if kind == "name":
+        # Constants are irrational
+        return _inexact
+    if kind == "bin":
+        op = _EXACT_BINARY[node[1]]
+        left = _compile_exact(node[2])
+        right = _compile_exact(node[3])
+        return lambda: op(left(), right())
+    if kind == "call":
+        return _inexact
+    op = _EXACT_UNARY[kind]
+    arg = _compile_exact(node[1])
+    return lambda: op(arg())
+
+
+def _fraction_to_decimal(value):
+    if value.denominator == 1:
+        return value.numerator
+    with localcontext() as ctx:
+        ctx.prec = PRECISIONS[0]
+        return Decimal(value.numerator) / value.denominator
+
+
+# Decimal evaluation at the context's precision
+
+@lru_cache(maxsize=8)
+def _pi(precision):
+    # Series for pi from the decimal module's documentation
+    with localcontext() as ctx:
+        ctx.prec = precision + 2
+        three = Decimal(3)
+        lasts, t, s, n, na, d, da = 0, three, 3, 1, 0, 0, 24
+        while s != lasts:
+            lasts = s
+            n, na = n + na, na + 8
+            d, da = d + da, da + 32
+            t = (t * n) / d
+            s += t
+    return +s
+
+
+def _reduce(a):
+    # a modulo 2 pi, into [-pi, pi], with enough digits for large arguments
+    with localcontext() as ctx:
+        ctx.prec += max(a.adjusted(), 0) + 4
+        two_pi = 2 * _pi(ctx.prec)
+        a = a.remainder_near(two_pi)
+    return +a
+
+
+def _series(x, start):
+    # x^start/start! - x^(start+2)/(start+2)! + ... ; start 0 is cos, 1 is sin
+    with localcontext() as ctx:
+        ctx.prec += 2
+        term = x if start else Decimal(1)
+        total = term
+        i = start
+        square = x * x
+        while True:
+            term = -term * square / ((i + 1) * (i + 2))
+            i += 2
+            new = total + term
+            if new == total:
+                break
+            total = new
+    return +total
+
+
+def _decimal_sin(a):
+    return _series(_reduce(a), 1)
+
+
+def _decimal_cos(a):
+    return _series(_reduce(a), 0)
+
+
+def _decimal_tan(a):
+    a = _reduce(a)
+    return _series(a, 1) / _series(a, 0)
+
+
+def _decimal_ln(a):
+    if a <= 0:
+        raise ValueError("math domain error")
+    return a.ln()
+
+
+def _decimal_log10(a):
+    if a <= 0:
+        raise ValueError("math domain error")
+    return a.log10()
+
+
+def _decimal_power(a, b):
+    if b == b.to_integral_value() and abs(b) <= MAX_EXACT_POWER:
+        return a ** int(b)
+    if a < 0:
+        raise ValueError("complex result")
+    return a ** b
+
+
+def _decimal_mod(a, b):
+    # Decimal % takes the sign of the dividend; the engine's takes the divisor's
+    value = a % b
+    if value and (value < 0) != (b < 0):
+        value += b
+    return value
+
+
+def _decimal_factorial(a):
+    if a != a.to_integral_value():
+        raise ValueError("factorial of non-integer")
+    if a > MAX_EXACT_FACTORIAL:
+        raise ValueError("factorial too large")
+    return +Decimal(factorial.factorial(int(a)))
+
+
+_DECIMAL_BINARY = dict(engine.BINARY_OPS, **{"%": _decimal_mod, "^": _decimal_power})
+_DECIMAL_UNARY = {
+    "sin": _decimal_sin,
+    "cos": _decimal_cos,
+    "tan": _decimal_tan,
+    "ln": _decimal_ln,
+    "log": _decimal_log10,
+    "neg": lambda a: -a,
+    "!": _decimal_factorial,
+}
+
+
+def _compile_decimal(node):
+    kind = node[0]
+    if kind == "num":
+        text = repr(node[1])
+        return lambda: +Decimal(text)
+    if kind == "name":
+        if node[1] == "e":
+            return lambda: Decimal(1).exp()
+        return lambda: +_pi(getcontext().prec)
+    if kind == "bin":
+        op = _DECIMAL_BINARY[node[1]]
+        left = _compile_decimal(node[2])
+        right = _compile_decimal(node[3])
+        return lambda: op(left(), right())
+    op = _DECIMAL_UNARY[node[1] if kind == "call" else kind]
+    arg = _compile_decimal(node[-1])
+    return lambda: op(arg())
+
+
+def _evaluate_decimal(fn):
+    # Raises the precision until two in a row display the same digits; a
+    # result that never settles (tan(π/2)) has no digits worth showing
+    previous = None
+    for precision in PRECISIONS:
+        with localcontext() as ctx:
+            ctx.prec = precision
+            value = fn()
+        if not value.is_finite():
+            raise ValueError("not finite")
+        text = format_decimal(value)
+        if text == previous:
+            return text
+        previous = text
+    raise _Unstable("no stable digits")
+
+
+def _approximate_factorial(node):
+    # (status, text) of x! for the argument node, if x is beyond floats and
+    # known well enough for the digits shown, or None
+    try:
+        value, error = _compile_float(node)()
+        if not value > factorial.MAX_FLOAT_FACTORIAL:
+            return None
+        if not value <= factorial.MAX_APPROXIMATION:
+            return LIMIT, LIMIT_MESSAGE
+        text = factorial.approximate(value)
+        if error and not factorial.approximate(value - error) == text == factorial.approximate(value + error):
+            return None
+        return engine.OK, text
+    except Exception:
+        return None
+
+
+@lru_cache(maxsize=engine.CACHE_SIZE)
+def _compile(key):
+    node = engine.parse(key)
+    if engine.has_arrays(node):
+        # Lists are evaluated element-wise in floats only
+        return None, node
+    return _compile_float(node), node
+
+
+def calculate(text):
+    # (status, text to display, path), with the same statuses and messages as
+    # engine.calculate, or LIMIT; path is FLOAT, EXACT or DECIMAL
+    return calculate_value(text)[:3]
+
+
+def calculate_value(text):
+    # calculate() and the number displayed: a float, an int or a Fraction, or
+    # None when there is none or it is only known as far as it is displayed
+    if "0/0" in text or "0÷0" in text:
+        return engine.ZERO_DIVISION, engine.ZERO_MESSAGE, FLOAT, None
+    try:
+        fn, node = _compile(engine.normalize(text))
+    except Exception:
+        return engine.ERROR, engine.ERROR_MESSAGE, FLOAT, None
+    if fn is None:
+        return (*engine.calculate(text), FLOAT, None)
+    return _calculate(fn, node)
+
+
+def calculate_node(node):
+    # calculate() of an expression already parsed, without lists
+    try:
+        fn = _compile_float(node)
+    except Exception:
+        return engine.ERROR, engine.ERROR_MESSAGE, FLOAT
+    return _calculate(fn, node)[:3]
+
+
+def _calculate(fn, node):
+    if node[0] == "!":
+        approximation = _approximate_factorial(node[1])
+        if approximation is not None:
+            return (*approximation, FLOAT, None)
+    value = None
+    try:
+        value, error = fn()
+        if value.__class__ is float and math.isnan(value):
+            return engine.ZERO_DIVISION, engine.ZERO_MESSAGE, FLOAT, None
+        if trusted(value, error):
+            return engine.OK, format_result(value), FLOAT, value
+    except (_Untrusted, OverflowError):
+        pass
+    except ZeroDivisionError:
+        return engine.ZERO_DIVISION, engine.ZERO_MESSAGE, FLOAT, None
+    except Exception:
+        return engine.ERROR, engine.ERROR_MESSAGE, FLOAT, None
+
+    try:
+        try:
+            exact = _compile_exact(node)()
+            shown = _fraction_to_decimal(exact)
+            if shown.__class__ is int:
+                return engine.OK, format_result(shown), EXACT, exact
+            return engine.OK, format_decimal(shown), EXACT, exact
+        except _Inexact:
+            return engine.OK, _evaluate_decimal(_compile_decimal(node)), DECIMAL, None
+    except (ZeroDivisionError, DivisionByZero):
+        return engine.ZERO_DIVISION, engine.ZERO_MESSAGE, EXACT, None
+    except _Unstable:
+        return engine.ERROR, engine.ERROR_MESSAGE, DECIMAL, None
+    except (ArithmeticError, ValueError):
+        pass
+    if value is None:
+        return engine.ERROR, engine.ERROR_MESSAGE, FLOAT, None
+    # Nothing better than the float result
+    return engine.OK, format_result(value), FLOAT, value
@@ -0,0 +1,250 @@
+import math
+
+import engine
+import factorial
+import precise
+
+# Live result preview. The input is evaluated with an operator-precedence
+# (shunting-yard) machine whose stacks are immutable linked lists, so the state
+# after every token can be kept as a snapshot. When the input changes only the
+# tokens after the unchanged prefix are fed again, which keeps the cost of a
+# keystroke or a backspace independent of the length of the expression.
+# Values carry a bound on their error, from the float operations of "="
+# (see precise.py), and a result that is not known to the digits shown is
+# not previewed: "=" computes it more precisely.
+
+_PRECEDENCE = {"+": 1, "-": 1, "*": 2, "/": 2, "%": 2, "neg": 3, "^": 4}
+_RIGHT_ASSOCIATIVE = ("^", "neg")
+_TOKEN_LOOKAHEAD = 3
+
+# Above these sizes the preview is skipped rather than stalling the keyboard;
+# a larger factorial is shown approximated, when nothing else is done with it
+MAX_FACTORIAL = 2000
+MAX_POWER_BITS = 100_000
+
+
+class PreviewTooExpensive(engine.ExpressionError):
+    pass
+
+
+def _check_power(base, exp):
+    if isinstance(base, int) and isinstance(exp, int) and abs(base) > 1:
+        if exp * base.bit_length() > MAX_POWER_BITS:
+            raise PreviewTooExpensive("power too large for a preview")
+
+
+def guarded_power(base, exp):
+    _check_power(base, exp)
+    return engine.BINARY_OPS["^"](base, exp)
+
+
+def _power(a, ea, b, eb):
+    _check_power(a, b)
+    return precise.FLOAT_BINARY["^"](a, ea, b, eb)
+
+
+def _factorial(value, error):
+    if not value <= factorial.MAX_APPROXIMATION:
+        # "=" has it as too big to compute
+        raise PreviewTooExpensive("factorial too large to approximate")
+    if value > MAX_FACTORIAL or (value.__class__ is float and value > factorial.MAX_FLOAT_FACTORIAL):
+        return factorial.Approximation(value), error
+    return precise.FLOAT_UNARY["!"](value, error)
+
+
+# (value, error) operations
+_BINARY = dict(precise.FLOAT_BINARY, **{"^": _power})
+_NEG = precise.FLOAT_UNARY["neg"]
+
+
+class _State:
+    # values and ops are cons cells: (head, tail) or None; values are
+    # (value, error) pairs
+    __slots__ = ("values", "ops", "expect_operand", "error")
+
+    def __init__(self, values=None, ops=None, expect_operand=True, error=None):
+        self.values = values
+        self.ops = ops
+        self.expect_operand = expect_operand
+        self.error = error
+
+
+_INITIAL = _State()
+
+
+def _apply(op, values):
+    if op == "neg":
+        value, values = values
+        return (_NEG(*value), values)
+    right, values = values
+    left, values = values
+    return (_BINARY[op](*left, *right), values)
+
+
+def _close_group(values, ops):
+    # Reduces up to the innermost "(" and applies its function, if any
+    while ops is not None:
+        op, ops = ops
+        if op.__class__ is tuple:
+            function = op[1]
+            if function is not None:
+                value, values = values
+                values = (precise.FLOAT_UNARY[function](*value), values)
+            return values, ops
+        values = _apply(op, values)
+    raise engine.ExpressionError("unbalanced ')'")
+
+
+def _reduce_for(op, values, ops):
+    prec = _PRECEDENCE[op]
+    while ops is not None:
+        top = ops[0]
+        if top.__class__ is tuple:
+            break
+        top_prec = _PRECEDENCE[top]
+        if top_prec < prec or (top_prec == prec and op in _RIGHT_ASSOCIATIVE):
+            break
+        values = _apply(top, values)
+        ops = ops[1]
+    return values, ops
+
+
+def _push_operand(state, value):
+    values, ops = state.values, state.ops
+    if not state.expect_operand:
+        # Implicit multiplication, allowed before names and "(" like the parser
+        values, ops = _reduce_for("*", values, ops)
+        ops = ("*", ops)
+    return _State((value, values), ops, False)
+
+
+def feed(state, token):
+    if state.error is not None:
+        return state
+    try:
+        return _feed(state, token)
+    except Exception as e:
+        return _State(state.values, state.ops, state.expect_operand, e)
+
+
+def _feed(state, token):
+    ops = state.ops
+    if ops is not None and ops[0] == "call":
+        # A function name must be followed by its "("
+        if token != "(":
+            raise engine.ExpressionError("function needs parentheses")
+        function, ops = ops[1]
+        return _State(state.values, (("(", function), ops), True)
+
+    if token.__class__ is not str:
+        if not state.expect_operand:
+            raise engine.ExpressionError("missing operator")
+        return _State((precise.float_literal(token), state.values), ops, False)
+
+    if token in engine.FUNCTIONS or token == "(":
+        if not state.expect_operand:
+            values, ops = _reduce_for("*", state.values, ops)
+            ops = ("*", ops)
+            state = _State(values, ops, True)
+        if token == "(":
+            return _State(state.values, (("(", None), state.ops), True)
+        return _State(state.values, ("call", (token, state.ops)), True)
+
+    if token.isalpha():
+        if token not in engine.CONSTANTS:
+            raise engine.ExpressionError(f"unknown name {token!r}")
+        return _push_operand(state, precise.float_constant(token))
+
+    if state.expect_operand:
+        if token == "-":
+            return _State(state.values, ("neg", ops), True)
+        if token == "+":
+            return state
+        raise engine.ExpressionError(f"unexpected {token!r}")
+
+    if token == "!":
+        value, values = state.values
+        return _State((_factorial(*value), values), ops, False)
+    if token == ")":
+        values, ops = _close_group(state.values, ops)
+        return _State(values, ops, False)
+    if token in _PRECEDENCE:
+        values, ops = _reduce_for(token, state.values, ops)
+        return _State(values, (token, ops), True)
+    raise engine.ExpressionError(f"unexpected {token!r}")
+
+
+def finish(state):
+    # Value of the expression as if it ended here, with open parentheses closed
+    if state.error is not None:
+        raise state.error
+    if state.expect_operand:
+        raise engine.ExpressionError("incomplete expression")
+    values, ops = state.values, state.ops
+    while ops is not None:
+        if ops[0].__class__ is tuple:
+            values, ops = _close_group(values, ops)
+        else:
+            values = _apply(ops[0], values)
+            ops = ops[1]
+    return values[0]
+
+
+def _common_prefix(old, new):
+    if new.startswith(old):
+        return len(old)
+    if old.startswith(new):
+        return len(new)
+    size = 0
+    for a, b in zip(old, new):
+        if a != b:
+            break
+        size += 1
+    return size
+
+
+class LivePreview:
+    def __init__(self):
+        self.text = ""
+        self.ends = [0]
+        self.states = [_INITIAL]
+
+    def update(self, text):
+        # Keep snapshots of tokens that end well inside the unchanged prefix.
+        # A number token can grow up to three characters past its end ("2" ->
+        # "2e+5"), so anything closer to the edit is re-tokenized.
+        unchanged = _common_prefix(self.text, text) - _TOKEN_LOOKAHEAD
+        ends, states = self.ends, self.states
+        while len(ends) > 1 and ends[-1] > unchanged:
+            ends.pop()
+            states.pop()
+        self.text = text
+
+        state = states[-1]
+        try:
+            for token, end in engine.scan(text, ends[-1]):
+                state = feed(state, token)
+                ends.append(end)
+                states.append(state)
+        except engine.ExpressionError:
+            return None
+        return state
+
+    def evaluate(self, text):
+        state = self.update(text)
+        if state is None or "0/0" in text or "0÷0" in text:
+            return None
+        try:
+            value, error = finish(state)
+            if value.__class__ is factorial.Approximation:
+                text = value.display()
+                if error and not factorial.approximate(value.x - error) == text == factorial.approximate(value.x + error):
+                    return None
+                return text
+            if isinstance(value, float) and math.isnan(value):
+                return None
+            if not precise.trusted(value, error):
+                return None
+            return engine.format_value(value)
+        except Exception:
+            return None
@@ -0,0 +1,118 @@
+import os
+import signal
+import socket
+import sys
+
+# Resident mode: a calculator started with --resident keeps running hidden
+# after its window is closed and listens on a local socket. Later launches
+# send it a command and exit instead of importing Qt again. The client side
+# only uses the standard library so it stays cheap.
+
+SOCKET_NAME = "98kalculator.sock"
+TIMEOUT = 0.5
+
+
+def socket_path():
+    runtime_dir = os.environ.get("XDG_RUNTIME_DIR")
+    if runtime_dir and os.path.isdir(runtime_dir):
+        return os.path.join(runtime_dir, SOCKET_NAME)
+    return os.path.join("/tmp", f"98kalculator-{os.getuid()}.sock")
+
+
+def send_command(command, timeout=TIMEOUT):
+    # Returns the daemon's reply, or None if no daemon is listening
+    path = socket_path()
+    if not os.path.exists(path):
+        return None
+    try:
+        with socket.socket(socket.AF_UNIX, socket.SOCK_STREAM) as sock:
+            sock.settimeout(timeout)
+            sock.connect(path)
+            sock.sendall(command.encode() + b"\n")
+            reply = b""
+            while not reply.endswith(b"\n"):
+                chunk = sock.recv(64)
+                if not chunk:
+                    break
+                reply += chunk
+    except OSError:
+        return None
+    return reply.decode().strip() or None
+
+
+def forward(args):
+    # Hands this launch over to a running daemon and returns the exit status,
+    # or None to start normally
+    if any(arg in args for arg in ("--batch", "--serve", "--worker", "--profile-startup")):
+        return None
+    if "--quit" in args:
+        if send_command("quit") is None:
+            print("98kalculator: no resident calculator is running", file=sys.stderr)
+            return 1
+        return 0
+    return 0 if send_command("show") == "ok" else None
+
+
+def start_server(window, app):
+    from PyQt6.QtCore import QTimer
+    from PyQt6.QtNetwork import QLocalServer
+
+    path = socket_path()
+    # Only called when no daemon answered, so whatever is there is stale
+    QLocalServer.removeServer(path)
+    server = QLocalServer(app)
+    if not server.listen(path):
+        print(f"98kalculator: cannot listen on {path}: {server.errorString()}", file=sys.stderr)
+        return None
+
+    def handle(conn):
+        if not conn.canReadLine():
+            return
+        command = bytes(conn.readLine()).decode(errors="replace").strip()
+        if command == "show":
+            window.showNormal()
+            window.raise_()
+            window.activateWindow()
+            conn.write(b"ok\n")
+        elif command == "quit":
+            conn.write(b"ok\n")
+            app.quit()
+        else:
+            conn.write(b"unknown command\n")
+        conn.flush()
+        conn.disconnectFromServer()
+
+    def accept():
+        while server.hasPendingConnections():
+            conn = server.nextPendingConnection()
+            conn.disconnected.connect(conn.deleteLater)
+            conn.readyRead.connect(lambda conn=conn: handle(conn))
+
+    server.newConnection.connect(accept)
+    app.setQuitOnLastWindowClosed(False)
+    app.aboutToQuit.connect(server.close)
+
+    # Let Python run its signal handlers while Qt owns the main loop
+    signal.signal(signal.SIGTERM, lambda *args: app.quit())
+    signal.signal(signal.SIGINT, lambda *args: app.quit())
+    timer = QTimer(server)
+    timer.timeout.connect(lambda: None)
+    timer.start(500)
+    return server
+
+
+def main(argv=None):
+    # Fast client for hotkeys: show the resident calculator, or start one
+    args = sys.argv[1:] if argv is None else argv
+    command = args[0] if args else "show"
+    if send_command(command) is not None:
+        return 0
+    if command != "show":
+        print("98kalculator: no resident calculator is running", file=sys.stderr)
+        return 1
+    main_script = os.path.join(os.path.dirname(os.path.abspath(__file__)), "main.py")
+    os.execv(sys.executable, [sys.executable, main_script, "--resident"])
+
+
+if __name__ == "__main__":
+    sys.exit(main())
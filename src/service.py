@@ -0,0 +1,322 @@
+import argparse
+import asyncio
+import json
+import os
+import re
+import signal
+import sys
+import time
+from concurrent.futures import ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+
+import engine
+import precise
+import worker
+
+# Evaluation service for tools that need many evaluations without starting a
+# process for each. It listens on a Unix socket and speaks line-delimited
+# JSON, any number of requests per connection without waiting for replies:
+#
+#   {"id": 1, "expr": "2^10"}  ->  {"id": 1, "status": "ok", "result": "1024", "path": "float", "ms": 0.02}
+#   {"id": 2, "op": "stats"}  ->  {"id": 2, "stats": {...}}
+#
+# Replies come as soon as each result is ready, so they can be out of order;
+# "id" is echoed back as it was sent. Expressions that can take long (x! or
+# powers of anything but small numbers, lists and ranges) are evaluated in a
+# pool of worker processes under the worker's CPU and memory limits; the
+# rest are evaluated in the event loop, so slow requests never hold up fast
+# ones.
+
+SOCKET_NAME = "98kalculator-eval.sock"
+# Requests of one connection being evaluated at once; reading waits beyond it
+MAX_IN_FLIGHT = 1024
+MAX_LINE = 1 << 20
+# A connection with many requests waiting lets the others run this often
+YIELD_EVERY = 64
+# Largest x! and exponent evaluated in the event loop, besides a factorial of
+# a number on its own, which is approximated for display at any size; the
+# exponents of powers of powers count multiplied together
+INLINE_FACTORIAL = 1000
+INLINE_EXPONENT = 64
+# What any expression that can take long contains
+_HEAVY_RE = re.compile(r"[!^\[]|\*\*|\.\.")
+
+INLINE = "inline"
+POOL = "pool"
+
+
+def socket_path():
+    runtime_dir = os.environ.get("XDG_RUNTIME_DIR")
+    if runtime_dir and os.path.isdir(runtime_dir):
+        return os.path.join(runtime_dir, SOCKET_NAME)
+    return os.path.join("/tmp", f"98kalculator-eval-{os.getuid()}.sock")
+
+
+def is_heavy(expression):
+    if _HEAVY_RE.search(expression) is None:
+        return False
+    try:
+        node = engine.parse(engine.normalize(expression))
+    except Exception:
+        # Rejected straight away
+        return False
+    if node[0] == "!" and node[1][0] == "num":
+        return False
+    return _is_heavy(node)
+
+
+def _is_heavy(node):
+    kind = node[0]
+    if kind in ("list", "range", "reduce"):
+        return True
+    if kind == "!" and not (node[1][0] == "num" and node[1][1] <= INLINE_FACTORIAL):
+        return True
+    if kind == "bin" and node[1] == "^":
+        if not (node[3][0] == "num" and abs(node[3][1]) <= INLINE_EXPONENT):
+            return True
+        if _growth(node) > INLINE_EXPONENT:
+            return True
+    return any(_is_heavy(child) for child in node[1:] if child.__class__ is tuple)
+
+
+def _growth(node):
+    # Product of the exponents of the powers nested in node's base:
+    # (((10^64)^64)^64)^64 has 64^4 times the digits of 10
+    if node[0] == "bin" and node[1] == "^" and node[3][0] == "num":
+        return abs(node[3][1]) * _growth(node[2])
+    return max((_growth(child) for child in node[1:] if child.__class__ is tuple), default=1)
+
+
+class LatencyStats:
+    # Request count and latency of one kind of request; percentiles come from
+    # power-of-two buckets of microseconds, so recording is O(1)
+    def __init__(self):
+        self.count = 0
+        self.total = 0.0
+        self.max = 0.0
+        self.buckets = [0] * 40
+
+    def record(self, seconds):
+        self.count += 1
+        self.total += seconds
+        self.max = max(self.max, seconds)
+        self.buckets[min(int(seconds * 1e6).bit_length(), len(self.buckets) - 1)] += 1
+
+    def percentile(self, fraction):
+        # Upper bound of the bucket holding that fraction of the requests
+        seen = 0
+        for bucket, count in enumerate(self.buckets):
+            seen += count
+            if count and seen >= fraction * self.count:
+                return min((1 << bucket) / 1000, round(self.max * 1000, 3))
+        return 0.0
+
+    def report(self):
+        return {
+            "count": self.count,
+            "mean_ms": round(self.total / self.count * 1000, 3) if self.count else 0.0,
+            "p50_ms": self.percentile(0.5),
+            "p99_ms": self.percentile(0.99),
+            "max_ms": round(self.max * 1000, 3),
+        }
+
+
+def _start_worker(memory_limit, sockets):
+    for fd in sockets:
+        os.close(fd)
+    if memory_limit:
+        worker.set_memory_limit(memory_limit)
+
+
+def _pool_evaluate(expression, cpu_limit):
+    if cpu_limit:
+        worker.set_cpu_limit(cpu_limit)
+    return worker.evaluate(expression)
+
+
+def _write(writer, reply):
+    if not writer.is_closing():
+        writer.write(json.dumps(reply, ensure_ascii=False).encode() + b"\n")
+
+
+class Service:
+    def __init__(self, workers=None, cpu_limit=worker.CPU_LIMIT, memory_limit=worker.MEMORY_LIMIT_MB):
+        self.workers = workers or os.cpu_count() or 1
+        self.cpu_limit = cpu_limit
+        self.memory_limit = memory_limit
+        self.pool = None
+        self.started = time.monotonic()
+        self.stats = {INLINE: LatencyStats(), POOL: LatencyStats()}
+        self.connections = 0
+        # File descriptors of the listening socket and open connections
+        self.sockets = set()
+        # Counter for benchmarks
+        self.pool_restarts = 0
+
+    def new_pool(self, workers):
+        # Workers close their copies of the sockets open when they are
+        # forked, or a closed connection would stay open until they exit
+        return ProcessPoolExecutor(max_workers=workers, initializer=_start_worker,
+                                   initargs=(self.memory_limit, tuple(self.sockets)))
+
+    def start_pool(self):
+        self.pool = self.new_pool(self.workers)
+        # Every worker is forked now rather than on the first slow request
+        for _ in range(self.workers):
+            self.pool.submit(worker.evaluate, "1+1")
+
+    def evaluate_inline(self, request_id, expression):
+        start = time.perf_counter()
+        status, text, path = worker.evaluate(expression)
+        elapsed = time.perf_counter() - start
+        self.stats[INLINE].record(elapsed)
+        return {"id": request_id, "status": status, "result": text, "path": path, "ms": round(elapsed * 1000, 3)}
+
+    async def evaluate_in_pool(self, expression):
+        loop = asyncio.get_running_loop()
+        pool = self.pool
+        try:
+            return await loop.run_in_executor(pool, _pool_evaluate, expression, self.cpu_limit)
+        except BrokenProcessPool:
+            # A worker went over its CPU limit (or died), and every job in the
+            # pool failed with it
+            if self.pool is pool:
+                pool.shutdown(wait=False)
+                self.start_pool()
+                self.pool_restarts += 1
+        # Each of those jobs runs again in a process of its own, so only the
+        # one that broke the pool comes back over the limit
+        alone = self.new_pool(1)
+        try:
+            return await loop.run_in_executor(alone, _pool_evaluate, expression, self.cpu_limit)
+        except BrokenProcessPool:
+            return worker.LIMIT, worker.LIMIT_MESSAGE, precise.FLOAT
+        finally:
+            alone.shutdown(wait=False)
+
+    def report(self):
+        return {
+            "uptime_s": round(time.monotonic() - self.started, 1),
+            "connections": self.connections,
+            "workers": self.workers,
+            "pool_restarts": self.pool_restarts,
+            INLINE: self.stats[INLINE].report(),
+            POOL: self.stats[POOL].report(),
+        }
+
+    def answer(self, request):
+        # The reply to a request that needs no worker, or None
+        if request.__class__ is not dict:
+            return {"id": None, "status": engine.ERROR, "result": "bad request"}
+        expression = request.get("expr")
+        if expression.__class__ is str:
+            return None if is_heavy(expression) else self.evaluate_inline(request.get("id"), expression)
+        if request.get("op") == "stats":
+            return {"id": request.get("id"), "stats": self.report()}
+        return {"id": request.get("id"), "status": engine.ERROR, "result": "bad request"}
+
+    async def reply_from_pool(self, request, writer, slots):
+        start = time.perf_counter()
+        try:
+            status, text, path = await self.evaluate_in_pool(request["expr"])
+        finally:
+            slots.release()
+        elapsed = time.perf_counter() - start
+        self.stats[POOL].record(elapsed)
+        _write(writer, {"id": request.get("id"), "status": status, "result": text, "path": path,
+                        "ms": round(elapsed * 1000, 3)})
+
+    async def handle(self, reader, writer):
+        self.connections += 1
+        fd = writer.get_extra_info("socket").fileno()
+        self.sockets.add(fd)
+        slots = asyncio.Semaphore(MAX_IN_FLIGHT)
+        tasks = set()
+        handled = 0
+        try:
+            while True:
+                try:
+                    line = await reader.readline()
+                except (ValueError, ConnectionError):
+                    # Over MAX_LINE, or the client went away
+                    break
+                if not line:
+                    break
+                if not line.strip():
+                    continue
+                try:
+                    request = json.loads(line)
+                except ValueError:
+                    request = None
+                reply = self.answer(request)
+                if reply is not None:
+                    _write(writer, reply)
+                else:
+                    await slots.acquire()
+                    task = asyncio.ensure_future(self.reply_from_pool(request, writer, slots))
+                    tasks.add(task)
+                    task.add_done_callback(tasks.discard)
+                handled += 1
+                if writer.transport.get_write_buffer_size() > MAX_LINE:
+                    await writer.drain()
+                elif handled % YIELD_EVERY == 0:
+                    await asyncio.sleep(0)
+            if tasks:
+                await asyncio.wait(tasks)
+            await writer.drain()
+        except ConnectionError:
+            pass
+        finally:
+            self.connections -= 1
+            self.sockets.discard(fd)
+            for task in tasks:
+                task.cancel()
+            writer.close()
+
+    async def serve(self, path):
+        if os.path.exists(path):
+            os.unlink(path)
+        server = await asyncio.start_unix_server(self.handle, path, limit=MAX_LINE)
+        os.chmod(path, 0o600)
+        self.sockets.update(sock.fileno() for sock in server.sockets)
+        self.start_pool()
+        stop = asyncio.Event()
+        loop = asyncio.get_running_loop()
+        for signum in (signal.SIGINT, signal.SIGTERM):
+            loop.add_signal_handler(signum, stop.set)
+        print(f"98kalculator: serving on {path}", file=sys.stderr, flush=True)
+        try:
+            async with server:
+                await stop.wait()
+        finally:
+            if os.path.exists(path):
+                os.unlink(path)
+            self.pool.shutdown(wait=False, cancel_futures=True)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(
+        prog="98kalculator --serve",
+        description="Evaluate line-delimited JSON requests on a Unix socket.",
+    )
+    parser.add_argument("--socket", default=None, metavar="PATH",
+                        help=f"socket to listen on (default: {socket_path()})")
+    parser.add_argument("-j", "--workers", type=int, metavar="N", default=None,
+                        help="processes for slow expressions (default: one per core)")
+    parser.add_argument("--cpu-limit", type=int, metavar="SECONDS", default=worker.CPU_LIMIT,
+                        help=f"CPU time limit per slow expression (default: {worker.CPU_LIMIT})")
+    parser.add_argument("--memory-limit", type=int, metavar="MB", default=worker.MEMORY_LIMIT_MB,
+                        help=f"memory limit of the worker processes (default: {worker.MEMORY_LIMIT_MB})")
+    args = parser.parse_args(argv)
+
+    service = Service(args.workers, args.cpu_limit, args.memory_limit)
+    try:
+        asyncio.run(service.serve(args.socket or socket_path()))
+    except OSError as e:
+        print(f"98kalculator: {e}", file=sys.stderr)
+        return 1
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
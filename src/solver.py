@@ -0,0 +1,184 @@
+import math
+import re
+
+import numpy as np
+
+import engine
+import plot
+from formatting import format_result
+
+# Equations in x: "x^3 - 2x = 5", "solve(sin(x) = 0.3, 0..10)", or
+# "solve(expression, a..b)" for expression = 0. lhs - rhs is compiled once
+# into NumPy calls, as for plots, and evaluated on a grid over the range;
+# every sign change between neighbouring points brackets a root. All the
+# brackets are then narrowed together, one vectorized call of the function
+# per step, by regula falsi with the Illinois modification, falling back to
+# bisection whenever a step fails to halve a bracket. Sign changes across a
+# pole (tan at pi/2) narrow down to a point where |f| is large, and are
+# dropped.
+
+VARIABLE = plot.VARIABLE
+DEFAULT_RANGE = ("-100", "100")
+GRID = 1 << 14
+MAX_STEPS = 200
+# Roots shown before "…" and the last one
+SHOWN = 4
+
+_SOLVE_RE = re.compile(r"\s*solve\s*\((.*)\)\s*\Z", re.S)
+
+
+class Equation:
+    __slots__ = ("node", "low", "high", "names")
+
+    def __init__(self, node, low, high):
+        # Nodes of lhs - rhs and of the range's ends
+        self.node = node
+        self.low = low
+        self.high = high
+        # Names read besides x and the constants
+        self.names = frozenset(name for name in _names(node) | _names(low) | _names(high)
+                               if name != VARIABLE and name not in engine.CONSTANTS)
+
+    def solve(self, lookup=None):
+        # Sorted array of the roots in the range
+        low = float(plot.compile_node(self.low, lookup)(np.zeros(1))[0])
+        high = float(plot.compile_node(self.high, lookup)(np.zeros(1))[0])
+        if not (math.isfinite(low) and math.isfinite(high)) or low == high:
+            raise engine.ExpressionError("bad range")
+        return find_roots(plot.compile_node(self.node, lookup), min(low, high), max(low, high))
+
+
+def _names(node):
+    kind = node[0]
+    if kind == "name":
+        return {node[1]}
+    if kind == "num":
+        return set()
+    names = set()
+    for child in node[1:]:
+        if child.__class__ is tuple:
+            names |= _names(child)
+    return names
+
+
+def is_equation(text):
+    return "=" in text or _SOLVE_RE.match(text) is not None
+
+
+def _split(text, separator):
+    # text split at separator outside parentheses and brackets
+    parts = []
+    depth = 0
+    start = 0
+    for i, char in enumerate(text):
+        if char in "([":
+            depth += 1
+        elif char in ")]":
+            depth -= 1
+        elif char == separator and depth == 0:
+            parts.append(text[start:i])
+            start = i + 1
+    parts.append(text[start:])
+    return parts
+
+
+def _parse(text):
+    return engine.parse(engine.normalize(text))
+
+
+def parse(text):
+    match = _SOLVE_RE.match(text)
+    if match:
+        parts = _split(match.group(1), ",")
+        if len(parts) != 2:
+            raise engine.ExpressionError("solve(equation, a..b)")
+        equation, bounds = parts
+        bounds = _parse(bounds)
+        if bounds[0] != "range":
+            raise engine.ExpressionError("solve(equation, a..b)")
+        low, high = bounds[1:]
+    else:
+        equation = text
+        low, high = map(_parse, DEFAULT_RANGE)
+    sides = _split(equation, "=")
+    if len(sides) > 2:
+        raise engine.ExpressionError("more than one '='")
+    node = _parse(sides[0])
+    if len(sides) == 2:
+        node = ("bin", "-", node, _parse(sides[1]))
+    if VARIABLE not in _names(node):
+        raise engine.ExpressionError("nothing to solve for")
+    return Equation(node, low, high)
+
+
+def find_roots(f, low, high, points=GRID):
+    xs = np.linspace(low, high, points)
+    ys = f(xs)
+    signs = np.sign(ys)
+    # NaN signs never compare below zero, so the domain's edges bracket nothing
+    at = np.flatnonzero(signs[:-1] * signs[1:] < 0)
+    a, b = xs[at], xs[at + 1]
+    fa, fb = ys[at], ys[at + 1]
+    roots = _narrow(f, a, b, fa, fb)
+    with np.errstate(all="ignore"):
+        # At a root |f| is below its values at the bracket's ends, at a pole
+        # far above them
+        real = np.abs(f(roots)) <= np.minimum(np.abs(fa), np.abs(fb))
+    return np.sort(np.concatenate((xs[ys == 0], roots[real])))
+
+
+def _narrow(f, a, b, fa, fb):
+    a, b, fa, fb = a.copy(), b.copy(), fa.copy(), fb.copy()
+    # Which end the last step moved: -1 for a, 1 for b, 0 for none yet
+    moved = np.zeros(len(a), dtype=np.int8)
+    bisect = np.zeros(len(a), dtype=bool)
+    active = np.arange(len(a))
+    for _ in range(MAX_STEPS):
+        if not len(active):
+            break
+        la, lb, lfa, lfb = a[active], b[active], fa[active], fb[active]
+        width = lb - la
+        with np.errstate(all="ignore"):
+            x = lb - lfb * width / (lfb - lfa)
+        outside = ~((x > la) & (x < lb))
+        x = np.where(bisect[active] | outside, la + width / 2, x)
+        fx = f(x)
+        # fx has the sign of fa: the root is in [x, b], and the other way round
+        left = np.sign(fx) == np.sign(lfa)
+        right = ~left
+        last = moved[active]
+        # Illinois: an end kept twice in a row has its value halved, so the
+        # next secant point lands on its side of the root
+        lfb = np.where(left & (last == -1), lfb / 2, lfb)
+        lfa = np.where(right & (last == 1), lfa / 2, lfa)
+        la = np.where(left, x, la)
+        lfa = np.where(left, fx, lfa)
+        lb = np.where(right, x, lb)
+        lfb = np.where(right, fx, lfb)
+        a[active], b[active], fa[active], fb[active] = la, lb, lfa, lfb
+        moved[active] = np.where(left, -1, 1)
+        new_width = lb - la
+        bisect[active] = new_width > width / 2
+        done = (fx == 0) | (new_width <= 4 * np.spacing(np.maximum(np.abs(la), np.abs(lb))))
+        a[active[fx == 0]] = x[fx == 0]
+        b[active[fx == 0]] = x[fx == 0]
+        active = active[~done]
+    return a + (b - a) / 2
+
+
+def format_roots(roots):
+    if not len(roots):
+        return "no roots"
+    texts = [format_result(float(root)) for root in roots]
+    if len(texts) > SHOWN + 1:
+        texts = texts[:SHOWN] + ["…", texts[-1]]
+        return f"{VARIABLE} = {', '.join(texts)} ({len(roots)} roots)"
+    return f"{VARIABLE} = {', '.join(texts)}"
+
+
+def solve(text):
+    # (status, text to display), like engine.calculate
+    try:
+        return engine.OK, format_roots(parse(text).solve())
+    except Exception:
+        return engine.ERROR, engine.ERROR_MESSAGE
@@ -0,0 +1,57 @@
+import json
+import os
+import sys
+import time
+
+# Startup timing for --profile-startup. Phases are measured back to back from
+# the moment main.py starts running; the interpreter phase covers everything
+# before that (for a PyInstaller onefile build, including the unpacking done
+# by the bootloader process).
+
+
+def _process_age(pid):
+    # Seconds since the process started, from /proc (Linux only)
+    try:
+        with open(f"/proc/{pid}/stat") as f:
+            fields = f.read().rsplit(")", 1)[1].split()
+        started = int(fields[19]) / os.sysconf("SC_CLK_TCK")
+        return time.clock_gettime(time.CLOCK_BOOTTIME) - started
+    except (OSError, ValueError, IndexError, AttributeError):
+        return None
+
+
+def _is_onefile():
+    # A onefile build runs in a child of the bootloader, from a _MEIxxxx dir
+    bundle = getattr(sys, "_MEIPASS", None)
+    return bool(getattr(sys, "frozen", False) and bundle
+                and os.path.basename(bundle).startswith("_MEI"))
+
+
+class StartupProfile:
+    def __init__(self):
+        self.start = self.last = time.perf_counter()
+        self.enabled = "--profile-startup" in sys.argv[1:]
+        self.phases = {}
+        self.interpreter = _process_age(os.getppid() if _is_onefile() else os.getpid())
+
+    def mark(self, phase):
+        now = time.perf_counter()
+        self.phases[phase] = self.phases.get(phase, 0.0) + now - self.last
+        self.last = now
+
+    def report(self, until="first_frame"):
+        total = self.interpreter or 0.0
+        for phase, seconds in self.phases.items():
+            total += seconds
+            if phase == until:
+                break
+        return {
+            "interpreter_ms": None if self.interpreter is None else round(self.interpreter * 1000, 2),
+            "phases_ms": {phase: round(seconds * 1000, 2) for phase, seconds in self.phases.items()},
+            "time_to_first_paint_ms": round(total * 1000, 2),
+            "frozen": bool(getattr(sys, "frozen", False)),
+        }
+
+    def print_report(self, out=sys.stdout):
+        out.write(json.dumps(self.report()) + "\n")
+        out.flush()
@@ -0,0 +1,198 @@
+from PyQt6.QtCore import QAbstractTableModel, QModelIndex, QProcess, Qt, QTimer, pyqtSignal
+from PyQt6.QtGui import QColor
+from PyQt6.QtWidgets import QHeaderView, QLabel, QTableView, QVBoxLayout, QWidget
+
+import engine
+import formatting
+import worker
+
+# Tape window for pasted blocks: one expression per line, evaluated by a
+# "--batch --tape" process fed the whole block on stdin. Results are read
+# as the process flushes them, at most every UPDATE_MS, and only mark the
+# rows they fill as changed; the table has fixed row heights and only paints
+# the visible rows, so a block of hundreds of thousands of lines shows its
+# first results at once and the window stays responsive while the rest come
+# in.
+
+RESULT_COLOR = QColor("#bb86fc")
+ERROR_COLOR = QColor("#cf6679")
+PENDING = "…"
+UPDATE_MS = 30
+
+
+class TapeModel(QAbstractTableModel):
+    def __init__(self, lines, parent=None):
+        super().__init__(parent)
+        self.lines = lines
+        # (status, result text) of the lines evaluated so far, in order
+        self.results = []
+        # Running total of the numeric results, with Neumaier compensation
+        self.total = 0.0
+        self.compensation = 0.0
+
+    def rowCount(self, parent=QModelIndex()):
+        return 0 if parent.isValid() else len(self.lines)
+
+    def columnCount(self, parent=QModelIndex()):
+        return 0 if parent.isValid() else 2
+
+    def data(self, index, role=Qt.ItemDataRole.DisplayRole):
+        if not index.isValid():
+            return None
+        row = index.row()
+        if role == Qt.ItemDataRole.DisplayRole:
+            if index.column() == 0:
+                return self.lines[row]
+            return self.results[row][1] if row < len(self.results) else PENDING
+        if role == Qt.ItemDataRole.TextAlignmentRole and index.column() == 1:
+            return Qt.AlignmentFlag.AlignRight | Qt.AlignmentFlag.AlignVCenter
+        if role == Qt.ItemDataRole.ForegroundRole and index.column() == 1 and row < len(self.results):
+            return RESULT_COLOR if self.results[row][0] == engine.OK else ERROR_COLOR
+        return None
+
+    def add_results(self, output_lines):
+        first = len(self.results)
+        for line in output_lines:
+            status, number, text = line.split("\t", 2)
+            self.results.append((status, text))
+            if number:
+                self.add(float(number))
+        if len(self.results) > first:
+            self.dataChanged.emit(self.index(first, 1), self.index(len(self.results) - 1, 1))
+
+    def add(self, value):
+        total = self.total + value
+        if abs(self.total) >= abs(value):
+            self.compensation += (self.total - total) + value
+        else:
+            self.compensation += (value - total) + self.total
+        self.total = total
+
+    def total_text(self):
+        return formatting.format_result(self.total + self.compensation)
+
+
+class TapePanel(QWidget):
+    expression_chosen = pyqtSignal(str)
+
+    def __init__(self, parent=None):
+        super().__init__(parent, Qt.WindowType.Tool)
+        self.setWindowTitle("98kalculator tape")
+        self.setObjectName("TapePanel")
+        self.resize(560, 620)
+        self.model = None
+        self.process = None
+        self.pending = b""
+        self.update_timer = QTimer(self)
+        self.update_timer.setSingleShot(True)
+        self.update_timer.setInterval(UPDATE_MS)
+        self.update_timer.timeout.connect(self.read_results)
+
+        layout = QVBoxLayout(self)
+        layout.setContentsMargins(12, 12, 12, 12)
+        layout.setSpacing(8)
+
+        self.view = QTableView()
+        self.view.setShowGrid(False)
+        self.view.setWordWrap(False)
+        self.view.setSelectionBehavior(QTableView.SelectionBehavior.SelectRows)
+        self.view.horizontalHeader().hide()
+        self.view.horizontalHeader().setSectionResizeMode(QHeaderView.ResizeMode.Stretch)
+        # Fixed row heights: the view never measures rows it does not paint
+        rows = self.view.verticalHeader()
+        rows.hide()
+        rows.setSectionResizeMode(QHeaderView.ResizeMode.Fixed)
+        rows.setDefaultSectionSize(self.view.fontMetrics().height() + 10)
+        self.view.activated.connect(self.on_activated)
+        layout.addWidget(self.view)
+
+        self.total = QLabel()
+        self.total.setAlignment(Qt.AlignmentFlag.AlignRight | Qt.AlignmentFlag.AlignVCenter)
+        layout.addWidget(self.total)
+
+        self.setStyleSheet("""
+        QWidget#TapePanel { background-color: #050505; }
+        QTableView {
+            background-color: #000000; color: #e0e0e0; border: none;
+            font-family: 'Segoe UI', Roboto, sans-serif; font-size: 16px;
+        }
+        QTableView::item:selected { background-color: #3d0075; color: #ffffff; }
+        QLabel {
+            color: #e0e0e0; padding: 4px;
+            font-family: 'Segoe UI', Roboto, sans-serif; font-size: 18px;
+        }
+        """)
+
+    def evaluate(self, text):
+        self.stop()
+        lines = text.replace("\r\n", "\n").replace("\r", "\n").split("\n")
+        if lines and not lines[-1]:
+            lines.pop()
+        self.model = TapeModel(lines, self)
+        self.view.setModel(self.model)
+        self.update_total()
+
+        program, *args = worker.main_command(["--batch", "--tape", f"--cpu-limit={worker.CPU_LIMIT}",
+                                                f"--memory-limit={worker.MEMORY_LIMIT_MB}", "-"])
+        self.process = QProcess(self)
+        self.process.readyReadStandardOutput.connect(self.on_output)
+        self.process.finished.connect(self.on_finished)
+        self.process.start(program, args)
+        # The whole block is handed over at once; Qt writes it to the pipe
+        # as the process reads
+        self.process.write(("\n".join(lines) + "\n").encode("utf-8"))
+        self.process.closeWriteChannel()
+
+    def on_output(self):
+        # The first results are shown as soon as they arrive, later ones in
+        # batches
+        if not self.model.results:
+            self.read_results()
+        elif not self.update_timer.isActive():
+            self.update_timer.start()
+
+    def read_results(self):
+        if self.process is None:
+            return
+        data = self.pending + bytes(self.process.readAllStandardOutput())
+        complete, _, self.pending = data.rpartition(b"\n")
+        if complete:
+            self.model.add_results(complete.decode("utf-8").split("\n"))
+            self.update_total()
+
+    def on_finished(self, *args):
+        if self.sender() is not self.process:
+            return
+        self.update_timer.stop()
+        self.read_results()
+        if len(self.model.results) < len(self.model.lines):
+            # The process died part way; what is left cannot be evaluated
+            self.model.add_results(
+                f"{engine.ERROR}\t\t{engine.ERROR_MESSAGE}"
+                for _ in range(len(self.model.lines) - len(self.model.results)))
+            self.update_total()
+        self.process = None
+
+    def update_total(self):
+        done = len(self.model.results)
+        count = len(self.model.lines)
+        progress = "" if done == count else f"{done:,} of {count:,} lines · "
+        self.total.setText(f"{progress}Σ = {self.model.total_text()}")
+
+    def stop(self):
+        if self.process is not None:
+            process, self.process = self.process, None
+            process.kill()
+            process.waitForFinished(1000)
+            process.deleteLater()
+        self.update_timer.stop()
+        self.pending = b""
+
+    def on_activated(self, index):
+        expression = self.model.lines[index.row()].strip()
+        if expression:
+            self.expression_chosen.emit(expression)
+
+    def closeEvent(self, event):
+        self.stop()
+        super().closeEvent(event)
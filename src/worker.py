@@ -0,0 +1,83 @@
+import os
+import resource
+import sys
+
+import precise
+
+# Evaluation worker process. The window talks to it over stdin/stdout with one
+# request per line, "<job>\t<expression>", and one reply per line,
+# "<job>\t<status>\t<path>\t<text>", where path is the precision the result
+# was computed at (see precise.py). CPU time and address space are capped with
+# rlimits, so a runaway expression kills the worker instead of the window.
+
+LIMIT = precise.LIMIT
+LIMIT_MESSAGE = precise.LIMIT_MESSAGE
+
+CPU_LIMIT = 5
+MEMORY_LIMIT_MB = 1024
+
+
+def main_command(args):
+    # Command line that runs this installation's main.py (or binary) with args
+    if getattr(sys, "frozen", False):
+        return [sys.executable] + args
+    main_script = os.path.join(os.path.dirname(os.path.abspath(__file__)), "main.py")
+    return [sys.executable, main_script] + args
+
+
+def command(cpu_limit=CPU_LIMIT, memory_limit=MEMORY_LIMIT_MB):
+    # Command line that starts a worker from this installation
+    return main_command(["--worker", f"--cpu-limit={cpu_limit}", f"--memory-limit={memory_limit}"])
+
+
+def _set_limit(kind, soft):
+    _, hard = resource.getrlimit(kind)
+    if hard != resource.RLIM_INFINITY:
+        soft = min(soft, hard)
+    resource.setrlimit(kind, (soft, hard))
+
+
+def set_memory_limit(megabytes):
+    _set_limit(resource.RLIMIT_AS, megabytes * 1024 * 1024)
+
+
+def _cpu_used():
+    usage = resource.getrusage(resource.RUSAGE_SELF)
+    return usage.ru_utime + usage.ru_stime
+
+
+def set_cpu_limit(seconds):
+    # RLIMIT_CPU counts the whole process, so the limit is set from what has
+    # been used so far. Going over it delivers SIGXCPU.
+    _set_limit(resource.RLIMIT_CPU, int(_cpu_used()) + 1 + seconds)
+
+
+def evaluate(expression):
+    try:
+        return precise.calculate(expression)
+    except MemoryError:
+        return LIMIT, LIMIT_MESSAGE, precise.FLOAT
+
+
+def serve(stdin, stdout, cpu_limit=CPU_LIMIT, memory_limit=MEMORY_LIMIT_MB):
+    if memory_limit:
+        set_memory_limit(memory_limit)
+    # Waiting workers run one evaluation ahead, so the first real one does
+    # not pay for the first-call costs
+    evaluate("1+1")
+    for line in stdin:
+        job, _, expression = line.rstrip("\n").partition("\t")
+        if cpu_limit:
+            # Moved along per job; SIGXCPU ends the worker
+            set_cpu_limit(cpu_limit)
+        status, text, path = evaluate(expression)
+        stdout.write(f"{job}\t{status}\t{path}\t{text}\n")
+        stdout.flush()
+
+
+def main(argv):
+    options = dict(arg[2:].split("=", 1) for arg in argv if arg.startswith("--") and "=" in arg)
+    serve(sys.stdin, sys.stdout,
+          cpu_limit=int(options.get("cpu-limit", CPU_LIMIT)),
+          memory_limit=int(options.get("memory-limit", MEMORY_LIMIT_MB)))
+    return 0
@@ -0,0 +1,493 @@
+import math
+import re
+from collections import defaultdict, deque
+
+import engine
+import precise
+import preview
+import worker
+
+# A worksheet of lines evaluated like the "=" key, where a line can also
+# define a variable ("a = 3") or a function ("f(x) = x^2 + sin(x)") for the
+# other lines. Every line records the names it reads; changing a line only
+# recomputes the lines that read what it defines, transitively, in dependency
+# order. Identical subexpressions are interned and their values memoized
+# across lines until one of the names they read changes. A line can also be
+# an equation in x ("x^2 = a", "solve(sin(x) = a, 0..10)"), which shows its
+# roots (see solver.py).
+#
+# Lines are evaluated in the window's own process, so powers and factorials
+# beyond the live preview's limits (see preview.py) are not computed; such a
+# line shows the message "=" gives for an expression too large. A line's
+# result is shown as "=" shows it (see precise.py), with the values of the
+# variables it reads written in, unless it calls a worksheet function.
+
+OK = engine.OK
+ERROR = engine.ERROR
+
+# name = body, or name(params) = body
+_DEFINITION_RE = re.compile(
+    r"\s*([^\W\d_]+)\s*(\(\s*([^\W\d_]+(?:\s*,\s*[^\W\d_]+)*)?\s*\))?\s*=(.*)\Z", re.S)
+_RESERVED = frozenset(engine.FUNCTIONS) | frozenset(engine.CONSTANTS) | engine.REDUCTIONS | {"mod"}
+
+
+
+def _factorial(value):
+    if value > preview.MAX_FACTORIAL:
+        raise preview.PreviewTooExpensive("factorial too large for a worksheet")
+    return engine.UNARY_OPS["!"](value)
+
+
+_BINARY = dict(engine.BINARY_OPS, **{"^": preview.guarded_power})
+_UNARY = dict(engine.UNARY_OPS, **{"!": _factorial})
+
+VARIABLE = "variable"
+FUNCTION = "function"
+EXPRESSION = "expression"
+EQUATION = "equation"
+
+
+class _Line:
+    __slots__ = ("text", "kind", "name", "params", "reads", "node", "fn", "status", "value", "display", "calls")
+
+    def __init__(self, text):
+        self.text = text
+        self.kind = EXPRESSION
+        self.name = None
+        self.params = ()
+        self.reads = frozenset()
+        self.node = None
+        self.fn = None
+        self.status = OK
+        self.value = None
+        # (status, text) shown for the value, worked out when first drawn
+        self.display = None
+        # Memoized results of a function line, by argument tuple
+        self.calls = {}
+
+
+class Worksheet:
+    def __init__(self, position=None):
+        self.lines = {}
+        # Sort key for line ids in document order, where a name defined twice
+        # takes the first definition; by default ids are in document order
+        self.position = position
+        self.definers = defaultdict(set)
+        self.readers = defaultdict(set)
+        self.subtrees = {}
+        self.subtree_reads = defaultdict(set)
+        self.memo = {}
+        # Counter for benchmarks
+        self.evaluated = 0
+
+    # Lines
+
+    def set(self, line_id, text):
+        return self.update({line_id: text})
+
+    def remove(self, line_id):
+        return self.update({line_id: None})
+
+    def update(self, changes):
+        # Applies {line id: new text, or None to remove the line} and
+        # recomputes once; returns the ids of the lines whose result may have
+        # changed
+        changed = set()
+        touched = set()
+        for line_id, text in changes.items():
+            old = self.lines.get(line_id)
+            if old is not None:
+                if old.text == text:
+                    continue
+                changed |= self._detach(line_id)
+                del self.lines[line_id]
+            if text is None:
+                continue
+            line = self.lines[line_id] = _Line(text)
+            self._parse(line)
+            for name in line.reads:
+                self.readers[name].add(line_id)
+            if line.name is not None:
+                self.definers[line.name].add(line_id)
+                changed.add(line.name)
+            touched.add(line_id)
+        if not changed and not touched:
+            return set()
+        return self._recompute(touched | self._affected(changed), changed)
+
+    def _detach(self, line_id):
+        line = self.lines[line_id]
+        for name in line.reads:
+            readers = self.readers[name]
+            readers.discard(line_id)
+            if not readers:
+                del self.readers[name]
+        if line.name is None:
+            return set()
+        definers = self.definers[line.name]
+        definers.discard(line_id)
+        if not definers:
+            del self.definers[line.name]
+        return {line.name}
+
+    def result(self, line_id):
+        # (status, text to display); function lines show their signature
+        line = self.lines[line_id]
+        if line.status != OK:
+            return line.status, line.value
+        if line.kind == FUNCTION:
+            return OK, f"{line.name}({', '.join(line.params)})"
+        if line.kind == EQUATION:
+            return OK, line.value
+        if line.display is None:
+            line.display = self._display(line)
+        return line.display
+
+    def _display(self, line):
+        try:
+            node = self._substitute(line.node)
+        except Exception:
+            node = None
+        if node is not None:
+            status, text, _ = precise.calculate_node(node)
+            return status, text
+        try:
+            return OK, engine.format_result(line.value)
+        except Exception:
+            return ERROR, engine.ERROR_MESSAGE
+
+    def _substitute(self, node):
+        # node with the variables it reads replaced by their values, or None
+        # if it calls a worksheet function
+        kind = node[0]
+        if kind == "name" and node[1] not in engine.CONSTANTS:
+            value = self.variable(node[1])
+            if value.__class__ not in (int, float):
+                return None
+            return ("num", value)
+        if kind == "apply":
+            args = node[2]
+            if self._definer(node[1]).kind != VARIABLE or len(args) != 1:
+                return None
+            node = ("bin", "*", ("name", node[1]), args[0])
+            kind = "bin"
+        if kind in ("num", "name"):
+            return node
+        if kind in ("bin", "call"):
+            start = 2
+        elif kind in _UNARY:
+            start = 1
+        else:
+            # Lists are left to the worksheet
+            return None
+        children = [self._substitute(child) for child in node[start:]]
+        if None in children:
+            return None
+        return node[:start] + tuple(children)
+
+    # Parsing and compiling
+
+    def _parse(self, line):
+        text = line.text
+        match = _DEFINITION_RE.match(text)
+        if match:
+            line.name, parens, params, text = match.groups()
+            line.kind = VARIABLE if parens is None else FUNCTION
+            if params:
+                line.params = tuple(param.strip() for param in params.split(","))
+        elif "=" in text or "solve" in text:
+            self._parse_equation(line)
+            return
+        if not text.strip():
+            line.status, line.value = ERROR, engine.ERROR_MESSAGE
+            return
+        try:
+            if line.name in _RESERVED or len(set(line.params)) != len(line.params):
+                raise engine.ExpressionError("bad definition")
+            reads = set()
+            line.node = engine.parse(engine.normalize(text), applications=True)
+            line.fn = self._compile(line.node, line.params, reads)
+            line.reads = frozenset(reads)
+        except Exception:
+            line.fn = None
+            line.status, line.value = ERROR, engine.ERROR_MESSAGE
+
+    def _parse_equation(self, line):
+        try:
+            import solver
+            equation = solver.parse(line.text)
+        except Exception:
+            # Not an equation after all, or no NumPy
+            line.status, line.value = ERROR, engine.ERROR_MESSAGE
+            return
+        line.kind = EQUATION
+        line.reads = equation.names
+        line.fn = lambda args: solver.format_roots(equation.solve(self.variable))
+
+    def _compile(self, node, params, reads):
+        # Returns fn(args) -> value, where args holds the parameter values of
+        # the function being defined. Subtrees that do not depend on
+        # parameters are interned and memoized.
+        names = set()
+        fn, depends_on_args = self._compile_node(node, params, names)
+        reads |= names
+        if depends_on_args or node[0] in ("num", "name"):
+            return fn
+        return self._memoized(node, fn, names)
+
+    def _memoized(self, node, fn, names):
+        key = self.subtrees.get(node)
+        if key is None:
+            key = self.subtrees[node] = len(self.subtrees)
+            for name in names:
+                self.subtree_reads[name].add(key)
+        memo = self.memo
+
+        def memoized(args):
+            try:
+                return memo[key]
+            except KeyError:
+                value = memo[key] = fn(args)
+                return value
+        return memoized
+
+    def _compile_node(self, node, params, names):
+        kind = node[0]
+        if kind == "num":
+            value = node[1]
+            return (lambda args: value), False
+        if kind == "name":
+            name = node[1]
+            if name in params:
+                index = params.index(name)
+                return (lambda args: args[index]), True
+            if name in engine.CONSTANTS:
+                value = engine.CONSTANTS[name]
+                return (lambda args: value), False
+            names.add(name)
+            return (lambda args: self.variable(name)), False
+
+        if kind in ("bin", "call"):
+            children = node[2:]
+        elif kind == "apply":
+            children = node[2]
+        else:
+            children = node[1:]
+        compiled = []
+        depends_on_args = False
+        for child in children:
+            child_names = set()
+            fn, child_args = self._compile_node(child, params, child_names)
+            names |= child_names
+            depends_on_args |= child_args
+            if not child_args and child[0] not in ("num", "name"):
+                fn = self._memoized(child, fn, child_names)
+            compiled.append(fn)
+
+        if kind == "bin":
+            op = _BINARY[node[1]]
+            left, right = compiled
+            return (lambda args: op(left(args), right(args))), depends_on_args
+        if kind == "call":
+            op = engine.FUNCTIONS[node[1]]
+        elif kind in _UNARY:
+            op = _UNARY[kind]
+        else:
+            name = node[1]
+            names.add(name)
+            return (lambda args: self.apply(name, [fn(args) for fn in compiled])), depends_on_args
+        arg, = compiled
+        return (lambda args: op(arg(args))), depends_on_args
+
+    # Evaluation
+
+    def _definer(self, name):
+        ids = self.definers.get(name)
+        if not ids:
+            raise engine.ExpressionError(f"unknown name {name!r}")
+        return self.lines[self._first(ids)]
+
+    def _first(self, ids):
+        # The definition that counts among the lines defining a name
+        if len(ids) == 1:
+            for line_id in ids:
+                return line_id
+        return min(ids, key=self.position)
+
+    def variable(self, name):
+        line = self._definer(name)
+        if line.kind != VARIABLE:
+            raise engine.ExpressionError(f"{name} is a function")
+        if line.status != OK:
+            raise engine.ExpressionError(f"{name} has no value")
+        return line.value
+
+    def apply(self, name, args):
+        line = self._definer(name)
+        if line.kind == VARIABLE:
+            # a(1+2) with a variable a is a product, as elsewhere
+            if len(args) != 1:
+                raise engine.ExpressionError(f"{name} is not a function")
+            return engine.BINARY_OPS["*"](self.variable(name), args[0])
+        if line.status != OK or len(args) != len(line.params):
+            raise engine.ExpressionError(f"bad call to {name}")
+        key = tuple(args)
+        try:
+            return line.calls[key]
+        except KeyError:
+            value = line.calls[key] = line.fn(key)
+            return value
+        except TypeError:
+            # Unhashable arguments: evaluate without memoizing
+            return line.fn(key)
+
+    def _affected(self, names):
+        # Lines defining or reading any of names, and in turn the lines
+        # reading what those define
+        found = set()
+        for name in names:
+            found.update(self.definers.get(name, ()))
+        pending = deque(names)
+        seen = set(names)
+        while pending:
+            name = pending.popleft()
+            for line_id in self.readers.get(name, ()):
+                if line_id in found:
+                    continue
+                found.add(line_id)
+                defined = self.lines[line_id].name
+                if defined is not None and defined not in seen:
+                    seen.add(defined)
+                    pending.append(defined)
+        return found
+
+    def _graph(self, line_ids):
+        # Edges from each line to the lines (among line_ids) that read the
+        # name it defines; only the first definition of a name counts
+        dependents = {line_id: [] for line_id in line_ids}
+        for line_id in line_ids:
+            for name in self.lines[line_id].reads:
+                definers = self.definers.get(name)
+                if definers:
+                    owner = self._first(definers)
+                    if owner in dependents:
+                        dependents[owner].append(line_id)
+        return dependents
+
+    def _order(self, dependents):
+        # Kahn's algorithm; returns the lines in dependency order and the
+        # lines left over because they are on or after a cycle
+        waiting = dict.fromkeys(dependents, 0)
+        for targets in dependents.values():
+            for target in targets:
+                waiting[target] += 1
+        ready = deque(line_id for line_id, count in waiting.items() if count == 0)
+        order = []
+        while ready:
+            line_id = ready.popleft()
+            order.append(line_id)
+            for dependent in dependents[line_id]:
+                waiting[dependent] -= 1
+                if waiting[dependent] == 0:
+                    ready.append(dependent)
+        return order, [line_id for line_id, count in waiting.items() if count > 0]
+
+    def _cycles(self, dependents):
+        # Lines on a cycle: strongly connected components with more than one
+        # line, or a line reading its own name (Tarjan's algorithm, iterative)
+        index = {}
+        low = {}
+        stack = []
+        on_stack = set()
+        cyclic = set()
+        for root in dependents:
+            if root in index:
+                continue
+            work = [(root, iter(dependents[root]))]
+            index[root] = low[root] = len(index)
+            stack.append(root)
+            on_stack.add(root)
+            while work:
+                node, targets = work[-1]
+                for target in targets:
+                    if target not in index:
+                        index[target] = low[target] = len(index)
+                        stack.append(target)
+                        on_stack.add(target)
+                        work.append((target, iter(dependents[target])))
+                        break
+                    if target in on_stack:
+                        low[node] = min(low[node], index[target])
+                else:
+                    work.pop()
+                    if work:
+                        parent = work[-1][0]
+                        low[parent] = min(low[parent], low[node])
+                    if low[node] == index[node]:
+                        component = []
+                        while True:
+                            member = stack.pop()
+                            on_stack.discard(member)
+                            component.append(member)
+                            if member == node:
+                                break
+                        if len(component) > 1 or node in dependents[node]:
+                            cyclic.update(component)
+        return cyclic
+
+    def _recompute(self, line_ids, changed):
+        # changed: names whose definition was added, replaced or removed
+        names = changed | {self.lines[i].name for i in line_ids}
+        names.discard(None)
+        for name in names:
+            for key in self.subtree_reads.get(name, ()):
+                self.memo.pop(key, None)
+        dependents = self._graph(line_ids)
+        order, blocked = self._order(dependents)
+        if blocked:
+            # Lines on a cycle are errors; the lines after them are ordered
+            # again without the cycles
+            blocked = {line_id: dependents[line_id] for line_id in blocked}
+            cyclic = self._cycles(blocked)
+            for line_id in cyclic:
+                line = self.lines[line_id]
+                line.calls.clear()
+                line.status, line.value = ERROR, engine.ERROR_MESSAGE
+            rest, _ = self._order({line_id: [t for t in targets if t not in cyclic]
+                                   for line_id, targets in blocked.items() if line_id not in cyclic})
+            order += rest
+        for line_id in order:
+            self._evaluate(line_id, self.lines[line_id])
+        return set(line_ids)
+
+    def _evaluate(self, line_id, line):
+        line.calls.clear()
+        line.display = None
+        if line.fn is None:
+            return
+        if line.name is not None and self._first(self.definers[line.name]) != line_id:
+            # Only the first definition of a name counts
+            line.status, line.value = ERROR, engine.ERROR_MESSAGE
+            return
+        if line.kind == FUNCTION:
+            line.status, line.value = OK, None
+            return
+        self.evaluated += 1
+        if "0/0" in line.text or "0÷0" in line.text:
+            line.status, line.value = engine.ZERO_DIVISION, engine.ZERO_MESSAGE
+            return
+        try:
+            value = line.fn(())
+        except preview.PreviewTooExpensive:
+            line.status, line.value = worker.LIMIT, worker.LIMIT_MESSAGE
+            return
+        except ZeroDivisionError:
+            line.status, line.value = engine.ZERO_DIVISION, engine.ZERO_MESSAGE
+            return
+        except Exception:
+            line.status, line.value = ERROR, engine.ERROR_MESSAGE
+            return
+        if isinstance(value, float) and math.isnan(value):
+            line.status, line.value = engine.ZERO_DIVISION, engine.ZERO_MESSAGE
+        else:
+            line.status, line.value = OK, value
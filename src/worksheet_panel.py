@@ -0,0 +1,127 @@
+import os
+from itertools import count
+
+from PyQt6.QtCore import QRectF, Qt, QTimer
+from PyQt6.QtGui import QColor, QPainter
+from PyQt6.QtWidgets import QPlainTextEdit, QVBoxLayout, QWidget
+
+import history
+from worksheet import OK, Worksheet
+
+# Worksheet window: one expression or definition per line, with each line's
+# result drawn at its right edge. An edit only hands the lines it touched to
+# the worksheet, which recomputes what depends on them, and results are drawn
+# for the visible lines only, so long sheets stay cheap to edit and scroll.
+
+FILE_NAME = "worksheet.txt"
+SAVE_DELAY_MS = 1000
+RESULT_COLOR = QColor("#bb86fc")
+ERROR_COLOR = QColor("#cf6679")
+
+
+class WorksheetEditor(QPlainTextEdit):
+    def __init__(self, parent=None):
+        super().__init__(parent)
+        self.next_id = count()
+        # Worksheet line id of every block, in document order
+        self.ids = [next(self.next_id)]
+        self.sheet = Worksheet(position=self.ids.index)
+        self.setLineWrapMode(QPlainTextEdit.LineWrapMode.NoWrap)
+        self.document().contentsChange.connect(self.on_contents_change)
+
+    def on_contents_change(self, position, removed, added):
+        document = self.document()
+        first = document.findBlock(position).blockNumber()
+        last = document.findBlock(position + added).blockNumber()
+        if last < 0:
+            last = document.blockCount() - 1
+        new_count = last - first + 1
+        old_count = new_count + len(self.ids) - document.blockCount()
+        # Blocks that are still there keep their ids; only added ones get new
+        old_ids = self.ids[first:first + old_count]
+        new_ids = old_ids[:new_count] + [next(self.next_id) for _ in range(new_count - len(old_ids))]
+        self.ids[first:first + old_count] = new_ids
+
+        changes = dict.fromkeys(old_ids[new_count:])
+        block = document.findBlockByNumber(first)
+        for line_id in new_ids:
+            text = block.text()
+            changes[line_id] = text if text.strip() else None
+            block = block.next()
+        self.sheet.update(changes)
+        self.viewport().update()
+
+    def paintEvent(self, event):
+        super().paintEvent(event)
+        painter = QPainter(self.viewport())
+        painter.setFont(self.font())
+        fm = self.fontMetrics()
+        width = self.viewport().width() - 8
+        bottom = event.rect().bottom()
+        offset = self.contentOffset()
+        block = self.firstVisibleBlock()
+        while block.isValid():
+            rect = self.blockBoundingGeometry(block).translated(offset)
+            if rect.top() > bottom:
+                break
+            line_id = self.ids[block.blockNumber()]
+            if block.isVisible() and line_id in self.sheet.lines:
+                status, text = self.sheet.result(line_id)
+                # Results stay right of the line's own text
+                left = fm.horizontalAdvance(block.text()) + 24 - self.horizontalScrollBar().value()
+                painter.setPen(RESULT_COLOR if status == OK else ERROR_COLOR)
+                painter.drawText(QRectF(left, rect.top(), max(width - left, 0), rect.height()),
+                                 Qt.AlignmentFlag.AlignRight | Qt.AlignmentFlag.AlignVCenter,
+                                 fm.elidedText(text, Qt.TextElideMode.ElideLeft, max(width - left, 0)))
+            block = block.next()
+        painter.end()
+
+
+class WorksheetPanel(QWidget):
+    def __init__(self, parent=None, path=None):
+        super().__init__(parent, Qt.WindowType.Tool)
+        self.setWindowTitle("98kalculator worksheet")
+        self.setObjectName("WorksheetPanel")
+        self.resize(560, 620)
+        self.path = path or os.path.join(history.default_directory(), FILE_NAME)
+
+        layout = QVBoxLayout(self)
+        layout.setContentsMargins(12, 12, 12, 12)
+
+        self.editor = WorksheetEditor()
+        self.editor.setPlaceholderText("rate = 0.05\nf(x) = x × (1 + rate)\nf(200)")
+        layout.addWidget(self.editor)
+        try:
+            with open(self.path, encoding="utf-8") as f:
+                self.editor.setPlainText(f.read())
+        except OSError:
+            pass
+
+        self.save_timer = QTimer(self)
+        self.save_timer.setSingleShot(True)
+        self.save_timer.setInterval(SAVE_DELAY_MS)
+        self.save_timer.timeout.connect(self.save)
+        self.editor.textChanged.connect(self.save_timer.start)
+
+        self.setStyleSheet("""
+        QWidget#WorksheetPanel { background-color: #050505; }
+        QPlainTextEdit {
+            background-color: #000000; color: #e0e0e0;
+            border: 1px solid #3d0075; border-radius: 8px; padding: 6px;
+            font-family: 'Segoe UI', Roboto, sans-serif; font-size: 16px;
+        }
+        """)
+
+    def save(self):
+        try:
+            os.makedirs(os.path.dirname(self.path), exist_ok=True)
+            with open(self.path, "w", encoding="utf-8") as f:
+                f.write(self.editor.toPlainText())
+        except OSError:
+            pass
+
+    def hideEvent(self, event):
+        if self.save_timer.isActive():
+            self.save_timer.stop()
+            self.save()
+        super().hideEvent(event)
@@ -1,3 +1,4 @@
+import argparse
 import os
 import shutil
 import subprocess
@@ -48,55 +49,144 @@ def install_git():
     print_status("Please install git manually and restart the updater.", "31")
     return False
 
-def update_repo():
-    print_status("Checking for updates from GitHub...", "34")
+# Paths that end up in the binary or the menu entry; an update touching only
+# other files (docs, benchmarks, packaging) needs no rebuild
+BUILD_PATHS = ("src/", "install.py", "icon.png")
+BINARY_NAME = "98kalculator"
+
+
+def run_git(args, repo=".", strip=True):
+    # Output of a git command; stripped for commands that print one value
+    output = subprocess.run(["git", "-C", repo] + args, capture_output=True, text=True, check=True).stdout
+    return output.strip() if strip else output
+
+
+def dirty_paths(repo="."):
+    # Tracked files with local changes. With -z the status columns are kept
+    # and paths are not quoted; a rename is followed by its original path.
+    output = run_git(["status", "--porcelain", "-z", "--untracked-files=no"], repo, strip=False)
+    entries = iter(output.split("\0"))
+    paths = []
+    for entry in entries:
+        if not entry:
+            continue
+        paths.append(entry[3:])
+        if entry[0] in "RC":
+            paths.append(next(entries, ""))
+    return paths
+
+
+def tracked_branch(repo="."):
+    # (remote, branch) the current branch follows, e.g. ("origin", "main")
+    try:
+        upstream = run_git(["rev-parse", "--abbrev-ref", "--symbolic-full-name", "@{u}"], repo)
+        remote, _, branch = upstream.partition("/")
+        if remote and branch:
+            return remote, branch
+    except subprocess.CalledProcessError:
+        pass
     try:
-        if not os.path.exists(".git"):
-            print_status("Not a git repository. Cannot update via git.", "31")
-            return False
+        branch = run_git(["rev-parse", "--abbrev-ref", "HEAD"], repo)
+    except subprocess.CalledProcessError:
+        branch = "main"
+    return "origin", branch
 
-        print_status("Fetching latest updates...", "34")
-        try:
-             subprocess.run(["git", "fetch", "--all"], check=True)
-        except subprocess.CalledProcessError:
-             print_status("Failed to fetch updates. Check internet connection.", "31")
-             return False
-
-        print_status("Resetting local files to match remote...", "33")
-        
-        # Determine current branch
-        try:
-            branch = subprocess.check_output(["git", "rev-parse", "--abbrev-ref", "HEAD"], text=True).strip()
-        except:
-            branch = "main" # Fallback
-
-        # Reset local changes to match the remote branch
-        result = subprocess.run(["git", "reset", "--hard", f"origin/{branch}"], capture_output=True, text=True)
-        
-        if result.returncode != 0:
-             print_status(f"Error resetting to remote: {result.stderr}", "31")
-             return False
-        
-        print_status("Successfully updated/restored to latest version!", "32")
+
+def remote_head(remote, branch, repo="."):
+    # Commit the remote branch points at, from the ref advertisement alone;
+    # no objects are downloaded
+    output = run_git(["ls-remote", "--heads", remote, f"refs/heads/{branch}"], repo)
+    return output.split()[0] if output else None
+
+
+def has_commit(sha, repo="."):
+    try:
+        run_git(["cat-file", "-e", f"{sha}^{{commit}}"], repo)
         return True
-            
-    except Exception as e:
-        print_status(f"An unexpected error occurred: {e}", "31")
+    except subprocess.CalledProcessError:
         return False
 
-def reinstall_app():
+
+def needs_rebuild(paths):
+    return any(path.startswith(BUILD_PATHS) for path in paths)
+
+
+def update_repo(repo=".", remote=None, branch=None):
+    # Returns the paths the update changed, or None if it failed
+    print_status("Checking for updates from GitHub...", "34")
+    if not os.path.exists(os.path.join(repo, ".git")):
+        print_status("Not a git repository. Cannot update via git.", "31")
+        return None
+    default_remote, default_branch = tracked_branch(repo)
+    remote = remote or default_remote
+    branch = branch or default_branch
+
+    try:
+        target = remote_head(remote, branch, repo)
+    except subprocess.CalledProcessError as e:
+        print_status(f"Failed to reach {remote}. Check internet connection. {e.stderr.strip()}", "31")
+        return None
+    if target is None:
+        print_status(f"Branch {branch} not found on {remote}.", "31")
+        return None
+
+    head = run_git(["rev-parse", "HEAD"], repo)
+    dirty = dirty_paths(repo)
+    if target == head and not dirty:
+        return []
+
+    if not has_commit(target, repo):
+        print_status(f"Fetching {remote}/{branch}...", "34")
+        # Only the tracked branch, and only objects that are not here yet. A
+        # shallow checkout stays shallow and skips the commits in between; a
+        # full one keeps its history.
+        fetch = ["fetch", "--no-tags", remote, f"refs/heads/{branch}"]
+        if run_git(["rev-parse", "--is-shallow-repository"], repo) == "true":
+            fetch.insert(1, "--depth=1")
+        try:
+            run_git(fetch, repo)
+        except subprocess.CalledProcessError as e:
+            print_status(f"Failed to fetch updates. {e.stderr.strip()}", "31")
+            return None
+        target = run_git(["rev-parse", "FETCH_HEAD"], repo)
+
+    changed = [path for path in run_git(["diff", "--name-only", "-z", "HEAD", target], repo, strip=False).split("\0") if path]
+    # Local edits to tracked files are discarded too, so they count as changes
+    changed += dirty
+
+    print_status("Resetting local files to match remote...", "33")
+    try:
+        run_git(["reset", "--hard", target], repo)
+    except subprocess.CalledProcessError as e:
+        print_status(f"Error resetting to remote: {e.stderr.strip()}", "31")
+        return None
+    print_status(f"Updated to {target[:12]} ({len(changed)} files changed).", "32")
+    return changed
+
+
+def reinstall_app(repo="."):
     print_status("Reinstalling application with new updates...", "33")
     try:
         # Run install.py
-        if os.path.exists("install.py"):
-            subprocess.run([sys.executable, "install.py"], check=True)
+        if os.path.exists(os.path.join(repo, "install.py")):
+            subprocess.run([sys.executable, "install.py", "--yes"], cwd=repo, check=True)
             print_status("Update and Reinstall Complete!", "32")
         else:
             print_status("install.py not found! Cannot reinstall.", "31")
     except subprocess.CalledProcessError as e:
         print_status(f" installation failed: {e}", "31")
 
-def main():
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Update 98kalculator from git.")
+    parser.add_argument("--force", action="store_true", help="reinstall even if nothing changed")
+    parser.add_argument("--remote", help="remote name or URL to update from (default: the tracked remote)")
+    parser.add_argument("--branch", help="branch to update to (default: the tracked branch)")
+    parser.add_argument("--repo", default=os.path.dirname(os.path.abspath(__file__)),
+                        help="checkout to update (default: this one)")
+    args = parser.parse_args(argv)
+    started = time.perf_counter()
+
     print("\n" + "="*50)
     print_status("Starting Update Process")
     print("="*50 + "\n")
@@ -104,23 +194,31 @@ def main():
     if not check_git_installed():
         if not install_git():
             print_status("Cannot proceed without git.", "31")
-            return
+            return 1
 
-    updated = update_repo()
-    
-    if updated:
-        reinstall_app()
+    changed = update_repo(args.repo, args.remote, args.branch)
+    binary = os.path.join(args.repo, BINARY_NAME)
+
+    if changed is None:
+        status = 1
+    elif args.force or needs_rebuild(changed) or not os.path.exists(binary):
+        reinstall_app(args.repo)
+        status = 0
     else:
-        # Ask to force reinstall if user wants
-        response = input("\nNo updates found. Force reinstall anyway? [y/N]: ").strip().lower()
-        if response == 'y':
-            reinstall_app()
-    
+        if changed:
+            print_status("Only files outside the application changed, no rebuild needed.", "32")
+        else:
+            print_status("Already up to date.", "32")
+        status = 0
+
     print("\n" + "="*50)
-    print_status("Updater finished.")
+    print_status(f"Updater finished in {time.perf_counter() - started:.2f}s.")
     print("="*50 + "\n")
-    
-    input("Press Enter to exit...")
+
+    # Opened from the application menu the terminal would close right away
+    if sys.stdin.isatty():
+        input("Press Enter to exit...")
+    return status
 
 if __name__ == "__main__":
-    main()
+    sys.exit(main())